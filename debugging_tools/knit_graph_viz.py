@@ -21,42 +21,34 @@ def visualize_knitGraph(knit_graph: Knit_Graph, display_name: str = "nx.html", h
     # network.options.layout.hierarchical.blockShifting = False
     network.options.layout.hierarchical.edgeMinimization = True
     # network.options.layout.hierarchical.parentCentralization = False
-    loop_ids_to_course, course_to_loop_ids = knit_graph.get_courses()
-    loop_ids_row_index = {}
-    for node in knit_graph.graph.nodes:
-        course = loop_ids_to_course[node]
-        loops_in_course = course_to_loop_ids[course]
-        if course % 2 != 0:
-            loops_in_course = [*reversed(loops_in_course)]
-        loop_ids_row_index[node] = loops_in_course.index(node)
     prior_level = -1
     nodes_to_levels = {}
-    for node in knit_graph.graph.nodes:
-        course = loop_ids_to_course[node]
-        parent_ids = [*knit_graph.graph.predecessors(node)]
-        level = -1
-        if len(parent_ids) == 0:
-            if course % 2 == 0:
-                level = prior_level + 1
+    stitch_edges = []
+    for course in knit_graph.iter_courses():
+        for loop_pos, node in enumerate(course.loop_ids):
+            parent_edges = course.parent_edges(loop_pos)
+            level = -1
+            if len(parent_edges) == 0:
+                if course.course % 2 == 0:
+                    level = prior_level + 1
+                else:
+                    level = prior_level - 1
             else:
-                level = prior_level - 1
-        else:
-            for parent_id in parent_ids:
-                parent_offset = knit_graph.graph[parent_id][node]["parent_offset"]
-                parent_level = nodes_to_levels[parent_id]
-                level = parent_level - parent_offset
-                break
-        network.add_node(node, label=str(node), value=node, shape="circle", level=level, physics=True)
-        nodes_to_levels[node] = level
-        prior_level = level
+                for edge in parent_edges:
+                    parent_level = nodes_to_levels[course.parent_ids[edge]]
+                    level = parent_level - course.parent_offsets[edge]
+                    break
+            network.add_node(node, label=str(node), value=node, shape="circle", level=level, physics=True)
+            nodes_to_levels[node] = level
+            prior_level = level
+            for edge in parent_edges:
+                stitch_edges.append((course.parent_ids[edge], node, course.pull_direction(edge), course.depths[edge]))
 
     for yarn in knit_graph.yarns.values():
-        for prior_node, next_node in yarn.yarn_graph.edges:
+        for prior_node, next_node in zip(yarn.loop_ids[:-1], yarn.loop_ids[1:]):
             network.add_edge(prior_node, next_node, arrow="middle", physics=True, color="red")
 
-    for parent_id, child_id in knit_graph.graph.edges:
-        direction = knit_graph.graph[parent_id][child_id]["pull_direction"]
-        depth = knit_graph.graph[parent_id][child_id]["depth"]
+    for parent_id, child_id, direction, depth in stitch_edges:
         color = "blue"
         if depth < 0:
             color = "purple"
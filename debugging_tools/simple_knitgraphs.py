@@ -13,21 +13,11 @@ def stockinette(width: int = 4, height: int = 4, carrier:int=3) -> Knit_Graph:
     knitGraph = Knit_Graph()
     yarn = Yarn("yarn", knitGraph, carrier_id=carrier)
     knitGraph.add_yarn(yarn)
-    first_row = []
-    for _ in range(0, width):
-        loop_id, loop = yarn.add_loop_to_end()
-        first_row.append(loop_id)
-        knitGraph.add_loop(loop)
+    first_row = knitGraph.add_course(yarn, [[] for _ in range(0, width)])
 
     prior_row = first_row
     for _ in range(1, height):
-        next_row = []
-        for parent_id in reversed(prior_row):
-            child_id, child = yarn.add_loop_to_end()
-            next_row.append(child_id)
-            knitGraph.add_loop(child)
-            knitGraph.connect_loops(parent_id, child_id)
-        prior_row = next_row
+        prior_row = knitGraph.add_course(yarn, [[parent_id] for parent_id in reversed(prior_row)])
 
     return knitGraph
 
@@ -47,35 +37,29 @@ def rib(width: int = 4, height: int = 4, rib_width: int = 1) -> Knit_Graph:
     knitGraph = Knit_Graph()
     yarn = Yarn("yarn", knitGraph)
     knitGraph.add_yarn(yarn)
-    first_row = []
-    for _ in range(0, width):
-        loop_id, loop = yarn.add_loop_to_end()
-        first_row.append(loop_id)
-        knitGraph.add_loop(loop)
+    first_row = knitGraph.add_course(yarn, [[] for _ in range(0, width)])
 
     prior_row = first_row
-    next_row = []
+    parent_ids = []
+    pull_directions = []
     for column, parent_id in reversed([*enumerate(prior_row)]):
-        child_id, child = yarn.add_loop_to_end()
-        next_row.append(child_id)
-        knitGraph.add_loop(child)
+        parent_ids.append([parent_id])
         rib_id = int(int(column) / int(rib_width))
         if rib_id % 2 == 0:  # even ribs:
-            pull_direction = Pull_Direction.BtF
+            pull_directions.append(Pull_Direction.BtF)
         else:
-            pull_direction = Pull_Direction.FtB
-        knitGraph.connect_loops(parent_id, child_id, pull_direction=pull_direction)
+            pull_directions.append(Pull_Direction.FtB)
+    next_row = knitGraph.add_course(yarn, parent_ids, pull_directions)
 
     for _ in range(2, height):
         prior_row = next_row
-        next_row = []
+        parent_ids = []
+        pull_directions = []
         for parent_id in reversed(prior_row):
-            child_id, child = yarn.add_loop_to_end()
-            next_row.append(child_id)
-            knitGraph.add_loop(child)
+            parent_ids.append([parent_id])
             grand_parent = [*knitGraph.graph.predecessors(parent_id)][0]
-            parent_pull_direction = knitGraph.graph[grand_parent][parent_id]["pull_direction"]
-            knitGraph.connect_loops(parent_id, child_id, pull_direction=parent_pull_direction)
+            pull_directions.append(knitGraph.graph[grand_parent][parent_id]["pull_direction"])
+        next_row = knitGraph.add_course(yarn, parent_ids, pull_directions)
 
     return knitGraph
 
@@ -93,34 +77,29 @@ def seed(width: int = 4, height=4) -> Knit_Graph:
     knitGraph = Knit_Graph()
     yarn = Yarn("yarn", knitGraph)
     knitGraph.add_yarn(yarn)
-    first_row = []
-    for _ in range(0, width):
-        loop_id, loop = yarn.add_loop_to_end()
-        first_row.append(loop_id)
-        knitGraph.add_loop(loop)
+    first_row = knitGraph.add_course(yarn, [[] for _ in range(0, width)])
 
     prior_row = first_row
-    next_row = []
+    parent_ids = []
+    pull_directions = []
     for column, parent_id in enumerate(reversed(prior_row)):
-        child_id, child = yarn.add_loop_to_end()
-        next_row.append(child_id)
-        knitGraph.add_loop(child)
+        parent_ids.append([parent_id])
         if column % 2 == 0:  # even seed:
-            pull_direction = Pull_Direction.BtF
+            pull_directions.append(Pull_Direction.BtF)
         else:
-            pull_direction = Pull_Direction.FtB
-        knitGraph.connect_loops(parent_id, child_id, pull_direction=pull_direction)
+            pull_directions.append(Pull_Direction.FtB)
+    next_row = knitGraph.add_course(yarn, parent_ids, pull_directions)
 
     for _ in range(2, height):
         prior_row = next_row
-        next_row = []
+        parent_ids = []
+        pull_directions = []
         for parent_id in reversed(prior_row):
-            child_id, child = yarn.add_loop_to_end()
-            next_row.append(child_id)
-            knitGraph.add_loop(child)
+            parent_ids.append([parent_id])
             grand_parent = [*knitGraph.graph.predecessors(parent_id)][0]
             parent_pull_direction = knitGraph.graph[grand_parent][parent_id]["pull_direction"]
-            knitGraph.connect_loops(parent_id, child_id, pull_direction=parent_pull_direction.opposite())
+            pull_directions.append(parent_pull_direction.opposite())
+        next_row = knitGraph.add_course(yarn, parent_ids, pull_directions)
 
     return knitGraph
 
@@ -0,0 +1,425 @@
+"""A compact, array-backed replacement for the networkx.DiGraph used to store Knit_Graph stitches"""
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from knit_graphs.Knit_Graph import Pull_Direction
+from knit_graphs.Loop import Loop
+
+_PULL_DIRECTIONS: Tuple[Pull_Direction, Pull_Direction] = (Pull_Direction.BtF, Pull_Direction.FtB)
+
+
+class Array_Graph:
+    """
+    A directed graph of loops that stores stitch-edges in typed arrays instead of per-edge dictionaries.
+    Implements the subset of the networkx.DiGraph interface used on Knit_Graph.graph,
+     so it can be passed to Knit_Graph as a drop-in storage backend: Knit_Graph(Array_Graph())
+    ...
+
+    Parents of each child loop are kept as one contiguous block of the edge columns (CSR-style).
+    Stitches are almost always added to the newest loop, so blocks are appended to the end of the columns.
+    If an older loop gains a parent its block is moved to the end of the columns.
+    Loop ids are expected to be dense, as they are when created by a Yarn.
+
+    Attributes
+    ----------
+    nodes: _Node_View
+        the loop_ids in the graph in insertion order. nodes[loop_id]["loop"] is the Loop with that id
+    edges: _Edge_View
+        the (parent_id, child_id) stitch-edges in the graph
+    """
+
+    def __init__(self):
+        self._node_ids: array = array("q")  # loop ids in insertion order
+        self._node_indices: array = array("q")  # loop_id -> position in _node_ids, -1 if not in the graph
+        self._loops: List[Loop] = []
+        self._parent_starts: array = array("q")  # node position -> start of its parent block in the edge columns
+        self._parent_counts: array = array("H")  # node position -> number of parents
+        self._edge_parents: array = array("q")
+        self._edge_offsets: array = array("b")
+        self._edge_depths: array = array("b")
+        self._edge_pulls: bytearray = bytearray()  # 0 for BtF, 1 for FtB
+        self._edge_count: int = 0
+        self._child_starts: Optional[array] = None  # lazily built transpose used for successors
+        self._children: Optional[array] = None
+        self.nodes: _Node_View = _Node_View(self)
+        self.edges: _Edge_View = _Edge_View(self)
+
+    def load_columns(self, loop_ids: array, loops: List[Loop], parent_starts: array, parent_ids: array,
+                     pulls: bytearray, depths: array, offsets: array):
+        """
+        Fills an empty graph directly from columns in CSR form, as stored by Knit_Graph.save()
+        :param loop_ids: the loop ids in insertion order
+        :param loops: the Loop of each loop id
+        :param parent_starts: loop position -> start of its parents in the edge columns, with one extra entry for the end
+        :param parent_ids: the parent loop id of each stitch-edge
+        :param pulls: 0 for BtF, 1 for FtB for each stitch-edge
+        :param depths: the crossing depth of each stitch-edge
+        :param offsets: the parent offset of each stitch-edge
+        """
+        assert len(self._node_ids) == 0, "Columns can only be loaded into an empty graph"
+        self._node_ids = array("q", loop_ids)
+        self._loops = [*loops]
+        if len(loop_ids) > 0:
+            self._node_indices = array("q", [-1]) * (max(loop_ids) + 1)
+            for index, loop_id in enumerate(loop_ids):
+                self._node_indices[loop_id] = index
+        self._parent_starts = array("q", parent_starts[:-1])
+        self._parent_counts = array("H", [end - start for start, end in zip(parent_starts, parent_starts[1:])])
+        self._edge_parents = parent_ids
+        self._edge_pulls = pulls
+        self._edge_depths = depths
+        self._edge_offsets = offsets
+        self._edge_count = len(parent_ids)
+
+    def _index_of(self, loop_id: int) -> int:
+        """
+        :param loop_id: the loop id to find
+        :return: the position of the loop in the node columns or -1 if it is not in the graph
+        """
+        if type(loop_id) is not int or loop_id < 0 or loop_id >= len(self._node_indices):
+            return -1
+        return self._node_indices[loop_id]
+
+    def add_node(self, loop_id: int, loop: Optional[Loop] = None):
+        """
+        Adds a loop to the graph or replaces the Loop stored at an existing loop_id
+        :param loop_id: the id of the loop
+        :param loop: the Loop keyed to this id
+        """
+        index = self._index_of(loop_id)
+        if index >= 0:
+            if loop is not None:
+                self._loops[index] = loop
+            return
+        assert loop_id >= 0, f"{loop_id}: Loop_id must be non-negative"
+        if loop_id >= len(self._node_indices):
+            grow_to = max(loop_id + 1, 2 * len(self._node_indices))
+            self._node_indices.extend(array("q", [-1]) * (grow_to - len(self._node_indices)))
+        self._node_indices[loop_id] = len(self._node_ids)
+        self._node_ids.append(loop_id)
+        self._loops.append(loop)
+        self._parent_starts.append(len(self._edge_parents))
+        self._parent_counts.append(0)
+
+    def add_nodes_from(self, nodes: List[Tuple[int, Dict[str, Loop]]]):
+        """
+        :param nodes: (loop_id, {"loop": loop}) tuples to add in order
+        """
+        for loop_id, attributes in nodes:
+            if 0 <= loop_id < len(self._node_indices) and self._node_indices[loop_id] < 0:
+                self._node_indices[loop_id] = len(self._node_ids)
+                self._node_ids.append(loop_id)
+                self._loops.append(attributes.get("loop"))
+                self._parent_starts.append(len(self._edge_parents))
+                self._parent_counts.append(0)
+            else:  # grows the id index or replaces an existing loop
+                self.add_node(loop_id, **attributes)
+
+    def add_edge(self, parent_id: int, child_id: int, pull_direction: Pull_Direction = Pull_Direction.BtF,
+                 depth: int = 0, parent_offset: int = 0):
+        """
+        Adds a stitch-edge from parent to child, updating the attributes if the edge already exists
+        :param parent_id: the id of the parent loop
+        :param child_id: the id of the child loop
+        :param pull_direction: the direction the child is pulled through the parent
+        :param depth: the crossing depth of the stitch in a cable
+        :param parent_offset: the offset from the child to the parent
+        """
+        child_index = self._index_of(child_id)
+        if child_index < 0:
+            self.add_node(child_id)
+            child_index = self._index_of(child_id)
+        if self._index_of(parent_id) < 0:
+            self.add_node(parent_id)
+        start = self._parent_starts[child_index]
+        count = self._parent_counts[child_index]
+        for edge in range(start, start + count):
+            if self._edge_parents[edge] == parent_id:  # update existing edge
+                self._set_edge_attributes(edge, pull_direction, depth, parent_offset)
+                return
+        if count > 0 and start + count != len(self._edge_parents):  # move the parent block to the end of the columns
+            for edge in range(start, start + count):
+                self._edge_parents.append(self._edge_parents[edge])
+                self._edge_offsets.append(self._edge_offsets[edge])
+                self._edge_depths.append(self._edge_depths[edge])
+                self._edge_pulls.append(self._edge_pulls[edge])
+        self._parent_starts[child_index] = len(self._edge_parents) - count
+        self._append_edge(parent_id, pull_direction, depth, parent_offset)
+        self._parent_counts[child_index] = count + 1
+        self._child_starts = None
+        self._children = None
+
+    def _append_edge(self, parent_id: int, pull_direction: Pull_Direction, depth: int, parent_offset: int):
+        """
+        Appends a stitch-edge to the end of the edge columns
+        :param parent_id: the id of the parent loop
+        :param pull_direction: the direction the child is pulled through the parent
+        :param depth: the crossing depth of the stitch in a cable
+        :param parent_offset: the offset from the child to the parent
+        """
+        assert -128 <= depth < 128 and -128 <= parent_offset < 128, \
+            f"depth {depth} and parent offset {parent_offset} must fit in a byte"
+        self._edge_parents.append(parent_id)
+        self._edge_offsets.append(parent_offset)
+        self._edge_depths.append(depth)
+        self._edge_pulls.append(0 if pull_direction is Pull_Direction.BtF else 1)
+        self._edge_count += 1
+
+    def _set_edge_attributes(self, edge: int, pull_direction: Pull_Direction, depth: int, parent_offset: int):
+        """
+        Replaces the attributes of an existing edge
+        :param edge: the position of the edge in the edge columns
+        :param pull_direction: the direction the child is pulled through the parent
+        :param depth: the crossing depth of the stitch in a cable
+        :param parent_offset: the offset from the child to the parent
+        """
+        assert -128 <= depth < 128 and -128 <= parent_offset < 128, \
+            f"depth {depth} and parent offset {parent_offset} must fit in a byte"
+        self._edge_offsets[edge] = parent_offset
+        self._edge_depths[edge] = depth
+        self._edge_pulls[edge] = 0 if pull_direction is Pull_Direction.BtF else 1
+
+    def add_edges_from(self, edges: List[Tuple[int, int, Dict[str, Union[Pull_Direction, int]]]]):
+        """
+        :param edges: (parent_id, child_id, attribute dictionary) tuples to add in order
+        """
+        parent_starts = self._parent_starts
+        parent_counts = self._parent_counts
+        edge_parents = self._edge_parents
+        node_indices = self._node_indices
+        for parent_id, child_id, attributes in edges:
+            child_index = node_indices[child_id] if 0 <= child_id < len(node_indices) else -1
+            parent_known = 0 <= parent_id < len(node_indices) and node_indices[parent_id] >= 0
+            if child_index >= 0 and parent_known and parent_counts[child_index] == 0:
+                # first parent of a new child starts its block at the end of the columns
+                parent_starts[child_index] = len(edge_parents)
+                self._append_edge(parent_id, attributes.get("pull_direction", Pull_Direction.BtF),
+                                  attributes.get("depth", 0), attributes.get("parent_offset", 0))
+                parent_counts[child_index] = 1
+            elif child_index >= 0 and parent_known \
+                    and parent_starts[child_index] + parent_counts[child_index] == len(edge_parents) \
+                    and parent_id not in edge_parents[parent_starts[child_index]:]:  # block is already at the end
+                self._append_edge(parent_id, attributes.get("pull_direction", Pull_Direction.BtF),
+                                  attributes.get("depth", 0), attributes.get("parent_offset", 0))
+                parent_counts[child_index] += 1
+            else:
+                self.add_edge(parent_id, child_id, **attributes)
+                node_indices = self._node_indices
+        self._child_starts = None
+        self._children = None
+
+    def remove_nodes_from(self, loop_ids: List[int]):
+        """
+        Removes loops and their stitch-edges. Only the loops added last can be removed,
+         and their parent blocks must be at the end of the edge columns
+        :param loop_ids: the ids of the loops to remove
+        """
+        removed = set(loop_id for loop_id in loop_ids if self.has_node(loop_id))
+        if len(removed) == 0:
+            return
+        node_count = len(self._node_ids) - len(removed)
+        assert all(loop_id in removed for loop_id in self._node_ids[node_count:]), "Can only remove the loops added last"
+        first_removed_edge = min((self._parent_starts[index] for index in range(node_count, len(self._node_ids))
+                                  if self._parent_counts[index] > 0), default=self._edge_count)
+        assert all(self._parent_starts[index] + self._parent_counts[index] <= first_removed_edge for index in range(0, node_count)), \
+            "Can only remove loops whose parents are at the end of the edge columns"
+        for loop_id in self._node_ids[node_count:]:
+            self._node_indices[loop_id] = -1
+        del self._node_ids[node_count:]
+        del self._loops[node_count:]
+        del self._parent_starts[node_count:]
+        del self._parent_counts[node_count:]
+        del self._edge_parents[first_removed_edge:]
+        del self._edge_offsets[first_removed_edge:]
+        del self._edge_depths[first_removed_edge:]
+        del self._edge_pulls[first_removed_edge:]
+        self._edge_count = first_removed_edge
+        self._child_starts = None
+        self._children = None
+
+    def has_node(self, loop_id: int) -> bool:
+        """
+        :param loop_id: the loop id to find
+        :return: True if the loop is in the graph
+        """
+        return self._index_of(loop_id) >= 0
+
+    def _edge_position(self, parent_id: int, child_id: int) -> int:
+        """
+        :param parent_id: the id of the parent loop
+        :param child_id: the id of the child loop
+        :return: the position of the edge in the edge columns or -1 if there is no such edge
+        """
+        child_index = self._index_of(child_id)
+        if child_index < 0:
+            return -1
+        start = self._parent_starts[child_index]
+        for edge in range(start, start + self._parent_counts[child_index]):
+            if self._edge_parents[edge] == parent_id:
+                return edge
+        return -1
+
+    def has_edge(self, parent_id: int, child_id: int) -> bool:
+        """
+        :param parent_id: the id of the parent loop
+        :param child_id: the id of the child loop
+        :return: True if there is a stitch-edge from the parent to the child
+        """
+        return self._edge_position(parent_id, child_id) >= 0
+
+    def edge_attributes(self, parent_id: int, child_id: int) -> Dict[str, Union[Pull_Direction, int]]:
+        """
+        :param parent_id: the id of the parent loop
+        :param child_id: the id of the child loop
+        :return: a new dictionary with the pull_direction, depth, and parent_offset of the stitch-edge
+        """
+        edge = self._edge_position(parent_id, child_id)
+        if edge < 0:
+            raise KeyError((parent_id, child_id))
+        return {"pull_direction": _PULL_DIRECTIONS[self._edge_pulls[edge]],
+                "depth": self._edge_depths[edge],
+                "parent_offset": self._edge_offsets[edge]}
+
+    def predecessors(self, loop_id: int) -> Iterator[int]:
+        """
+        :param loop_id: the id of the child loop
+        :return: iterator over the parent loop ids in the order the stitch-edges were added
+        """
+        child_index = self._index_of(loop_id)
+        if child_index < 0:
+            raise KeyError(loop_id)
+        start = self._parent_starts[child_index]
+        return iter(self._edge_parents[start: start + self._parent_counts[child_index]])
+
+    def _build_children(self):
+        """
+        Builds the transpose of the parent blocks, grouping child ids by the position of their parents
+        """
+        node_count = len(self._node_ids)
+        counts = array("q", [0]) * (node_count + 1)
+        for child_index in range(0, node_count):
+            start = self._parent_starts[child_index]
+            for edge in range(start, start + self._parent_counts[child_index]):
+                counts[self._node_indices[self._edge_parents[edge]] + 1] += 1
+        for index in range(0, node_count):
+            counts[index + 1] += counts[index]
+        fill = array("q", counts)
+        children = array("q", [0]) * self._edge_count
+        for child_index, child_id in enumerate(self._node_ids):
+            start = self._parent_starts[child_index]
+            for edge in range(start, start + self._parent_counts[child_index]):
+                parent_index = self._node_indices[self._edge_parents[edge]]
+                children[fill[parent_index]] = child_id
+                fill[parent_index] += 1
+        self._child_starts = counts
+        self._children = children
+
+    def successors(self, loop_id: int) -> Iterator[int]:
+        """
+        :param loop_id: the id of the parent loop
+        :return: iterator over the child loop ids in the order the children were added to the graph
+        """
+        parent_index = self._index_of(loop_id)
+        if parent_index < 0:
+            raise KeyError(loop_id)
+        if self._children is None:
+            self._build_children()
+        return iter(self._children[self._child_starts[parent_index]: self._child_starts[parent_index + 1]])
+
+    def number_of_nodes(self) -> int:
+        """
+        :return: the number of loops in the graph
+        """
+        return len(self._node_ids)
+
+    def number_of_edges(self) -> int:
+        """
+        :return: the number of stitch-edges in the graph
+        """
+        return self._edge_count
+
+    def __contains__(self, loop_id: int) -> bool:
+        return self.has_node(loop_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._node_ids)
+
+    def __len__(self) -> int:
+        return len(self._node_ids)
+
+    def __getitem__(self, parent_id: int):
+        """
+        :param parent_id: the id of a parent loop
+        :return: a view of the children of the parent, indexed by child_id to get the stitch-edge attributes
+        """
+        if not self.has_node(parent_id):
+            raise KeyError(parent_id)
+        return _Successor_View(self, parent_id)
+
+
+class _Node_View:
+    """
+    A read-only view of the loop ids in an Array_Graph in insertion order
+    """
+
+    def __init__(self, graph: Array_Graph):
+        self._graph: Array_Graph = graph
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._graph._node_ids)
+
+    def __len__(self) -> int:
+        return len(self._graph._node_ids)
+
+    def __contains__(self, loop_id: int) -> bool:
+        return self._graph.has_node(loop_id)
+
+    def __getitem__(self, loop_id: int) -> Dict[str, Loop]:
+        index = self._graph._index_of(loop_id)
+        if index < 0:
+            raise KeyError(loop_id)
+        return {"loop": self._graph._loops[index]}
+
+
+class _Edge_View:
+    """
+    A read-only view of the (parent_id, child_id) stitch-edges of an Array_Graph grouped by child
+    """
+
+    def __init__(self, graph: Array_Graph):
+        self._graph: Array_Graph = graph
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        graph = self._graph
+        for child_index, child_id in enumerate(graph._node_ids):
+            start = graph._parent_starts[child_index]
+            for edge in range(start, start + graph._parent_counts[child_index]):
+                yield graph._edge_parents[edge], child_id
+
+    def __len__(self) -> int:
+        return self._graph.number_of_edges()
+
+    def __contains__(self, edge: Tuple[int, int]) -> bool:
+        return self._graph.has_edge(*edge)
+
+
+class _Successor_View:
+    """
+    A read-only view of the children of one parent loop, mirrors networkx's graph[parent_id] adjacency
+    """
+
+    def __init__(self, graph: Array_Graph, parent_id: int):
+        self._graph: Array_Graph = graph
+        self._parent_id: int = parent_id
+
+    def __getitem__(self, child_id: int) -> Dict[str, Union[Pull_Direction, int]]:
+        return self._graph.edge_attributes(self._parent_id, child_id)
+
+    def __contains__(self, child_id: int) -> bool:
+        return self._graph.has_edge(self._parent_id, child_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return self._graph.successors(self._parent_id)
+
+    def __len__(self) -> int:
+        return len([*self._graph.successors(self._parent_id)])
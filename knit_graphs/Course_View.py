@@ -0,0 +1,127 @@
+"""A compact read-only view of one course of a knit graph"""
+from array import array
+from typing import List, Optional, Sequence
+
+from knit_graphs.Knit_Graph import Pull_Direction
+
+NO_STACK_POSITION = 255
+
+
+class Course_View:
+    """
+    The loops of one course with their stitch-edges stored in flat arrays.
+    The parents of the loop at position i of the course are at positions parent_starts[i] to parent_starts[i+1]
+    of the edge arrays, in the order the stitch-edges were added to the graph
+    ...
+
+    Attributes
+    ----------
+    course: int
+        the course id
+    loop_ids: array
+        the loop ids on the course in the order of creation
+    parent_starts: array
+        the start of each loop's parents in the edge arrays, with one extra entry for the end
+    parent_ids: array
+        the parent loop id of each stitch-edge
+    stack_positions: array
+        the position of each parent in the child's stack of parent loops, NO_STACK_POSITION if not stacked
+    pull_directions: array
+        0 if the child is pulled BtF through the parent, 1 if FtB
+    depths: array
+        the crossing depth of each stitch-edge
+    parent_offsets: array
+        the parent offset of each stitch-edge
+    """
+    __slots__ = ("course", "loop_ids", "parent_starts", "parent_ids", "stack_positions",
+                 "pull_directions", "depths", "parent_offsets")
+
+    def __init__(self, course: int, loop_ids: array = None, parent_starts: array = None, parent_ids: array = None,
+                 stack_positions: array = None, pull_directions: array = None, depths: array = None,
+                 parent_offsets: array = None):
+        """
+        :param course: the course id
+        :param loop_ids: the loop ids on the course. Defaults to empty
+        :param parent_starts: the start of each loop's parents in the edge arrays. Defaults to no parents
+        :param parent_ids: the parent loop id of each stitch-edge
+        :param stack_positions: the stack position of each parent
+        :param pull_directions: the pull direction code of each stitch-edge
+        :param depths: the crossing depth of each stitch-edge
+        :param parent_offsets: the parent offset of each stitch-edge
+        """
+        self.course: int = course
+        self.loop_ids: array = array("q") if loop_ids is None else loop_ids
+        self.parent_starts: array = array("q", [0] * (len(self.loop_ids) + 1)) if parent_starts is None else parent_starts
+        self.parent_ids: array = array("q") if parent_ids is None else parent_ids
+        self.stack_positions: array = array("B") if stack_positions is None else stack_positions
+        self.pull_directions: array = array("B") if pull_directions is None else pull_directions
+        self.depths: array = array("b") if depths is None else depths
+        self.parent_offsets: array = array("b") if parent_offsets is None else parent_offsets
+
+    @staticmethod
+    def from_batch(course: int, loop_ids: Sequence[int], parent_ids: Sequence[Sequence[int]],
+                   pull_directions: Optional[Sequence[Pull_Direction]] = None, depths: Optional[Sequence[int]] = None,
+                   parent_offsets: Optional[Sequence[Sequence[int]]] = None):
+        """
+        Builds the view of a batch of loops given as to Knit_Graph.add_course, without a knit graph
+        :param course: the course id
+        :param loop_ids: the ids of the new loops in yarn-wise order
+        :param parent_ids: for each new loop, the ids of its parent loops in stack order
+        :param pull_directions: for each new loop, the direction it is pulled through its parents. Defaults to BtF
+        :param depths: for each new loop, the crossing depth of its stitches. Defaults to 0
+        :param parent_offsets: for each new loop, the offset to each parent loop. Defaults to 0
+        :return: the view of the batch
+        """
+        view = Course_View(course, array("q", loop_ids), array("q", [0]))
+        for i, parents in enumerate(parent_ids):
+            count = len(parents)
+            view.parent_ids.extend(parents)
+            view.stack_positions.extend(range(0, count))
+            pull_code = 0 if pull_directions is None or pull_directions[i] is Pull_Direction.BtF else 1
+            view.pull_directions.extend([pull_code] * count)
+            view.depths.extend([0 if depths is None else depths[i]] * count)
+            view.parent_offsets.extend([0] * count if parent_offsets is None else parent_offsets[i])
+            view.parent_starts.append(len(view.parent_ids))
+        return view
+
+    def parent_edges(self, position: int) -> range:
+        """
+        :param position: the position of a loop in the course
+        :return: the positions of the loop's stitch-edges in the edge arrays
+        """
+        return range(self.parent_starts[position], self.parent_starts[position + 1])
+
+    def parents_of(self, position: int) -> List[int]:
+        """
+        :param position: the position of a loop in the course
+        :return: the parent loop ids of the loop in the order the stitch-edges were added
+        """
+        return [*self.parent_ids[self.parent_starts[position]: self.parent_starts[position + 1]]]
+
+    def stacked_edges(self, position: int) -> List[int]:
+        """
+        :param position: the position of a loop in the course
+        :return: the positions of the loop's stitch-edges in the edge arrays ordered by the parent's stack position
+        """
+        stacked = sorted((self.stack_positions[edge], edge) for edge in self.parent_edges(position)
+                         if self.stack_positions[edge] != NO_STACK_POSITION)
+        return [edge for _, edge in stacked]
+
+    def pull_direction(self, edge: int) -> Pull_Direction:
+        """
+        :param edge: the position of a stitch-edge in the edge arrays
+        :return: the pull direction of the stitch-edge
+        """
+        return Pull_Direction.BtF if self.pull_directions[edge] == 0 else Pull_Direction.FtB
+
+    def __len__(self) -> int:
+        return len(self.loop_ids)
+
+    def __iter__(self):
+        return iter(self.loop_ids)
+
+    def __str__(self):
+        return f"Course_View({self.course}: {[*self.loop_ids]})"
+
+    def __repr__(self):
+        return str(self)
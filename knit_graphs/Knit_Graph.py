@@ -1,6 +1,9 @@
 """The graph structure used to represent knitted objects"""
+import hashlib
+import struct
+from array import array
 from enum import Enum
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Set, Sequence
 
 import networkx
 
@@ -9,6 +12,11 @@ from knit_graphs.Yarn import Yarn
 from knitting_machine.Machine_State import Yarn_Carrier
 
 
+_FINGERPRINT_SIZE = 16
+_LOOP_FINGERPRINT = struct.Struct("<BI")  # twisted, number of parents
+_STITCH_FINGERPRINT = struct.Struct("<qqBbb")  # course distance to parent, parent position in course, pull, depth, offset
+
+
 class Pull_Direction(Enum):
     """An enumerator of the two pull directions of a loop"""
     BtF = "BtF"
@@ -38,28 +46,53 @@ class Knit_Graph:
     Attributes
     ----------
     graph : networkx.DiGraph
-        the directed-graph structure of loops pulled through other loops
+        the directed-graph structure of loops pulled through other loops.
+        May be replaced by a compact knit_graphs.Array_Graph storage backend
     loops: Dict[int, Loop]
         A map of each unique loop id to its loop
     yarns: Dict[str, Yarn]
          A list of Yarns used in the graph
+    checked: bool
+        If True, loops and stitches are checked against the graph as they are added.
+        Unchecked graphs build faster and can be checked in bulk with validate()
     """
 
-    def __init__(self):
-        self.graph: networkx.DiGraph = networkx.DiGraph()
+    def __init__(self, graph=None, checked: bool = True):
+        """
+        :param graph: an empty directed-graph used to store loops and stitch-edges.
+            Defaults to a networkx.DiGraph; an Array_Graph uses a fraction of the memory for large graphs
+        :param checked: if False, skips the membership checks when adding loops and stitches
+        """
+        if graph is None:
+            graph = networkx.DiGraph()
+        assert len(graph) == 0, "Knit_Graph must be created on an empty graph"
+        self.graph: networkx.DiGraph = graph
         self.loops: Dict[int, Loop] = {}
         self.last_loop_id: int = -1
         self.yarns: Dict[str, Yarn] = {}
+        self.checked: bool = checked
+        # course index maintained as loops and stitches are added, see get_courses()
+        self._loop_ids_to_course: Dict[int, int] = {}
+        self._course_to_loop_ids: Dict[int, List[int]] = {}
+        self._current_course_set: Set[int] = set()
+        self._courses_are_stale: bool = False
+        # fingerprints of courses that have not changed since they were computed, see course_fingerprint()
+        self._course_fingerprints: List[Optional[bytes]] = []
+        self._graph_fingerprint: Optional[bytes] = None
 
     def add_loop(self, loop: Loop):
         """
-        :param loop: the loop to be added in as a node in the graph
+        :param loop: the loop to be added in as a node in the graph.
+            Unchecked graphs expect the loop to already be on its yarn, e.g., from Yarn.add_loop_to_end()
         """
         self.graph.add_node(loop.loop_id, loop=loop)
-        assert loop.yarn_id in self.yarns, f"No yarn {loop.yarn_id} in this graph"
-        if loop not in self.yarns[loop.yarn_id]:  # make sure the loop is on the yarn specified
-            self.yarns[loop.yarn_id].add_loop_to_end(loop_id=None, loop=loop)
+        if self.checked:
+            assert loop.yarn_id in self.yarns, f"No yarn {loop.yarn_id} in this graph"
+            if loop not in self.yarns[loop.yarn_id]:  # make sure the loop is on the yarn specified
+                self.yarns[loop.yarn_id].add_loop_to_end(loop_id=None, loop=loop)
         self.loops[loop.loop_id] = loop
+        self._index_new_loop(loop.loop_id)
+        self._forget_fingerprints(self._loop_ids_to_course.get(loop.loop_id, 0))
 
     def add_yarn(self, yarn: Yarn):
         """
@@ -79,20 +112,245 @@ class Knit_Graph:
         :param pull_direction: the direction the child is pulled through the parent
         :param stack_position: The position to insert the parent into, by default add on top of the stack
         """
-        assert parent_loop_id in self, f"parent loop {parent_loop_id} is not in this graph"
-        assert child_loop_id in self, f"child loop {child_loop_id} is not in this graph"
+        if self.checked:
+            assert parent_loop_id in self, f"parent loop {parent_loop_id} is not in this graph"
+            assert child_loop_id in self, f"child loop {child_loop_id} is not in this graph"
         self.graph.add_edge(parent_loop_id, child_loop_id, pull_direction=pull_direction, depth=depth, parent_offset=parent_offset)
         child_loop = self[child_loop_id]
         parent_loop = self[parent_loop_id]
         child_loop.add_parent_loop(parent_loop, stack_position)
+        child_course = self._loop_ids_to_course.get(child_loop_id, 0)
+        self._index_new_stitch(parent_loop_id, child_loop_id)
+        self._forget_fingerprints(child_course)
+
+    def add_course(self, yarn: Yarn, parent_ids: Sequence[Sequence[int]],
+                   pull_directions: Optional[Sequence[Pull_Direction]] = None, depths: Optional[Sequence[int]] = None,
+                   parent_offsets: Optional[Sequence[Sequence[int]]] = None,
+                   is_twisted: Optional[Sequence[bool]] = None) -> List[int]:
+        """
+        Adds a course of new loops to the end of the yarn and connects each to its parents in one batch.
+        Equivalent to adding each loop and then connecting its parents in stack order.
+        :param yarn: the yarn in this graph that makes the new loops
+        :param parent_ids: for each new loop, the ids of its parent loops in stack order. Empty for loops without parents
+        :param pull_directions: for each new loop, the direction it is pulled through its parents. Defaults to BtF
+        :param depths: for each new loop, the crossing depth of its stitches. Defaults to 0
+        :param parent_offsets: for each new loop, the offset to each parent loop. Defaults to 0
+        :param is_twisted: for each new loop, True if the loop is twisted. Defaults to not twisted
+        :return: the ids of the new loops in yarn-wise order
+        """
+        count = len(parent_ids)
+        if self.checked:
+            assert yarn.yarn_id in self.yarns, f"No yarn {yarn.yarn_id} in this graph"
+            assert pull_directions is None or len(pull_directions) == count, "Must give a pull direction for every new loop"
+            assert depths is None or len(depths) == count, "Must give a depth for every new loop"
+            assert parent_offsets is None or len(parent_offsets) == count, "Must give parent offsets for every new loop"
+            has_node = self.graph.has_node
+            for parents in parent_ids:
+                for parent_id in parents:
+                    assert has_node(parent_id), f"parent loop {parent_id} is not in this graph"
+        loops = yarn.add_loops_to_end(count, is_twisted)
+        loop_ids = [loop.loop_id for loop in loops]
+        self.graph.add_nodes_from([(loop.loop_id, {"loop": loop}) for loop in loops])
+        edges = []
+        edge_attributes = {}  # shared attribute dictionaries, graphs copy edge attributes when adding edges
+        graph_loops = self.loops
+        for i, parents in enumerate(parent_ids):
+            if len(parents) == 0:
+                continue
+            loop_id = loop_ids[i]
+            pull_direction = Pull_Direction.BtF if pull_directions is None else pull_directions[i]
+            depth = 0 if depths is None else depths[i]
+            if parent_offsets is None:
+                offsets = [0] * len(parents)
+            else:
+                offsets = parent_offsets[i]
+                assert not self.checked or len(offsets) == len(parents), f"Must give an offset for every parent of loop {loop_id}"
+            for parent_id, parent_offset in zip(parents, offsets):
+                key = (pull_direction, depth, parent_offset)
+                attributes = edge_attributes.get(key)
+                if attributes is None:
+                    attributes = {"pull_direction": pull_direction, "depth": depth, "parent_offset": parent_offset}
+                    edge_attributes[key] = attributes
+                edges.append((parent_id, loop_id, attributes))
+            loops[i].parent_loops.extend([graph_loops[parent_id] for parent_id in parents])
+        self.graph.add_edges_from(edges)
+        graph_loops.update(zip(loop_ids, loops))
+        first_course = max(0, len(self._course_to_loop_ids) - 1)
+        self._index_new_course(loop_ids, parent_ids)
+        self._forget_fingerprints(first_course)
+        return loop_ids
+
+    def truncate(self, last_loop_id: int):
+        """
+        Removes the loops newer than a loop and their stitch-edges, e.g., to rebuild the end of a compiled graph.
+        The removed loops must be the last loops added to the graph and must not be parents of the remaining loops
+        :param last_loop_id: the id of the last loop to keep, -1 to remove every loop
+        """
+        removed = [loop_id for loop_id in self.graph if loop_id > last_loop_id]
+        if len(removed) == 0:
+            return
+        if self.checked:
+            for loop_id in removed:
+                for child_id in self.graph.successors(loop_id):
+                    assert child_id > last_loop_id, f"Cannot remove loop {loop_id}, it is a parent of loop {child_id}"
+        self.graph.remove_nodes_from(removed)
+        for loop_id in removed:
+            del self.loops[loop_id]
+        for yarn in self.yarns.values():
+            yarn.truncate(last_loop_id)
+        self.last_loop_id = max((yarn.last_loop_id for yarn in self.yarns.values() if yarn.last_loop_id is not None), default=-1)
+        first_course = self._truncate_courses(removed)
+        self._forget_fingerprints(first_course)
+
+    def _truncate_courses(self, removed: List[int]) -> int:
+        """
+        Removes loops from the end of the course index
+        :param removed: the ids of the loops that were removed from the graph
+        :return: the first course that changed
+        """
+        if self._courses_are_stale:
+            return 0
+        removed_set = set(removed)
+        pruned = 0
+        course = len(self._course_to_loop_ids) - 1
+        first_course = course + 1
+        while course >= 0:
+            loop_ids = self._course_to_loop_ids[course]
+            kept = [loop_id for loop_id in loop_ids if loop_id not in removed_set]
+            if len(kept) == len(loop_ids):
+                break
+            pruned += len(loop_ids) - len(kept)
+            first_course = course
+            if len(kept) > 0:
+                self._course_to_loop_ids[course] = kept
+                break
+            del self._course_to_loop_ids[course]
+            course -= 1
+        for loop_id in removed:
+            self._loop_ids_to_course.pop(loop_id, None)
+        if pruned < len(removed):  # removed loops were not at the end of the index
+            self._courses_are_stale = True
+            return 0
+        last_course = len(self._course_to_loop_ids) - 1
+        self._current_course_set = set(self._course_to_loop_ids[last_course]) if last_course >= 0 else set()
+        return first_course
+
+    def _index_new_loop(self, loop_id: int):
+        """
+        Places a newly added loop at the end of the current course of the course index
+        :param loop_id: the id of the loop that was added to the graph
+        """
+        if self._courses_are_stale:
+            return
+        if loop_id in self._loop_ids_to_course:  # re-added loop, node order is no longer creation order
+            self._courses_are_stale = True
+            return
+        if len(self._course_to_loop_ids) == 0:
+            self._course_to_loop_ids[0] = []
+        course = len(self._course_to_loop_ids) - 1
+        self._course_to_loop_ids[course].append(loop_id)
+        self._current_course_set.add(loop_id)
+        self._loop_ids_to_course[loop_id] = course
+
+    def _index_new_course(self, loop_ids: List[int], parent_ids: Sequence[Sequence[int]]):
+        """
+        Updates the course index after a batch of new loops are added and connected to their parents.
+        Equivalent to indexing each new loop followed by its stitches
+        :param loop_ids: the ids of the new loops in the order they were added
+        :param parent_ids: the ids of the parents of each new loop
+        """
+        if self._courses_are_stale:
+            return
+        if any(loop_id in self._loop_ids_to_course for loop_id in loop_ids):
+            self._courses_are_stale = True
+            return
+        if len(self._course_to_loop_ids) == 0:
+            self._course_to_loop_ids[0] = []
+        course = len(self._course_to_loop_ids) - 1
+        current_loops = self._course_to_loop_ids[course]
+        current_set = self._current_course_set
+        loop_ids_to_course = self._loop_ids_to_course
+        for loop_id, parents in zip(loop_ids, parent_ids):
+            for parent_id in parents:
+                if parent_id in current_set:  # the loop starts a new course
+                    course += 1
+                    current_loops = []
+                    self._course_to_loop_ids[course] = current_loops
+                    current_set = set()
+                    break
+            current_loops.append(loop_id)
+            current_set.add(loop_id)
+            loop_ids_to_course[loop_id] = course
+        self._current_course_set = current_set
+
+    def _index_new_stitch(self, parent_loop_id: int, child_loop_id: int):
+        """
+        Updates the course index after a stitch-edge is added.
+        If the child is the newest loop and its parent is in the current course, the child starts a new course.
+        Stitches into older loops of the same course invalidate the index, which is rebuilt on the next query
+        :param parent_loop_id: the id of the parent loop of the new stitch
+        :param child_loop_id: the id of the child loop of the new stitch
+        """
+        if self._courses_are_stale or parent_loop_id == child_loop_id:
+            return
+        child_course = self._loop_ids_to_course[child_loop_id]
+        if self._loop_ids_to_course[parent_loop_id] != child_course:
+            return  # a parent in a prior course does not change course membership
+        current_course = len(self._course_to_loop_ids) - 1
+        current_loops = self._course_to_loop_ids[current_course]
+        if child_course == current_course and current_loops[-1] == child_loop_id:
+            current_loops.pop()
+            self._current_course_set.discard(child_loop_id)
+            self._course_to_loop_ids[current_course + 1] = [child_loop_id]
+            self._current_course_set = {child_loop_id}
+            self._loop_ids_to_course[child_loop_id] = current_course + 1
+        else:
+            self._courses_are_stale = True
+
+    def _refresh_courses(self):
+        """
+        Rebuilds the course index from the graph if it was invalidated by out of order construction
+        """
+        if self._courses_are_stale:
+            self._loop_ids_to_course, self._course_to_loop_ids = self._scan_courses()
+            self._current_course_set = set(self._course_to_loop_ids[len(self._course_to_loop_ids) - 1])
+            self._courses_are_stale = False
+
+    def course_of(self, loop_id: int) -> int:
+        """
+        :param loop_id: the id of a loop in the graph
+        :return: the course that the loop is on
+        """
+        self._refresh_courses()
+        return self._loop_ids_to_course[loop_id]
+
+    def loops_in_course(self, course: int) -> List[int]:
+        """
+        :param course: the course id
+        :return: the loop_ids on the course in the order of creation
+        """
+        self._refresh_courses()
+        return self._course_to_loop_ids[course]
 
     def get_courses(self) -> Tuple[Dict[int, int], Dict[int, List[int]]]:
         """
+        The course index is maintained as loops and stitches are added to the graph,
+        so the returned dictionaries are the live index and should not be modified.
         :return: A dictionary of loop_ids to the course they are on,
         a dictionary or course ids to the loops on that course in the order of creation
         The first set of loops in the graph is on course 0.
         A course change occurs when a loop has a parent loop that is in the last course.
         """
+        self._refresh_courses()
+        if len(self._course_to_loop_ids) == 0:
+            return self._loop_ids_to_course, {0: []}
+        return self._loop_ids_to_course, self._course_to_loop_ids
+
+    def _scan_courses(self) -> Tuple[Dict[int, int], Dict[int, List[int]]]:
+        """
+        :return: the course index computed by a full scan of the graph.
+        See get_courses()
+        """
         loop_ids_to_course = {}
         course_to_loop_ids = {}
         current_course_set = set()
@@ -116,6 +374,153 @@ class Knit_Graph:
         course_to_loop_ids[course] = current_course
         return loop_ids_to_course, course_to_loop_ids
 
+    def iter_courses(self, start: int = 0, stop: Optional[int] = None):
+        """
+        Iterates over compact views of the courses so that consumers only hold one course at a time
+        :param start: the first course to view
+        :param stop: the course to stop before. Defaults to the end of the graph
+        :return: iterator of knit_graphs.Course_View for each course from start to stop
+        """
+        from knit_graphs.Course_View import Course_View, NO_STACK_POSITION
+        _, course_to_loop_ids = self.get_courses()
+        if stop is None or stop > len(course_to_loop_ids):
+            stop = len(course_to_loop_ids)
+        graph = self.graph
+        for course in range(start, stop):
+            view = Course_View(course, array("q", course_to_loop_ids[course]), array("q", [0]))
+            for loop_id in view.loop_ids:
+                stack_positions = {parent.loop_id: position for position, parent in enumerate(self.loops[loop_id].parent_loops)}
+                for parent_id in graph.predecessors(loop_id):
+                    attributes = graph[parent_id][loop_id]
+                    view.parent_ids.append(parent_id)
+                    view.stack_positions.append(stack_positions.get(parent_id, NO_STACK_POSITION))
+                    view.pull_directions.append(0 if attributes["pull_direction"] is Pull_Direction.BtF else 1)
+                    view.depths.append(attributes["depth"])
+                    view.parent_offsets.append(attributes["parent_offset"])
+                view.parent_starts.append(len(view.parent_ids))
+            yield view
+
+    def validate(self) -> List[str]:
+        """
+        Checks the whole graph in one pass over the courses. Intended for graphs built with checked=False
+        Checks that:
+            each loop's stack of parent loops matches its stitch-edges,
+            crossing depths are -1, 0, or 1 and single parents at an offset are crossed at a non-zero depth,
+            parent offsets fit in a byte,
+            each loop is pulled through by at most one child,
+            parents are older than their children and on earlier courses,
+            each yarn holds its loops in increasing id order and each loop is on the yarn it names
+        :return: a description of every violation found, empty if the graph is valid
+        """
+        violations: List[str] = []
+        loop_ids_to_course: Dict[int, int] = {}
+        consumed_by: Dict[int, int] = {}  # parent loop ids to the first child pulled through them
+        for course in self.iter_courses():
+            for position, loop_id in enumerate(course.loop_ids):
+                loop_ids_to_course[loop_id] = course.course
+                edges = course.parent_edges(position)
+                loop = self.loops.get(loop_id)
+                if loop is None:
+                    violations.append(f"Loop {loop_id} is in the graph structure but not in the loops of the graph")
+                    continue
+                if len(loop.parent_loops) != len(edges) or len(course.stacked_edges(position)) != len(edges):
+                    violations.append(f"Loop {loop_id} has {len(loop.parent_loops)} stacked parents but {len(edges)} stitch-edges")
+                for edge in edges:
+                    parent_id = course.parent_ids[edge]
+                    depth = course.depths[edge]
+                    offset = course.parent_offsets[edge]
+                    if depth not in (-1, 0, 1):
+                        violations.append(f"Stitch {parent_id}->{loop_id} has depth {depth}, must be -1, 0, or 1")
+                    if len(edges) == 1 and offset != 0 and depth == 0:
+                        violations.append(f"Stitch {parent_id}->{loop_id} is offset by {offset} but does not cross at a non-zero depth")
+                    if not -128 <= offset <= 127:
+                        violations.append(f"Stitch {parent_id}->{loop_id} has out of range offset {offset}")
+                    if parent_id in consumed_by:
+                        violations.append(f"Loop {parent_id} is pulled through by both {consumed_by[parent_id]} and {loop_id}")
+                    else:
+                        consumed_by[parent_id] = loop_id
+                    if parent_id >= loop_id:
+                        violations.append(f"Parent loop {parent_id} is not older than its child {loop_id}")
+                    elif loop_ids_to_course.get(parent_id, course.course) >= course.course:
+                        violations.append(f"Parent loop {parent_id} is not on a course before its child {loop_id}")
+        for yarn_id, yarn in self.yarns.items():
+            yarn_loop_ids = yarn.loop_ids
+            for prior_id, next_id in zip(yarn_loop_ids, yarn_loop_ids[1:]):
+                if prior_id >= next_id:
+                    violations.append(f"Yarn {yarn_id} has loop {next_id} after loop {prior_id}")
+            for loop_id in yarn_loop_ids:
+                loop = self.loops.get(loop_id)
+                if loop is None or loop_id not in loop_ids_to_course:
+                    violations.append(f"Loop {loop_id} on yarn {yarn_id} is not in the graph")
+                elif loop.yarn_id != yarn_id:
+                    violations.append(f"Loop {loop_id} on yarn {yarn_id} belongs to yarn {loop.yarn_id}")
+            if len(yarn_loop_ids) > 0 and yarn.last_loop_id != yarn_loop_ids[-1]:
+                violations.append(f"Yarn {yarn_id} ends at loop {yarn_loop_ids[-1]} but its last loop is {yarn.last_loop_id}")
+        for loop_id, loop in self.loops.items():
+            if loop.yarn_id not in self.yarns:
+                violations.append(f"Loop {loop_id} is on yarn {loop.yarn_id} which is not in this graph")
+            elif loop_id not in self.yarns[loop.yarn_id]:
+                violations.append(f"Loop {loop_id} is not on its yarn {loop.yarn_id}")
+        return violations
+
+    def course_fingerprint(self, course: int) -> bytes:
+        """
+        A stable hash of the structure of a course that does not depend on the loop ids.
+        Covers, for each loop in course order, its twist and each parent in stack order:
+        the number of courses back to the parent, the parent's position in its course,
+        and the pull direction, depth, and parent offset of the stitch.
+        Fingerprints are cached until loops or stitches are added to the course
+        :param course: the course id
+        :return: the 16 byte fingerprint of the course
+        """
+        fingerprints = self._course_fingerprints
+        if course < len(fingerprints) and fingerprints[course] is not None:
+            return fingerprints[course]
+        fingerprint = hashlib.blake2b(digest_size=_FINGERPRINT_SIZE)
+        positions_in_course: Dict[int, Dict[int, int]] = {}
+        for loop_id in self.loops_in_course(course):
+            loop = self[loop_id]
+            parents = loop.parent_loops
+            fingerprint.update(_LOOP_FINGERPRINT.pack(1 if loop.is_twisted else 0, len(parents)))
+            for parent in parents:
+                parent_id = parent.loop_id
+                parent_course = self.course_of(parent_id)
+                if parent_course not in positions_in_course:
+                    positions_in_course[parent_course] = {parent_loop_id: position for position, parent_loop_id
+                                                          in enumerate(self.loops_in_course(parent_course))}
+                attributes = self.graph[parent_id][loop_id]
+                fingerprint.update(_STITCH_FINGERPRINT.pack(course - parent_course, positions_in_course[parent_course][parent_id],
+                                                            0 if attributes["pull_direction"] is Pull_Direction.BtF else 1,
+                                                            attributes["depth"], attributes["parent_offset"]))
+        if course >= len(fingerprints):
+            fingerprints.extend([None] * (course + 1 - len(fingerprints)))
+        fingerprints[course] = fingerprint.digest()
+        return fingerprints[course]
+
+    def fingerprint(self) -> bytes:
+        """
+        :return: A stable hash of the structure of the whole graph derived from the fingerprint of each course
+        """
+        if self._graph_fingerprint is None:
+            _, course_to_loop_ids = self.get_courses()
+            fingerprint = hashlib.blake2b(digest_size=_FINGERPRINT_SIZE)
+            fingerprint.update(struct.pack("<q", len(course_to_loop_ids)))
+            for course in range(0, len(course_to_loop_ids)):
+                fingerprint.update(self.course_fingerprint(course))
+            self._graph_fingerprint = fingerprint.digest()
+        return self._graph_fingerprint
+
+    def _forget_fingerprints(self, course: int):
+        """
+        Removes the cached fingerprints of a changed course and the courses after it
+        :param course: the first course that changed
+        """
+        if self._courses_are_stale:
+            self._course_fingerprints.clear()
+        else:
+            del self._course_fingerprints[course:]
+        self._graph_fingerprint = None
+
     # @deprecated("Deprecated because this only works in rows, but not round construction")
     def deprecated_get_course(self) -> Tuple[Dict[int, int], Dict[int, List[int]]]:
         """
@@ -145,6 +550,28 @@ class Knit_Graph:
             course_to_loop_ids[course].sort()
         return loop_ids_to_course, course_to_loop_ids
 
+    def save(self, file):
+        """
+        Saves the graph in a compact columnar binary format that can be read back with Knit_Graph.load()
+        :param file: the path to write to or a writable binary file object
+        """
+        from knit_graphs.Knit_Graph_File import write_knit_graph
+        write_knit_graph(self, file)
+
+    @staticmethod
+    def load(file, graph=None):
+        """
+        Builds the saved graph in memory. Loading into the default networkx.DiGraph creates a Loop, a node and
+         an edge entry for every stitch, which takes about as long as compiling the graph again.
+        Loading into an Array_Graph builds stitch-edges from the file's columns in a fraction of that time, and
+         a Mapped_Knit_Graph reads a saved file lazily without building the graph, which suits large read-only graphs
+        :param file: the path of a file written by Knit_Graph.save() or a readable binary file object
+        :param graph: an empty directed graph to load the stitches into. Defaults to a networkx.DiGraph
+        :return: the Knit_Graph stored in the file
+        """
+        from knit_graphs.Knit_Graph_File import read_knit_graph
+        return read_knit_graph(file, graph)
+
     def get_carriers(self) -> List[Yarn_Carrier]:
         """
         :return: A list of yarn carriers that hold the yarns involved in this graph
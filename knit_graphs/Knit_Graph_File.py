@@ -0,0 +1,292 @@
+"""
+A compact columnar binary file format for saving and loading Knit_Graphs.
+
+The file starts with a header and a directory of named columns, followed by the columns.
+Each column is a little-endian array of one type, aligned to 8 bytes so it can be read in place:
+    loop_ids    q   the loop ids in the order they were added to the graph
+    loop_yrn    H   the index of the yarn of each loop
+    twisted     B   1 if the loop is twisted
+    par_strt    q   loop position -> start of its parents in the edge columns (one extra entry for the end)
+    par_ids     q   the parent loop ids of each loop in the order the stitch-edges were added
+    pull        B   0 for BtF, 1 for FtB
+    depth       b   the crossing depth of each stitch-edge
+    offset      b   the parent offset of each stitch-edge
+    stack       B   the position of each parent in the child's stack of parent loops
+    crs_strt    q   course -> position of the first loop on the course (one extra entry for the end)
+    yrn_name    B   the yarn ids encoded in utf-8 and separated by null bytes
+    yrn_car     H   the carrier id of each yarn
+    yrn_last    q   the last loop id of each yarn, -1 if the yarn is empty
+    yrn_strt    q   yarn -> start of its loops in yrn_lps (one extra entry for the end)
+    yrn_lps     q   the loop ids on each yarn in yarn-wise order
+    yrn_incr    B   1 if the loop ids of each yarn increase in yarn-wise order
+    id_order    q   the loop positions ordered by loop id, empty if loop ids are sorted
+    chd_strt    q   loop position -> start of its children in chd_ids (one extra entry for the end)
+    chd_ids     q   the child loop ids of each loop in the order the children were added
+    meta        q   the last loop id of the graph and the IDS_ARE_POSITIONS and IDS_SORTED flags
+"""
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Dict, List, Tuple, Union
+
+from knit_graphs.Array_Graph import Array_Graph
+from knit_graphs.Knit_Graph import Knit_Graph, Pull_Direction
+from knit_graphs.Loop import Loop
+from knit_graphs.Yarn import Yarn
+
+FILE_MAGIC = b"KNITGRPH"
+FILE_VERSION = 2
+IDS_ARE_POSITIONS = 1  # meta flag set if every loop id is its position in the loop columns
+IDS_SORTED = 2  # meta flag set if loop ids increase in the loop columns
+_HEADER = struct.Struct("<8sII")  # magic, version, number of columns
+_DIRECTORY_ENTRY = struct.Struct("<8s8sQQ")  # column name, typecode, byte offset, byte length
+_NO_STACK_POSITION = 255
+_PULL_DIRECTIONS: Tuple[Pull_Direction, Pull_Direction] = (Pull_Direction.BtF, Pull_Direction.FtB)
+
+
+def _graph_columns(knit_graph: Knit_Graph) -> Dict[str, array]:
+    """
+    :param knit_graph: the knit graph to convert to columns
+    :return: the columns of the file format keyed by name
+    """
+    graph = knit_graph.graph
+    yarn_ids = [*knit_graph.yarns.keys()]
+    yarn_indices = {yarn_id: i for i, yarn_id in enumerate(yarn_ids)}
+    loop_ids = array("q", graph.nodes)
+    loop_yarns = array("H")
+    twisted = array("B")
+    parent_starts = array("q", [0])
+    parent_ids = array("q")
+    pulls = array("B")
+    depths = array("b")
+    offsets = array("b")
+    stack = array("B")
+    for loop_id in loop_ids:
+        loop = knit_graph.loops[loop_id]
+        loop_yarns.append(yarn_indices[loop.yarn_id])
+        twisted.append(1 if loop.is_twisted else 0)
+        stack_positions = {parent.loop_id: position for position, parent in enumerate(loop.parent_loops)}
+        for parent_id in graph.predecessors(loop_id):
+            attributes = graph[parent_id][loop_id]
+            parent_ids.append(parent_id)
+            pulls.append(0 if attributes["pull_direction"] is Pull_Direction.BtF else 1)
+            depths.append(attributes["depth"])
+            offsets.append(attributes["parent_offset"])
+            stack.append(stack_positions.get(parent_id, _NO_STACK_POSITION))
+        parent_starts.append(len(parent_ids))
+
+    _, course_to_loop_ids = knit_graph.get_courses()
+    course_starts = array("q", [0])
+    for course in range(0, len(course_to_loop_ids)):
+        start = course_starts[-1]
+        course_loops = course_to_loop_ids[course]
+        assert [*loop_ids[start: start + len(course_loops)]] == course_loops, \
+            f"Loops of course {course} are not contiguous in the graph"
+        course_starts.append(start + len(course_loops))
+
+    yarn_carriers = array("H")
+    yarn_last = array("q")
+    yarn_starts = array("q", [0])
+    yarn_loops = array("q")
+    yarn_increases = array("B")
+    for yarn_id in yarn_ids:
+        yarn = knit_graph.yarns[yarn_id]
+        yarn_carriers.append(yarn.carrier.carrier_ids)
+        yarn_last.append(-1 if yarn.last_loop_id is None else yarn.last_loop_id)
+        yarn_increases.append(1 if all(a < b for a, b in zip(yarn.loop_ids, yarn.loop_ids[1:])) else 0)
+        yarn_loops.extend(yarn.loop_ids)
+        yarn_starts.append(len(yarn_loops))
+    yarn_names = array("B", "\0".join(yarn_ids).encode("utf-8"))
+
+    flags = 0
+    id_order = array("q")
+    if all(loop_id == position for position, loop_id in enumerate(loop_ids)):
+        flags |= IDS_ARE_POSITIONS | IDS_SORTED
+    elif all(a < b for a, b in zip(loop_ids, loop_ids[1:])):
+        flags |= IDS_SORTED
+    else:
+        id_order = array("q", sorted(range(0, len(loop_ids)), key=loop_ids.__getitem__))
+    child_starts, child_ids = _child_columns(loop_ids, parent_starts, parent_ids, flags & IDS_ARE_POSITIONS != 0)
+
+    return {"loop_ids": loop_ids, "loop_yrn": loop_yarns, "twisted": twisted,
+            "par_strt": parent_starts, "par_ids": parent_ids, "pull": pulls, "depth": depths, "offset": offsets,
+            "stack": stack, "crs_strt": course_starts,
+            "yrn_name": yarn_names, "yrn_car": yarn_carriers, "yrn_last": yarn_last,
+            "yrn_strt": yarn_starts, "yrn_lps": yarn_loops, "yrn_incr": yarn_increases,
+            "id_order": id_order, "chd_strt": child_starts, "chd_ids": child_ids,
+            "meta": array("q", [knit_graph.last_loop_id, flags])}
+
+
+def _child_columns(loop_ids: array, parent_starts: array, parent_ids: array, ids_are_positions: bool) -> Tuple[array, array]:
+    """
+    :param loop_ids: the loop ids in the order they were added to the graph
+    :param parent_starts: loop position -> start of its parents in parent_ids
+    :param parent_ids: the parent loop ids of each loop
+    :param ids_are_positions: True if every loop id is its position in loop_ids
+    :return: loop position -> start of its children in the child ids and the child ids of each loop in the order the children were added
+    """
+    if ids_are_positions:
+        parent_positions = parent_ids
+    else:
+        positions = {loop_id: position for position, loop_id in enumerate(loop_ids)}
+        parent_positions = array("q", map(positions.__getitem__, parent_ids))
+    child_starts = array("q", [0] * (len(loop_ids) + 1))
+    for parent_position in parent_positions:
+        child_starts[parent_position + 1] += 1
+    for position in range(0, len(loop_ids)):
+        child_starts[position + 1] += child_starts[position]
+    edge_children = array("q")
+    for child_id, start, end in zip(loop_ids, parent_starts, parent_starts[1:]):
+        edge_children.extend([child_id] * (end - start))
+    # the stable sort keeps the children of each parent in the order they were added
+    child_edges = sorted(range(0, len(parent_positions)), key=parent_positions.__getitem__)
+    return child_starts, array("q", map(edge_children.__getitem__, child_edges))
+
+
+def write_knit_graph(knit_graph: Knit_Graph, file: Union[str, BinaryIO]):
+    """
+    Writes the knit graph in the columnar binary format
+    :param knit_graph: the knit graph to write
+    :param file: the path to write to or a writable binary file object
+    """
+    columns = _graph_columns(knit_graph)
+    offset = _HEADER.size + _DIRECTORY_ENTRY.size * len(columns)
+    directory = []
+    for name, column in columns.items():
+        offset += -offset % 8
+        byte_length = len(column) * column.itemsize
+        directory.append(_DIRECTORY_ENTRY.pack(name.encode("ascii"), column.typecode.encode("ascii"), offset, byte_length))
+        offset += byte_length
+    if isinstance(file, str):
+        with open(file, "wb") as binary_file:
+            _write_sections(binary_file, directory, columns)
+    else:
+        _write_sections(file, directory, columns)
+
+
+def _write_sections(file: BinaryIO, directory: List[bytes], columns: Dict[str, array]):
+    """
+    Writes the header, directory and 8-byte aligned columns
+    :param file: the binary file object to write to
+    :param directory: the packed directory entries
+    :param columns: the columns in directory order
+    """
+    file.write(_HEADER.pack(FILE_MAGIC, FILE_VERSION, len(columns)))
+    written = _HEADER.size
+    for entry in directory:
+        file.write(entry)
+        written += len(entry)
+    for column in columns.values():
+        padding = -written % 8
+        file.write(b"\0" * padding)
+        if sys.byteorder == "big" and column.itemsize > 1:
+            column = array(column.typecode, column)
+            column.byteswap()
+        data = column.tobytes()
+        file.write(data)
+        written += padding + len(data)
+
+
+def read_columns(buffer) -> Dict[str, Union[memoryview, array]]:
+    """
+    Reads the column directory of a buffer in the knit graph file format without copying the columns
+    :param buffer: a bytes-like object or memory map holding the file
+    :return: the typed columns keyed by name. Columns are memoryviews into the buffer on little-endian machines
+    """
+    view = memoryview(buffer)
+    magic, version, column_count = _HEADER.unpack_from(view, 0)
+    assert magic == FILE_MAGIC, "Not a knit graph file"
+    assert version == FILE_VERSION, f"Unsupported knit graph file version {version}"
+    columns = {}
+    for i in range(0, column_count):
+        name, typecode, offset, byte_length = _DIRECTORY_ENTRY.unpack_from(view, _HEADER.size + i * _DIRECTORY_ENTRY.size)
+        name = name.rstrip(b"\0").decode("ascii")
+        typecode = typecode.rstrip(b"\0").decode("ascii")
+        data = view[offset: offset + byte_length]
+        if sys.byteorder == "big" and array(typecode).itemsize > 1:
+            column = array(typecode)
+            column.frombytes(data)
+            column.byteswap()
+            columns[name] = column
+        else:
+            columns[name] = data.cast(typecode)
+    return columns
+
+
+def yarn_ids_of(columns: Dict[str, Union[memoryview, array]]) -> List[str]:
+    """
+    :param columns: the columns of a knit graph file
+    :return: the yarn ids in the order of the yarn columns
+    """
+    if len(columns["yrn_car"]) == 0:
+        return []
+    return bytes(columns["yrn_name"]).decode("utf-8").split("\0")
+
+
+def read_knit_graph(file: Union[str, BinaryIO], graph=None) -> Knit_Graph:
+    """
+    Reads a knit graph written by write_knit_graph.
+    Loading into the default networkx.DiGraph still creates a Loop, a node and an edge entry for every stitch,
+     so its time grows with Python object construction rather than the size of the file, see Knit_Graph.load()
+    :param file: the path to read from or a readable binary file object
+    :param graph: an empty directed graph to load the stitches into. Defaults to a networkx.DiGraph
+    :return: the knit graph stored in the file
+    """
+    if isinstance(file, str):
+        with open(file, "rb") as binary_file:
+            buffer = binary_file.read()
+    else:
+        buffer = file.read()
+    columns = read_columns(buffer)
+    knit_graph = Knit_Graph(graph)
+
+    yarns = []
+    for i, yarn_id in enumerate(yarn_ids_of(columns)):
+        yarn = Yarn(yarn_id, knit_graph, carrier_id=columns["yrn_car"][i])
+        yarn._loop_ids = array("q", columns["yrn_lps"][columns["yrn_strt"][i]: columns["yrn_strt"][i + 1]])
+        yarn._ids_increase = columns["yrn_incr"][i] == 1
+        last_loop_id = columns["yrn_last"][i]
+        yarn.last_loop_id = None if last_loop_id < 0 else last_loop_id
+        knit_graph.add_yarn(yarn)
+        yarns.append(yarn_id)
+
+    loop_ids = array("q", columns["loop_ids"])
+    loops = [Loop(loop_id, yarns[yarn_index], twisted == 1)
+             for loop_id, yarn_index, twisted in zip(loop_ids, columns["loop_yrn"], columns["twisted"])]
+    knit_graph.loops = dict(zip(loop_ids, loops))
+    parent_starts = array("q", columns["par_strt"])
+    parent_ids = array("q", columns["par_ids"])
+    stack = columns["stack"]
+    loops_by_id = knit_graph.loops
+    for loop, start, end in zip(loops, parent_starts, parent_starts[1:]):
+        if start == end:
+            continue
+        if end - start == 1 and stack[start] == 0:  # common case of a single parent
+            loop.parent_loops.append(loops_by_id[parent_ids[start]])
+            continue
+        stacked = sorted((stack[edge], edge) for edge in range(start, end) if stack[edge] != _NO_STACK_POSITION)
+        loop.parent_loops.extend([loops_by_id[parent_ids[edge]] for _, edge in stacked])
+
+    if isinstance(knit_graph.graph, Array_Graph):
+        knit_graph.graph.load_columns(loop_ids, loops, parent_starts, parent_ids, bytearray(columns["pull"]),
+                                      array("b", columns["depth"]), array("b", columns["offset"]))
+    else:
+        knit_graph.graph.add_nodes_from([(loop.loop_id, {"loop": loop}) for loop in loops])
+        edge_attributes = {}  # shared attribute dictionaries, graphs copy edge attributes when adding edges
+        for key in set(zip(columns["pull"], columns["depth"], columns["offset"])):
+            edge_attributes[key] = {"pull_direction": _PULL_DIRECTIONS[key[0]], "depth": key[1], "parent_offset": key[2]}
+        child_ids = array("q")
+        for child_id, start, end in zip(loop_ids, parent_starts, parent_starts[1:]):
+            child_ids.extend([child_id] * (end - start))
+        knit_graph.graph.add_edges_from(zip(parent_ids, child_ids, map(edge_attributes.__getitem__,
+                                                                        zip(columns["pull"], columns["depth"], columns["offset"]))))
+
+    course_starts = columns["crs_strt"]
+    course_to_loop_ids = {course: [*loop_ids[start: end]]
+                          for course, (start, end) in enumerate(zip(course_starts, course_starts[1:]))}
+    knit_graph._course_to_loop_ids = course_to_loop_ids
+    knit_graph._loop_ids_to_course = {loop_id: course for course, course_loops in course_to_loop_ids.items()
+                                      for loop_id in course_loops}
+    knit_graph._current_course_set = set(course_to_loop_ids[len(course_to_loop_ids) - 1]) if len(course_to_loop_ids) > 0 else set()
+    knit_graph.last_loop_id = columns["meta"][0]
+    return knit_graph
@@ -15,6 +15,8 @@ class Loop:
         The list of loops that this loop is pulled through.
         The order in the list implies the stacking order with the first loop at the bottom the stack
     """
+    __slots__ = ("_loop_id", "_is_twisted", "_yarn_id", "parent_loops")
+
     def __init__(self, loop_id: int, yarn_id: str, is_twisted: bool = False):
         """
         :param loop_id: id of loop. IDs should represent the order that loops are created
@@ -0,0 +1,494 @@
+"""A read-only Knit_Graph that reads a saved graph lazily through a memory map"""
+import mmap
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from knit_graphs.Course_View import Course_View
+from knit_graphs.Knit_Graph import Knit_Graph, Pull_Direction
+from knit_graphs.Knit_Graph_File import read_columns, yarn_ids_of, IDS_ARE_POSITIONS, IDS_SORTED
+from knit_graphs.Loop import Loop
+from knit_graphs.Yarn import Yarn
+
+_PULL_DIRECTIONS: Tuple[Pull_Direction, Pull_Direction] = (Pull_Direction.BtF, Pull_Direction.FtB)
+_NO_STACK_POSITION = 255
+
+
+class Read_Only_Error(TypeError):
+    """
+    Raised when a Mapped_Knit_Graph or one of its loops is modified
+    """
+
+
+class Mapped_Knit_Graph(Knit_Graph):
+    """
+    A read-only knit graph backed by a memory-mapped file written by Knit_Graph.save().
+    Loops and stitch-edge attributes are only created when they are accessed.
+    Loops are kept in a bounded least-recently-used cache, by default large enough to hold the two widest courses
+
+    Attributes
+    ----------
+    graph : _Mapped_Graph
+        a read-only view of the stitch-edges with the networkx.DiGraph interface used on Knit_Graph.graph
+    loops: _Loop_Cache
+        a read-only mapping of loop_ids to Loops that creates loops on access
+    """
+
+    def __init__(self, path: str, cache_size: Optional[int] = None):
+        """
+        :param path: the path of a file written by Knit_Graph.save()
+        :param cache_size: the number of loops to keep in memory. Defaults to the size of the two widest courses
+        """
+        # Knit_Graph.__init__ is not called, the graph is never built in memory
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._columns = read_columns(self._map)
+        self._loop_ids = self._columns["loop_ids"]
+        self._course_starts = self._columns["crs_strt"]
+        flags = self._columns["meta"][1]
+        self._ids_are_positions: bool = flags & IDS_ARE_POSITIONS != 0
+        self._ids_are_sorted: bool = flags & IDS_SORTED != 0
+        if cache_size is None:
+            widths = sorted((end - start for start, end in zip(self._course_starts, self._course_starts[1:])), reverse=True)
+            cache_size = max(1, sum(widths[0:2]))
+        self.graph: _Mapped_Graph = _Mapped_Graph(self)
+        self.loops: _Loop_Cache = _Loop_Cache(self, cache_size)
+        self.last_loop_id: int = self._columns["meta"][0]
+        self._course_fingerprints: List[Optional[bytes]] = []
+        self._graph_fingerprint: Optional[bytes] = None
+        self.yarns: Dict[str, Yarn] = {}
+        self._yarn_ids: List[str] = yarn_ids_of(self._columns)
+        for i, yarn_id in enumerate(self._yarn_ids):
+            yarn = Yarn(yarn_id, self, carrier_id=self._columns["yrn_car"][i])
+            yarn._loop_ids = self._columns["yrn_lps"][self._columns["yrn_strt"][i]: self._columns["yrn_strt"][i + 1]]
+            yarn._ids_increase = self._columns["yrn_incr"][i] == 1
+            last_loop_id = self._columns["yrn_last"][i]
+            yarn.last_loop_id = None if last_loop_id < 0 else last_loop_id
+            self.yarns[yarn_id] = yarn
+
+    def close(self):
+        """
+        Releases the memory map. The graph cannot be used afterwards
+        """
+        self.loops.clear()
+        for yarn in self.yarns.values():
+            if isinstance(yarn._loop_ids, memoryview):
+                yarn._loop_ids.release()
+        for column in self._columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        self._columns = {}
+        self._loop_ids = array("q")
+        self._course_starts = array("q", [0])
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _position_of(self, loop_id: int) -> int:
+        """
+        :param loop_id: a loop id
+        :return: the position of the loop in the loop columns or -1 if it is not in the graph
+        """
+        if type(loop_id) is not int:
+            return -1
+        if self._ids_are_positions:
+            return loop_id if 0 <= loop_id < len(self._loop_ids) else -1
+        if self._ids_are_sorted:
+            position = bisect_right(self._loop_ids, loop_id) - 1
+            if position >= 0 and self._loop_ids[position] == loop_id:
+                return position
+            return -1
+        id_order = self._columns["id_order"]  # binary search of the positions ordered by loop id
+        low = 0
+        high = len(id_order)
+        while low < high:
+            middle = (low + high) // 2
+            if self._loop_ids[id_order[middle]] < loop_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(id_order) and self._loop_ids[id_order[low]] == loop_id:
+            return id_order[low]
+        return -1
+
+    def _parent_edges(self, position: int) -> range:
+        """
+        :param position: the position of a loop in the loop columns
+        :return: the positions of its stitch-edges in the edge columns
+        """
+        parent_starts = self._columns["par_strt"]
+        return range(parent_starts[position], parent_starts[position + 1])
+
+    def _create_loop(self, position: int) -> Loop:
+        """
+        :param position: the position of a loop in the loop columns
+        :return: a new Loop with the loop's stored information
+        """
+        return _Mapped_Loop(self, self._loop_ids[position], self._yarn_ids[self._columns["loop_yrn"][position]],
+                            self._columns["twisted"][position] == 1)
+
+    def stacked_parent_ids(self, loop_id: int) -> List[int]:
+        """
+        :param loop_id: the id of a loop in the graph
+        :return: the ids of the loop's parents in stack order
+        """
+        position = self._position_of(loop_id)
+        assert position >= 0, f"Loop {loop_id} is not in this graph"
+        stack = self._columns["stack"]
+        parent_ids = self._columns["par_ids"]
+        stacked = sorted((stack[edge], edge) for edge in self._parent_edges(position) if stack[edge] != _NO_STACK_POSITION)
+        return [parent_ids[edge] for _, edge in stacked]
+
+    def course_of(self, loop_id: int) -> int:
+        """
+        :param loop_id: the id of a loop in the graph
+        :return: the course that the loop is on
+        """
+        position = self._position_of(loop_id)
+        if position < 0:
+            raise KeyError(loop_id)
+        return bisect_right(self._course_starts, position) - 1
+
+    def loops_in_course(self, course: int) -> List[int]:
+        """
+        :param course: the course id
+        :return: the loop_ids on the course in the order of creation
+        """
+        if not 0 <= course < len(self._course_starts) - 1:
+            raise KeyError(course)
+        return [*self._loop_ids[self._course_starts[course]: self._course_starts[course + 1]]]
+
+    def get_courses(self) -> Tuple[Mapping, Mapping]:
+        """
+        :return: Read-only mappings of loop_ids to the course they are on and of courses to the loops on that course.
+         The mappings read the file on access instead of holding the index in memory
+        """
+        return _Loop_Course_Mapping(self), _Course_Loops_Mapping(self)
+
+    def iter_courses(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Course_View]:
+        """
+        Iterates over views of the courses copied from the file one course at a time
+        :param start: the first course to view
+        :param stop: the course to stop before. Defaults to the end of the graph
+        :return: iterator of Course_View for each course from start to stop
+        """
+        course_count = len(self._course_starts) - 1
+        if stop is None or stop > course_count:
+            stop = course_count
+        columns = self._columns
+        parent_starts = columns["par_strt"]
+        for course in range(start, stop):
+            first_loop = self._course_starts[course]
+            last_loop = self._course_starts[course + 1]
+            first_edge = parent_starts[first_loop]
+            last_edge = parent_starts[last_loop]
+            yield Course_View(course, array("q", self._loop_ids[first_loop: last_loop]),
+                              array("q", [edge - first_edge for edge in parent_starts[first_loop: last_loop + 1]]),
+                              array("q", columns["par_ids"][first_edge: last_edge]),
+                              array("B", columns["stack"][first_edge: last_edge]),
+                              array("B", columns["pull"][first_edge: last_edge]),
+                              array("b", columns["depth"][first_edge: last_edge]),
+                              array("b", columns["offset"][first_edge: last_edge]))
+
+    def add_loop(self, loop: Loop):
+        raise Read_Only_Error("Mapped_Knit_Graph is read-only")
+
+    def add_yarn(self, yarn: Yarn):
+        raise Read_Only_Error("Mapped_Knit_Graph is read-only")
+
+    def connect_loops(self, parent_loop_id: int, child_loop_id: int,
+                      pull_direction: Pull_Direction = Pull_Direction.BtF,
+                      stack_position: Optional[int] = None, depth: int = 0, parent_offset: int = 0):
+        raise Read_Only_Error("Mapped_Knit_Graph is read-only")
+
+    def add_course(self, yarn: Yarn, parent_ids, pull_directions=None, depths=None, parent_offsets=None, is_twisted=None):
+        raise Read_Only_Error("Mapped_Knit_Graph is read-only")
+
+    def truncate(self, last_loop_id: int):
+        raise Read_Only_Error("Mapped_Knit_Graph is read-only")
+
+
+class _Mapped_Loop(Loop):
+    """
+    A loop whose parent loops are looked up in the mapped knit graph when they are accessed
+    """
+    __slots__ = ("_knit_graph",)
+
+    def __init__(self, knit_graph: Mapped_Knit_Graph, loop_id: int, yarn_id: str, is_twisted: bool):
+        # Loop.__init__ is not called because parent_loops is read from the file
+        self._knit_graph: Mapped_Knit_Graph = knit_graph
+        self._loop_id: int = loop_id
+        self._yarn_id: str = yarn_id
+        self._is_twisted: bool = is_twisted
+
+    @property
+    def parent_loops(self) -> List[Loop]:
+        """
+        :return: The list of loops that this loop is pulled through in stacking order
+        """
+        return [self._knit_graph.loops[parent_id] for parent_id in self._knit_graph.stacked_parent_ids(self.loop_id)]
+
+    def add_parent_loop(self, parent, stack_position: Optional[int] = None):
+        raise Read_Only_Error("Mapped_Knit_Graph is read-only")
+
+
+class _Loop_Cache(Mapping):
+    """
+    A read-only mapping of loop ids to Loops that keeps the most recently used loops
+    """
+
+    def __init__(self, knit_graph: Mapped_Knit_Graph, cache_size: int):
+        self._knit_graph: Mapped_Knit_Graph = knit_graph
+        self._cache_size: int = cache_size
+        self._loops: OrderedDict = OrderedDict()
+
+    def __getitem__(self, loop_id: int) -> Loop:
+        loop = self._loops.get(loop_id)
+        if loop is not None:
+            self._loops.move_to_end(loop_id)
+            return loop
+        position = self._knit_graph._position_of(loop_id)
+        if position < 0:
+            raise KeyError(loop_id)
+        loop = self._knit_graph._create_loop(position)
+        self._loops[loop_id] = loop
+        if len(self._loops) > self._cache_size:
+            self._loops.popitem(last=False)
+        return loop
+
+    def __contains__(self, loop_id) -> bool:
+        return self._knit_graph._position_of(loop_id) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._knit_graph._loop_ids)
+
+    def __len__(self) -> int:
+        return len(self._knit_graph._loop_ids)
+
+    def clear(self):
+        """
+        Removes all cached loops
+        """
+        self._loops.clear()
+
+
+class _Mapped_Graph:
+    """
+    A read-only view of the stitch-edges in a Mapped_Knit_Graph with the networkx.DiGraph interface used on Knit_Graph.graph
+    """
+
+    def __init__(self, knit_graph: Mapped_Knit_Graph):
+        self._knit_graph: Mapped_Knit_Graph = knit_graph
+        self.nodes: _Mapped_Node_View = _Mapped_Node_View(knit_graph)
+        self.edges: _Mapped_Edge_View = _Mapped_Edge_View(knit_graph)
+
+    def has_node(self, loop_id: int) -> bool:
+        """
+        :param loop_id: the loop id to find
+        :return: True if the loop is in the graph
+        """
+        return self._knit_graph._position_of(loop_id) >= 0
+
+    def _edge_position(self, parent_id: int, child_id: int) -> int:
+        """
+        :param parent_id: the id of the parent loop
+        :param child_id: the id of the child loop
+        :return: the position of the edge in the edge columns or -1 if there is no such edge
+        """
+        position = self._knit_graph._position_of(child_id)
+        if position < 0:
+            return -1
+        parent_ids = self._knit_graph._columns["par_ids"]
+        for edge in self._knit_graph._parent_edges(position):
+            if parent_ids[edge] == parent_id:
+                return edge
+        return -1
+
+    def has_edge(self, parent_id: int, child_id: int) -> bool:
+        """
+        :param parent_id: the id of the parent loop
+        :param child_id: the id of the child loop
+        :return: True if there is a stitch-edge from the parent to the child
+        """
+        return self._edge_position(parent_id, child_id) >= 0
+
+    def edge_attributes(self, parent_id: int, child_id: int) -> Dict[str, Union[Pull_Direction, int]]:
+        """
+        :param parent_id: the id of the parent loop
+        :param child_id: the id of the child loop
+        :return: a new dictionary with the pull_direction, depth, and parent_offset of the stitch-edge
+        """
+        edge = self._edge_position(parent_id, child_id)
+        if edge < 0:
+            raise KeyError((parent_id, child_id))
+        columns = self._knit_graph._columns
+        return {"pull_direction": _PULL_DIRECTIONS[columns["pull"][edge]],
+                "depth": columns["depth"][edge],
+                "parent_offset": columns["offset"][edge]}
+
+    def predecessors(self, loop_id: int) -> Iterator[int]:
+        """
+        :param loop_id: the id of the child loop
+        :return: iterator over the parent loop ids in the order the stitch-edges were added
+        """
+        position = self._knit_graph._position_of(loop_id)
+        if position < 0:
+            raise KeyError(loop_id)
+        edges = self._knit_graph._parent_edges(position)
+        return iter(self._knit_graph._columns["par_ids"][edges.start: edges.stop])
+
+    def successors(self, loop_id: int) -> Iterator[int]:
+        """
+        :param loop_id: the id of the parent loop
+        :return: iterator over the child loop ids in the order the children were added to the graph
+        """
+        position = self._knit_graph._position_of(loop_id)
+        if position < 0:
+            raise KeyError(loop_id)
+        columns = self._knit_graph._columns
+        child_starts = columns["chd_strt"]
+        return iter(columns["chd_ids"][child_starts[position]: child_starts[position + 1]])
+
+    def edges_by_child(self) -> Iterator[Tuple[int, int]]:
+        """
+        :return: iterator over (child_id, parent_id) pairs in file order
+        """
+        parent_ids = self._knit_graph._columns["par_ids"]
+        for position, child_id in enumerate(self._knit_graph._loop_ids):
+            for edge in self._knit_graph._parent_edges(position):
+                yield child_id, parent_ids[edge]
+
+    def number_of_nodes(self) -> int:
+        """
+        :return: the number of loops in the graph
+        """
+        return len(self._knit_graph._loop_ids)
+
+    def number_of_edges(self) -> int:
+        """
+        :return: the number of stitch-edges in the graph
+        """
+        return len(self._knit_graph._columns["par_ids"])
+
+    def __contains__(self, loop_id: int) -> bool:
+        return self.has_node(loop_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._knit_graph._loop_ids)
+
+    def __len__(self) -> int:
+        return len(self._knit_graph._loop_ids)
+
+    def __getitem__(self, parent_id: int):
+        """
+        :param parent_id: the id of a parent loop
+        :return: a view of the children of the parent, indexed by child_id to get the stitch-edge attributes
+        """
+        if not self.has_node(parent_id):
+            raise KeyError(parent_id)
+        return _Mapped_Successor_View(self, parent_id)
+
+
+class _Mapped_Node_View:
+    """
+    A read-only view of the loop ids of a Mapped_Knit_Graph in insertion order
+    """
+
+    def __init__(self, knit_graph: Mapped_Knit_Graph):
+        self._knit_graph: Mapped_Knit_Graph = knit_graph
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._knit_graph._loop_ids)
+
+    def __len__(self) -> int:
+        return len(self._knit_graph._loop_ids)
+
+    def __contains__(self, loop_id: int) -> bool:
+        return self._knit_graph._position_of(loop_id) >= 0
+
+    def __getitem__(self, loop_id: int) -> Dict[str, Loop]:
+        return {"loop": self._knit_graph.loops[loop_id]}
+
+
+class _Mapped_Edge_View:
+    """
+    A read-only view of the (parent_id, child_id) stitch-edges of a Mapped_Knit_Graph grouped by child
+    """
+
+    def __init__(self, knit_graph: Mapped_Knit_Graph):
+        self._knit_graph: Mapped_Knit_Graph = knit_graph
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for child_id, parent_id in self._knit_graph.graph.edges_by_child():
+            yield parent_id, child_id
+
+    def __len__(self) -> int:
+        return self._knit_graph.graph.number_of_edges()
+
+    def __contains__(self, edge: Tuple[int, int]) -> bool:
+        return self._knit_graph.graph.has_edge(*edge)
+
+
+class _Mapped_Successor_View:
+    """
+    A read-only view of the children of one parent loop, mirrors networkx's graph[parent_id] adjacency
+    """
+
+    def __init__(self, graph: _Mapped_Graph, parent_id: int):
+        self._graph: _Mapped_Graph = graph
+        self._parent_id: int = parent_id
+
+    def __getitem__(self, child_id: int) -> Dict[str, Union[Pull_Direction, int]]:
+        return self._graph.edge_attributes(self._parent_id, child_id)
+
+    def __contains__(self, child_id: int) -> bool:
+        return self._graph.has_edge(self._parent_id, child_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return self._graph.successors(self._parent_id)
+
+    def __len__(self) -> int:
+        return len([*self._graph.successors(self._parent_id)])
+
+
+class _Loop_Course_Mapping(Mapping):
+    """
+    A read-only mapping of loop ids to their course, read from the course boundaries of a Mapped_Knit_Graph
+    """
+
+    def __init__(self, knit_graph: Mapped_Knit_Graph):
+        self._knit_graph: Mapped_Knit_Graph = knit_graph
+
+    def __getitem__(self, loop_id: int) -> int:
+        return self._knit_graph.course_of(loop_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._knit_graph._loop_ids)
+
+    def __len__(self) -> int:
+        return len(self._knit_graph._loop_ids)
+
+
+class _Course_Loops_Mapping(Mapping):
+    """
+    A read-only mapping of courses to their loop ids, read from the course boundaries of a Mapped_Knit_Graph
+    """
+
+    def __init__(self, knit_graph: Mapped_Knit_Graph):
+        self._knit_graph: Mapped_Knit_Graph = knit_graph
+
+    def __getitem__(self, course: int) -> List[int]:
+        return self._knit_graph.loops_in_course(course)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(0, len(self)))
+
+    def __len__(self) -> int:
+        return len(self._knit_graph._course_starts) - 1
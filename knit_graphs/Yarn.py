@@ -1,9 +1,9 @@
 """
 The Yarn Data Structure
 """
-from typing import Optional, Tuple
-
-import networkx as networkx
+from array import array
+from bisect import bisect_left
+from typing import Optional, Tuple, Iterator, List, Sequence
 
 from knit_graphs.Loop import Loop
 from knitting_machine.Machine_State import Yarn_Carrier
@@ -16,8 +16,8 @@ class Yarn:
 
     Attributes
     ----------
-    yarn_graph: networkx.DiGraph
-        A directed graph structure (always a list) of loops on the yarn
+    loop_ids: array
+        The ids of the loops on the yarn in yarn-wise order. Slices give the loops between two positions
     last_loop_id: int
         The id of the last loop on the yarn, none if no loops on the yarn
     """
@@ -32,7 +32,8 @@ class Yarn:
         self.knit_graph = knit_graph
         assert 0 < carrier_id < 11, f"Invalid yarn carrier {carrier_id}"
         self._carrier: Yarn_Carrier = Yarn_Carrier(carrier_id)
-        self.yarn_graph: networkx.DiGraph = networkx.DiGraph()
+        self._loop_ids: array = array("q")
+        self._ids_increase: bool = True  # loop ids increase along the yarn unless loops are added with older ids
         if last_loop is None:
             self.last_loop_id = None
         else:
@@ -46,6 +47,13 @@ class Yarn:
         """
         return self._carrier
 
+    @property
+    def loop_ids(self) -> array:
+        """
+        :return: the ids of the loops on this yarn in yarn-wise order. Should not be modified
+        """
+        return self._loop_ids
+
     @property
     def yarn_id(self) -> str:
         """
@@ -73,24 +81,108 @@ class Yarn:
                 loop_id = self.knit_graph.last_loop_id + 1
         if loop is None:  # create a loop from default information
             loop = Loop(loop_id, self.yarn_id, is_twisted)
-        self.yarn_graph.add_node(loop_id, loop=loop)
-        if self.last_loop_id is not None:  # make a link between this and the last yarn
-            self.yarn_graph.add_edge(self.last_loop_id, loop_id)
+        if len(self._loop_ids) > 0 and loop_id <= self._loop_ids[-1]:
+            self._ids_increase = False
+        self._loop_ids.append(loop_id)
         self.last_loop_id = loop_id
         self.knit_graph.last_loop_id = loop_id
         return loop_id, loop
 
+    def add_loops_to_end(self, count: int, is_twisted: Optional[Sequence[bool]] = None) -> List[Loop]:
+        """
+        Adds a block of new loops with consecutive ids at the end of the yarn
+        :param count: the number of loops to create
+        :param is_twisted: the twist of each new loop, by default loops are not twisted
+        :return: the loops added to the yarn in yarn-wise order
+        """
+        if count == 0:
+            return []
+        if self.last_loop_id is None:  # the first loop on the yarn
+            first_id = 0
+        else:
+            first_id = self.knit_graph.last_loop_id + 1
+        if is_twisted is None:
+            loops = [Loop(loop_id, self.yarn_id) for loop_id in range(first_id, first_id + count)]
+        else:
+            assert len(is_twisted) == count, "Must give a twist for every new loop"
+            loops = [Loop(first_id + i, self.yarn_id, twisted) for i, twisted in enumerate(is_twisted)]
+        if len(self._loop_ids) > 0 and first_id <= self._loop_ids[-1]:
+            self._ids_increase = False
+        self._loop_ids.extend(range(first_id, first_id + count))
+        self.last_loop_id = first_id + count - 1
+        self.knit_graph.last_loop_id = self.last_loop_id
+        return loops
+
+    def truncate(self, last_loop_id: int):
+        """
+        Removes the loops newer than a loop from the end of the yarn
+        :param last_loop_id: the id of the last loop to keep on the yarn
+        """
+        loop_ids = self._loop_ids
+        end = len(loop_ids)
+        while end > 0 and loop_ids[end - 1] > last_loop_id:
+            end -= 1
+        del loop_ids[end:]
+        self.last_loop_id = loop_ids[-1] if end > 0 else None
+
+    def index(self, loop_id: int) -> int:
+        """
+        :param loop_id: the id of a loop on the yarn
+        :return: the position of the loop on the yarn, starting at 0
+        """
+        loop_ids = self._loop_ids
+        if len(loop_ids) > 0:
+            position = loop_id - loop_ids[0]
+            if 0 <= position < len(loop_ids) and loop_ids[position] == loop_id:  # no gaps in ids before the loop
+                return position
+            if self._ids_increase:
+                position = bisect_left(loop_ids, loop_id)
+                if position < len(loop_ids) and loop_ids[position] == loop_id:
+                    return position
+            elif loop_id in loop_ids:
+                return loop_ids.index(loop_id)
+        raise ValueError(f"Loop {loop_id} is not on yarn {self.yarn_id}")
+
+    def prior_loop_id(self, loop_id: int) -> Optional[int]:
+        """
+        :param loop_id: the id of a loop on the yarn
+        :return: the id of the loop before it on the yarn or None if it is the first loop
+        """
+        position = self.index(loop_id)
+        if position == 0:
+            return None
+        return self._loop_ids[position - 1]
+
+    def next_loop_id(self, loop_id: int) -> Optional[int]:
+        """
+        :param loop_id: the id of a loop on the yarn
+        :return: the id of the loop after it on the yarn or None if it is the last loop
+        """
+        position = self.index(loop_id)
+        if position == len(self._loop_ids) - 1:
+            return None
+        return self._loop_ids[position + 1]
+
+    def __len__(self) -> int:
+        return len(self._loop_ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._loop_ids)
+
     def __contains__(self, item):
         """
         :param item: the loop being checked for in the yarn
         :return: true if the loop_id of item or the loop is in the yarn
         """
-        if type(item) is int:
-            return self.yarn_graph.has_node(item)
-        elif isinstance(item, Loop):
-            return self.yarn_graph.has_node(item.loop_id)
-        else:
+        if isinstance(item, Loop):
+            item = item.loop_id
+        elif type(item) is not int:
+            return False
+        try:
+            self.index(item)
+        except ValueError:
             return False
+        return True
 
     def __getitem__(self, item: int) -> Loop:
         """
@@ -100,4 +192,4 @@ class Yarn:
         if item not in self:
             raise AttributeError
         else:
-            return self.yarn_graph.nodes[item].loop
+            return self.knit_graph[item]
@@ -0,0 +1,230 @@
+"""Compiles batches of knitspeak patterns in parallel over a pool of worker processes"""
+import glob
+import io
+import os
+import time
+import traceback
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+from knit_graphs.Knit_Graph import Knit_Graph
+from knitspeak_compiler.knitspeak_compiler import Knitspeak_Compiler
+from knitspeak_compiler.knitspeak_interpreter.knitspeak_interpreter import KnitSpeak_Interpreter
+from knitting_machine.knitgraph_to_knitout import Knitout_Generator
+
+# the interpreter of a worker process, built once by the pool initializer and reused by every job of the worker
+_worker_interpreter: Optional[KnitSpeak_Interpreter] = None
+
+
+class Compile_Job:
+    """
+    A knitspeak pattern to compile and where to write its results
+    ...
+
+    Attributes
+    ----------
+    pattern: str
+        the pattern as a string or the path to a file with the pattern
+    pattern_is_file: bool
+        True if the pattern is the path to a file
+    starting_width: int
+        the number of loops used to create the 0th course
+    row_count: int
+        the number of rows to knit
+    graph_path: Optional[str]
+        the path to save the compiled knit graph to, see Knit_Graph.save(). Not saved if None
+    knitout_path: Optional[str]
+        the path to write the knitout of the compiled knit graph to. Not written if None
+    """
+
+    def __init__(self, pattern: str, starting_width: int, row_count: int, pattern_is_file: bool = False,
+                 graph_path: Optional[str] = None, knitout_path: Optional[str] = None):
+        """
+        :param pattern: the pattern as a string or the path to a file with the pattern
+        :param starting_width: the number of loops used to create the 0th course
+        :param row_count: the number of rows to knit
+        :param pattern_is_file: True if the pattern is the path to a file
+        :param graph_path: the path to save the compiled knit graph to
+        :param knitout_path: the path to write the knitout to
+        """
+        self.pattern: str = pattern
+        self.pattern_is_file: bool = pattern_is_file
+        self.starting_width: int = starting_width
+        self.row_count: int = row_count
+        self.graph_path: Optional[str] = graph_path
+        self.knitout_path: Optional[str] = knitout_path
+
+    def __str__(self):
+        name = self.pattern if self.pattern_is_file else "pattern"
+        return f"{name} ({self.starting_width}x{self.row_count})"
+
+    def __repr__(self):
+        return str(self)
+
+
+class Compile_Result:
+    """
+    The outcome of a compile job
+    ...
+
+    Attributes
+    ----------
+    job: Compile_Job
+        the job that was run
+    loop_count: int
+        the number of loops in the compiled knit graph, 0 if compilation failed
+    compile_time: float
+        the seconds spent parsing and compiling the pattern
+    output_time: float
+        the seconds spent saving the knit graph and writing knitout
+    error: Optional[str]
+        the traceback of the error raised by the job, None if the job succeeded
+    """
+
+    def __init__(self, job: Compile_Job):
+        """
+        :param job: the job that was run
+        """
+        self.job: Compile_Job = job
+        self.loop_count: int = 0
+        self.compile_time: float = 0.0
+        self.output_time: float = 0.0
+        self.error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        """
+        :return: True if the job raised no error
+        """
+        return self.error is None
+
+    def __str__(self):
+        if self.succeeded:
+            return f"{self.job}: {self.loop_count} loops in {self.compile_time + self.output_time:.3f}s"
+        return f"{self.job}: failed in {self.compile_time + self.output_time:.3f}s"
+
+    def __repr__(self):
+        return str(self)
+
+
+def _init_worker():
+    """
+    Builds the parser tables of a worker process once
+    """
+    global _worker_interpreter
+    _worker_interpreter = KnitSpeak_Interpreter()
+
+
+def run_job(job: Compile_Job) -> Compile_Result:
+    """
+    Compiles one job with the interpreter of this process. Errors are captured in the result instead of raised
+    :param job: the job to run
+    :return: the result of the job
+    """
+    if _worker_interpreter is None:
+        _init_worker()
+    result = Compile_Result(job)
+    compile_start = time.perf_counter()
+    output_start = None
+    try:
+        knit_graph = Knitspeak_Compiler(interpreter=_worker_interpreter).compile(job.starting_width, job.row_count,
+                                                                                 job.pattern, job.pattern_is_file)
+        result.loop_count = len(knit_graph.loops)
+        output_start = time.perf_counter()
+        if job.graph_path is not None:
+            knit_graph.save(job.graph_path)
+        if job.knitout_path is not None:
+            Knitout_Generator(knit_graph).write_instructions(job.knitout_path)
+    except Exception:
+        result.error = traceback.format_exc()
+    end = time.perf_counter()
+    if output_start is None:
+        result.compile_time = end - compile_start
+    else:
+        result.compile_time = output_start - compile_start
+        result.output_time = end - output_start
+    return result
+
+
+def compile_batch(jobs: List[Compile_Job], processes: Optional[int] = None) -> List[Compile_Result]:
+    """
+    Runs the jobs over a pool of worker processes that each build their parser once
+    :param jobs: the jobs to run
+    :param processes: the number of worker processes. Defaults to the number of cpus
+    :return: the result of each job in the order of the jobs
+    """
+    if processes == 1 or len(jobs) <= 1:  # not worth starting a pool
+        return [run_job(job) for job in jobs]
+    with Pool(processes, initializer=_init_worker) as pool:
+        return pool.map(run_job, jobs, chunksize=1)
+
+
+def compile_directory(directory: str, starting_width: int, row_count: int, output_directory: str,
+                      write_graphs: bool = True, write_knitout: bool = True, processes: Optional[int] = None) -> List[Compile_Result]:
+    """
+    Compiles every .ks file in a directory at the same size
+    :param directory: the directory of .ks files
+    :param starting_width: the number of loops used to create the 0th course of every pattern
+    :param row_count: the number of rows to knit of every pattern
+    :param output_directory: the directory to write {name}.kg graphs and {name}.k knitout to
+    :param write_graphs: True if knit graphs should be saved
+    :param write_knitout: True if knitout should be written
+    :param processes: the number of worker processes. Defaults to the number of cpus
+    :return: the result of each file in sorted order of file names
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    jobs = []
+    for pattern_file in sorted(glob.glob(os.path.join(directory, "*.ks"))):
+        name = os.path.splitext(os.path.basename(pattern_file))[0]
+        graph_path = os.path.join(output_directory, f"{name}.kg") if write_graphs else None
+        knitout_path = os.path.join(output_directory, f"{name}.k") if write_knitout else None
+        jobs.append(Compile_Job(pattern_file, starting_width, row_count, True, graph_path, knitout_path))
+    return compile_batch(jobs, processes)
+
+
+def _compile_size(size: Tuple[int, int, str, bool]) -> bytes:
+    """
+    Compiles one size of a pattern with the interpreter of this process
+    :param size: the starting width, row count, pattern, and True if the pattern is in a file
+    :return: the compiled knit graph saved with Knit_Graph.save()
+    """
+    if _worker_interpreter is None:
+        _init_worker()
+    starting_width, row_count, pattern, pattern_is_file = size
+    knit_graph = Knitspeak_Compiler(interpreter=_worker_interpreter).compile(starting_width, row_count, pattern, pattern_is_file)
+    buffer = io.BytesIO()
+    knit_graph.save(buffer)
+    return buffer.getvalue()
+
+
+def compile_sizes(widths: List[int], row_count: int, pattern: str, pattern_is_file: bool = False,
+                  pool_loops: int = 250000, processes: Optional[int] = None) -> Dict[int, Knit_Graph]:
+    """
+    Compiles a pattern at several starting widths.
+    Sizes of at least pool_loops loops in their starting width times row count compile in parallel in worker processes,
+    the others compile in this process with one parse of the pattern, see Knitspeak_Compiler.compile_sizes()
+    :param widths: the starting width of each size
+    :param row_count: the number of rows to knit
+    :param pattern: the pattern as a string or the path to a file with the pattern
+    :param pattern_is_file: True if the pattern is the path to a file
+    :param pool_loops: the estimated number of loops at which a size is compiled in a worker process
+    :param processes: the number of worker processes. Defaults to the number of cpus
+    :return: the compiled knit graph of each width in the order of the widths
+    """
+    large_widths = [width for width in dict.fromkeys(widths) if width * row_count >= pool_loops]
+    if len(large_widths) < 2:  # a single large size gains nothing from a worker process
+        large_widths = []
+    small_widths = [width for width in widths if width not in large_widths]
+    knit_graphs: Dict[int, Knit_Graph] = {}
+    if len(large_widths) > 0:
+        processes = len(large_widths) if processes is None else min(processes, len(large_widths))
+        with Pool(processes, initializer=_init_worker) as pool:
+            saved_graphs = pool.map_async(_compile_size, [(width, row_count, pattern, pattern_is_file) for width in large_widths],
+                                          chunksize=1)
+            if len(small_widths) > 0:  # compiled while the workers run
+                knit_graphs.update(Knitspeak_Compiler().compile_sizes(small_widths, row_count, pattern, pattern_is_file))
+            for width, saved_graph in zip(large_widths, saved_graphs.get()):
+                knit_graphs[width] = Knit_Graph.load(io.BytesIO(saved_graph))
+    elif len(small_widths) > 0:
+        knit_graphs.update(Knitspeak_Compiler().compile_sizes(small_widths, row_count, pattern, pattern_is_file))
+    return {width: knit_graphs[width] for width in widths}
@@ -0,0 +1,175 @@
+"""An on-disk cache of compiled knit graphs keyed by the content of the compiler inputs"""
+import hashlib
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+from knit_graphs.Knit_Graph import Knit_Graph
+from knit_graphs.Knit_Graph_File import FILE_VERSION
+from knitspeak_compiler.knitspeak_compiler import Knitspeak_Compiler
+from knitspeak_compiler.knitspeak_interpreter.knitspeak_interpreter import grammar_digest
+
+COMPILER_VERSION = 1  # increment when the same inputs compile to different knit graphs
+_CACHE_SUFFIX = ".kg"
+
+
+class Compile_Cache:
+    """
+    A directory of compiled knit graphs saved with Knit_Graph.save() and named by a hash of the pattern text,
+    the starting width, the row count, the grammar and actions files, and the compiler version.
+    Entries are written to a temporary file and renamed into place so concurrent processes never read partial entries.
+    The least recently used entries, by file modification time, are evicted when the cache grows past its size limit.
+    A hit loaded with Knit_Graph.load() still builds every loop and stitch in memory, which takes about as long as
+     compiling the pattern again. Hits on large graphs that are only read are much faster with mapped=True
+    ...
+
+    Attributes
+    ----------
+    directory: str
+        the directory holding the cache entries
+    max_bytes: int
+        the size limit of the cache entries
+    hits: int
+        the number of compilations answered by the cache
+    misses: int
+        the number of compilations that were not in the cache
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        :param directory: the directory holding the cache entries, created if it does not exist
+        :param max_bytes: the size limit of the cache entries. Defaults to 256MB
+        """
+        assert max_bytes > 0, "Cache must have a positive size limit"
+        os.makedirs(directory, exist_ok=True)
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def key(starting_width: int, row_count: int, pattern: str, patternIsFile: bool = False) -> str:
+        """
+        :param starting_width: the number of loops used to create the 0th course
+        :param row_count: the number of rows to knit
+        :param pattern: the pattern as a string or in a file
+        :param patternIsFile: True if pattern is provided in a file, the file's content is hashed
+        :return: the hex digest that names the cache entry of the inputs
+        """
+        if patternIsFile:
+            with open(pattern, "rb") as pattern_file:
+                pattern_bytes = pattern_file.read()
+        else:
+            pattern_bytes = pattern.encode("utf-8")
+        digest = hashlib.sha256()
+        digest.update(f"{COMPILER_VERSION}:{FILE_VERSION}:{starting_width}:{row_count}:".encode("ascii"))
+        digest.update(grammar_digest())
+        digest.update(hashlib.sha256(pattern_bytes).digest())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        """
+        :param key: the key of an entry
+        :return: the path of the entry's file
+        """
+        return os.path.join(self.directory, key + _CACHE_SUFFIX)
+
+    def get(self, key: str, mapped: bool = False) -> Optional[Knit_Graph]:
+        """
+        :param key: the key of an entry
+        :param mapped: if True, returns a read-only Mapped_Knit_Graph that reads the entry lazily
+        :return: the knit graph stored under the key or None if it is not in the cache
+        """
+        path = self._path(key)
+        try:
+            os.utime(path)  # marks the entry as recently used
+            if mapped:
+                from knit_graphs.Mapped_Knit_Graph import Mapped_Knit_Graph
+                return Mapped_Knit_Graph(path)
+            return Knit_Graph.load(path)
+        except FileNotFoundError:  # never cached or evicted by another process
+            return None
+
+    def put(self, key: str, knit_graph: Knit_Graph):
+        """
+        Atomically stores the knit graph under the key and evicts entries past the size limit
+        :param key: the key of the entry
+        :param knit_graph: the knit graph to store
+        """
+        file_descriptor, temporary_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(file_descriptor, "wb") as temporary_file:
+                knit_graph.save(temporary_file)
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        self.evict()
+
+    def compile(self, starting_width: int, row_count: int, pattern: str, patternIsFile: bool = False,
+                mapped: bool = False) -> Knit_Graph:
+        """
+        Compiles the pattern with a new Knitspeak_Compiler unless the same inputs are in the cache
+        :param starting_width: the number of loops used to create the 0th course
+        :param row_count: the number of rows to knit
+        :param pattern: the pattern as a string or in a file
+        :param patternIsFile: True if pattern is provided in a file
+        :param mapped: if True, cache hits return a read-only Mapped_Knit_Graph
+        :return: the compiled knit graph
+        """
+        key = self.key(starting_width, row_count, pattern, patternIsFile)
+        knit_graph = self.get(key, mapped)
+        if knit_graph is not None:
+            self.hits += 1
+            return knit_graph
+        self.misses += 1
+        knit_graph = Knitspeak_Compiler().compile(starting_width, row_count, pattern, patternIsFile)
+        self.put(key, knit_graph)
+        return knit_graph
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """
+        :return: the modification time, size and path of every entry, skipping entries removed while listing
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        """
+        :return: the total size in bytes of the cache entries
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits its size limit
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # evicted by another process
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Removes every entry from the cache
+        """
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,102 @@
+"""Course kernels record the structure of a compiled course so that repeats of the course can be replayed"""
+from typing import Callable, List, Tuple, Union
+
+from knit_graphs.Knit_Graph import Pull_Direction
+from knitspeak_compiler.knitspeak_interpreter.cable_definitions import Cable_Definition
+from knitspeak_compiler.knitspeak_interpreter.closures import Num_Closure, Iterator_Closure
+from knitspeak_compiler.knitspeak_interpreter.stitch_definitions import Stitch_Definition
+
+
+class Course_Kernel:
+    """
+    The stitches of one compiled course with parents given by their index in the prior course instead of their loop id.
+    A course template without closures always compiles to the same kernel for the same prior course width and side,
+     so the kernel can be replayed against the loop ids of any later prior course
+    ...
+
+    Attributes
+    ----------
+    course_width: int
+        the number of loops in the course
+    new_loop_positions: List[int]
+        the positions in the course of loops that are created
+    parent_indices: List[List[int]]
+        for each created loop, the index of its parents in the prior course in stack order
+    pull_directions: List[Pull_Direction]
+        for each created loop, the direction it is pulled through its parents
+    depths: List[int]
+        for each created loop, the crossing depth of its stitches
+    parent_offsets: List[List[int]]
+        for each created loop, the offsets to its parents
+    slip_positions: List[int]
+        the positions in the course of loops slipped from the prior course
+    slip_indices: List[int]
+        the index in the prior course of each slipped loop
+    """
+
+    def __init__(self, course_width: int, new_loop_positions: List[int], parent_indices: List[List[int]],
+                 pull_directions: List[Pull_Direction], depths: List[int], parent_offsets: List[List[int]],
+                 slip_positions: List[int], slip_indices: List[int]):
+        self.course_width: int = course_width
+        self.new_loop_positions: List[int] = new_loop_positions
+        self.parent_indices: List[List[int]] = parent_indices
+        self.pull_directions: List[Pull_Direction] = pull_directions
+        self.depths: List[int] = depths
+        self.parent_offsets: List[List[int]] = parent_offsets
+        self.slip_positions: List[int] = slip_positions
+        self.slip_indices: List[int] = slip_indices
+
+    @staticmethod
+    def record(last_course_loop_ids: List[int], cur_course_loop_ids: List[int], new_loop_positions: List[int],
+               new_loop_parent_ids: List[List[int]], pull_directions: List[Pull_Direction], depths: List[int],
+               parent_offsets: List[List[int]]):
+        """
+        :param last_course_loop_ids: the loop ids of the prior course
+        :param cur_course_loop_ids: the loop ids of the compiled course, marking loops to be created with -1
+        :param new_loop_positions: the positions in the course of the loops to be created
+        :param new_loop_parent_ids: the parent ids of each loop to be created
+        :param pull_directions: the pull direction of each loop to be created
+        :param depths: the crossing depth of each loop to be created
+        :param parent_offsets: the parent offsets of each loop to be created
+        :return: the kernel of the compiled course
+        """
+        prior_indices = {loop_id: index for index, loop_id in enumerate(last_course_loop_ids)}
+        new_positions = set(new_loop_positions)
+        slip_positions = [position for position in range(0, len(cur_course_loop_ids)) if position not in new_positions]
+        return Course_Kernel(len(cur_course_loop_ids), [*new_loop_positions],
+                             [[prior_indices[parent_id] for parent_id in parent_ids] for parent_ids in new_loop_parent_ids],
+                             [*pull_directions], [*depths], [*parent_offsets],
+                             slip_positions, [prior_indices[cur_course_loop_ids[position]] for position in slip_positions])
+
+    def replay(self, add_course: Callable[[List[List[int]], List[Pull_Direction], List[int], List[List[int]]], List[int]],
+               last_course_loop_ids: List[int]) -> List[int]:
+        """
+        Adds the loops and stitches of the kernel in one batch
+        :param add_course: adds a batch of loops given their parent ids, pull directions, depths and parent offsets
+         and returns the ids of the new loops, e.g., Knitspeak_Compiler._add_course
+        :param last_course_loop_ids: the loop ids of the prior course
+        :return: the loop ids of the new course
+        """
+        parent_ids = [[last_course_loop_ids[index] for index in indices] for indices in self.parent_indices]
+        new_loop_ids = add_course(parent_ids, self.pull_directions, self.depths, self.parent_offsets)
+        course_loop_ids = [-1] * self.course_width
+        for position, loop_id in zip(self.new_loop_positions, new_loop_ids):
+            course_loop_ids[position] = loop_id
+        for position, index in zip(self.slip_positions, self.slip_indices):
+            course_loop_ids[position] = last_course_loop_ids[index]
+        return course_loop_ids
+
+
+def is_closure_free(instructions: List[Tuple[Union[tuple, Stitch_Definition, Cable_Definition, list], Tuple[bool, int]]]) -> bool:
+    """
+    :param instructions: the stitch operations of a course template
+    :return: True if no repeat in the instructions depends on a closure, so that the course compiles the same way every time
+    """
+    for action, (_, repeat) in instructions:
+        if isinstance(repeat, Num_Closure) or isinstance(repeat, Iterator_Closure):
+            return False
+        if type(action) is list and not is_closure_free(action):
+            return False
+        if type(action) is tuple and not is_closure_free([action]):
+            return False
+    return True
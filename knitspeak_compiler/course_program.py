@@ -0,0 +1,153 @@
+"""Lowers the stitch-operation tree of a course template into a flat program of primitive operations"""
+from typing import Dict, List, Optional, Tuple, Union
+
+from knit_graphs.Knit_Graph import Pull_Direction
+from knitspeak_compiler.knitspeak_interpreter.cable_definitions import Cable_Definition
+from knitspeak_compiler.knitspeak_interpreter.closures import Num_Closure
+from knitspeak_compiler.knitspeak_interpreter.stitch_definitions import Stitch_Definition
+
+# op-codes of a course program. Each op is followed by its operands in Course_Program.code
+OP_STITCH = 0  # stitch index, count: executes the stitch count times
+OP_REPEAT = 1  # slot, count, end address: repeats the block up to the end address count times
+OP_END_REPEAT = 2  # start address: returns to the start of the repeated block while repeats remain
+OP_UNTIL = 3  # slot, remaining loops, end address: repeats the block until remaining loops are left in the prior course
+OP_END_UNTIL = 4  # start address: returns to the start of the block while more than the remaining loops are left
+OP_BREAK_IF_DONE = 5  # ends the course if every loop of the prior course is consumed
+NO_SLOT = -1  # marks operands that are literals instead of closure slots
+
+Stitch_Operation = Tuple[int, Tuple[int, ...], Pull_Direction, int]  # child loops, parent offsets, pull direction, depth
+
+
+class Course_Program:
+    """
+    A flat program that compiles one course template on one side of the fabric.
+    Stitches are flipped for the side when the program is built and closures are referenced by slot
+    ...
+
+    Attributes
+    ----------
+    code: List[int]
+        the op-codes and their operands
+    stitches: List[Stitch_Operation]
+        the stitches referenced by OP_STITCH as (child loops, parent offsets, pull direction, depth)
+    slots: List[Num_Closure]
+        the closures referenced by repeat operations, evaluated each time their operation starts
+    counted_blocks: Dict[int, Tuple[int, List[int]]]
+        the address of each OP_UNTIL whose body always consumes the same number of loops, keyed to
+        the number of loops consumed by one pass of the body and the stitch indices of one pass in order
+    """
+
+    def __init__(self):
+        self.code: List[int] = []
+        self.stitches: List[Stitch_Operation] = []
+        self.slots: List[Num_Closure] = []
+        self.counted_blocks: Dict[int, Tuple[int, List[int]]] = {}
+        self._stitch_indices = {}
+
+    def _stitch_index(self, stitch_def: Stitch_Definition) -> int:
+        """
+        :param stitch_def: a stitch definition that is already flipped for the side of the program
+        :return: the index of the stitch in the stitch table
+        """
+        stitch = (stitch_def.child_loops, tuple(stitch_def.offset_to_parent_loops), stitch_def.pull_direction, stitch_def.cabling_depth)
+        if stitch not in self._stitch_indices:
+            self._stitch_indices[stitch] = len(self.stitches)
+            self.stitches.append(stitch)
+        return self._stitch_indices[stitch]
+
+    def _operand(self, value: Union[int, Num_Closure]) -> Tuple[int, int]:
+        """
+        :param value: a literal or a closure
+        :return: the slot and literal operands for the value
+        """
+        if isinstance(value, Num_Closure):
+            self.slots.append(value)
+            return len(self.slots) - 1, 0
+        return NO_SLOT, value
+
+    def _lower_action(self, action: Union[tuple, Stitch_Definition, Cable_Definition, list], working_ws: bool):
+        """
+        Appends the code for one execution of the action
+        :param action: a stitch definition, cable definition, list of instructions or a nested instruction
+        :param working_ws: True if the program is for a wrong-side course
+        """
+        if isinstance(action, Stitch_Definition):
+            if working_ws:  # flips stitches following hand-knitting conventions
+                action = action.copy_and_flip()
+            self.code.extend((OP_STITCH, self._stitch_index(action), 1))
+        elif isinstance(action, Cable_Definition):
+            if working_ws:  # flips cable by hand-knitting convention
+                action = action.copy_and_flip()
+            for stitch_def in action.stitch_definitions():
+                self.code.extend((OP_STITCH, self._stitch_index(stitch_def), 1))
+        elif type(action) is list:
+            for instruction in action:
+                self._lower_instruction(instruction, working_ws)
+        else:
+            self._lower_instruction(action, working_ws)
+
+    def _lower_instruction(self, instruction: Tuple[Union[tuple, Stitch_Definition, Cable_Definition, list], Tuple[bool, int]],
+                           working_ws: bool):
+        """
+        Appends the code for an instruction and its repeats
+        :param instruction: the action and its repeat information, see Knitspeak_Compiler.compile()
+        :param working_ws: True if the program is for a wrong-side course
+        """
+        action, (static_repeats, repeat) = instruction
+        slot, literal = self._operand(repeat)
+        if static_repeats and slot == NO_SLOT and literal == 1:
+            self._lower_action(action, working_ws)
+        elif static_repeats and slot == NO_SLOT and isinstance(action, Stitch_Definition):
+            self._lower_action(action, working_ws)
+            self.code[-1] = literal  # the count of the stitch operation
+        else:
+            start = len(self.code)
+            self.code.extend((OP_REPEAT if static_repeats else OP_UNTIL, slot, literal, -1))
+            self._lower_action(action, working_ws)
+            self.code.extend((OP_END_REPEAT if static_repeats else OP_END_UNTIL, start + 4))
+            self.code[start + 3] = len(self.code)
+            if not static_repeats:
+                body = self._unrolled_stitches(start + 4, len(self.code) - 2)
+                if body is not None:
+                    consumed = sum(len(self.stitches[stitch][1]) for stitch in body)
+                    if consumed > 0:
+                        self.counted_blocks[start] = (consumed, body)
+
+    def _unrolled_stitches(self, start: int, end: int) -> Optional[List[int]]:
+        """
+        :param start: the address of the first op in a block
+        :param end: the address after the last op in the block
+        :return: the stitch indices executed by the block in order
+         or None if the block has repeats that depend on closures or on the loops left in the prior course
+        """
+        stitches = []
+        pc = start
+        while pc < end:
+            op = self.code[pc]
+            if op == OP_STITCH:
+                stitches.extend([self.code[pc + 1]] * self.code[pc + 2])
+                pc += 3
+            elif op == OP_REPEAT and self.code[pc + 1] == NO_SLOT:
+                block_end = self.code[pc + 3]
+                block = self._unrolled_stitches(pc + 4, block_end - 2)
+                if block is None:
+                    return None
+                stitches.extend(block * self.code[pc + 2])
+                pc = block_end
+            else:
+                return None
+        return stitches
+
+
+def lower_course(instructions: List[Tuple[Union[tuple, Stitch_Definition, Cable_Definition, list], Tuple[bool, int]]],
+                 working_ws: bool) -> Course_Program:
+    """
+    :param instructions: the stitch operations of a course template
+    :param working_ws: True if the program is for a wrong-side course
+    :return: the program that executes the instructions once, ending the course as soon as the prior course is consumed
+    """
+    program = Course_Program()
+    for instruction in instructions:
+        program._lower_instruction(instruction, working_ws)
+        program.code.append(OP_BREAK_IF_DONE)
+    return program
@@ -0,0 +1,105 @@
+"""Course records keep what each compiled row depended on so that later compiles can reuse the unchanged rows"""
+from array import array
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+from knitspeak_compiler.knitspeak_interpreter.cable_definitions import Cable_Definition
+from knitspeak_compiler.knitspeak_interpreter.closures import Num_Closure
+from knitspeak_compiler.knitspeak_interpreter.stitch_definitions import Stitch_Definition
+
+Instruction = Tuple[Union[tuple, Stitch_Definition, Cable_Definition, list], Tuple[bool, int]]
+
+
+class Course_Record:
+    """
+    The state of the compiler at the start of a row and the course template that compiled the row
+    ...
+
+    Attributes
+    ----------
+    row: int
+        the row the record starts
+    signature: Optional[tuple]
+        the structure of the course template of the row, see template_signature(). None if the row was not compiled
+    reads: FrozenSet[str]
+        the variables read by the course template
+    writes: FrozenSet[str]
+        the variables assigned by the course template
+    variables: Dict[str, int]
+        the numerical variables in the symbol table at the start of the row
+    last_loop_id: int
+        the id of the last loop in the knit graph at the start of the row
+    prior_loop_ids: array
+        the loop ids of the prior row
+    """
+
+    def __init__(self, row: int, signature: Optional[tuple], reads: FrozenSet[str], writes: FrozenSet[str],
+                 variables: Dict[str, int], last_loop_id: int, prior_loop_ids: List[int]):
+        """
+        :param row: the row the record starts
+        :param signature: the structure of the course template of the row
+        :param reads: the variables read by the course template
+        :param writes: the variables assigned by the course template
+        :param variables: the numerical variables at the start of the row
+        :param last_loop_id: the id of the last loop in the knit graph at the start of the row
+        :param prior_loop_ids: the loop ids of the prior row
+        """
+        self.row: int = row
+        self.signature: Optional[tuple] = signature
+        self.reads: FrozenSet[str] = reads
+        self.writes: FrozenSet[str] = writes
+        self.variables: Dict[str, int] = variables
+        self.last_loop_id: int = last_loop_id
+        self.prior_loop_ids: array = array("q", prior_loop_ids)
+
+    @property
+    def incoming_width(self) -> int:
+        """
+        :return: the number of loops in the prior row
+        """
+        return len(self.prior_loop_ids)
+
+
+def _stitch_signature(stitch_def: Stitch_Definition) -> tuple:
+    """
+    :param stitch_def: a stitch definition
+    :return: the fields that decide how the stitch compiles
+    """
+    return stitch_def.child_loops, tuple(stitch_def.offset_to_parent_loops), stitch_def.pull_direction, stitch_def.cabling_depth
+
+
+def template_signature(instructions: List[Instruction]) -> tuple:
+    """
+    :param instructions: the stitch operations of a course template
+    :return: a hashable structure that is equal for templates that compile the same way from the same state
+    """
+    signature = []
+    for action, (static_repeats, repeat) in instructions:
+        if isinstance(action, Stitch_Definition):
+            action_signature = _stitch_signature(action)
+        elif isinstance(action, Cable_Definition):
+            action_signature = tuple(_stitch_signature(stitch_def) for stitch_def in action.stitch_definitions())
+        elif type(action) is list:
+            action_signature = template_signature(action)
+        else:
+            action_signature = template_signature([action])
+        signature.append((action_signature, static_repeats, str(repeat) if isinstance(repeat, Num_Closure) else repeat))
+    return tuple(signature)
+
+
+def template_variables(instructions: List[Instruction]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    :param instructions: the stitch operations of a course template
+    :return: the variables read by the template and the variables it assigns, in lower case as keyed in the symbol table
+    """
+    reads = set()
+    writes = set()
+    for action, (_, repeat) in instructions:
+        if isinstance(repeat, Num_Closure):
+            reads.update(key.lower() for key in repeat.dependencies)
+            writes.update(key.lower() for key in repeat.assigned_variables)
+        if type(action) is list or type(action) is tuple:
+            action_reads, action_writes = template_variables(action if type(action) is list else [action])
+            reads.update(action_reads)
+            writes.update(action_writes)
+    reads.discard("current_row")  # the row is restored with the record
+    return frozenset(reads), frozenset(writes)
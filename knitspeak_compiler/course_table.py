@@ -0,0 +1,202 @@
+"""A table of course templates keyed by arithmetic progressions of course ids instead of by each course id"""
+from bisect import bisect_right, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class Course_Table:
+    """
+    Maps course ids to the course template of the statement that defines them.
+    Statements are stored as progressions of course ids with a step of 1 (every row) or 2 (every rs or ws row).
+    The courses of a progression that share a parity are one interval of that parity,
+     so each parity keeps its intervals sorted and finds the statement of a course with a binary search.
+    All rs rows and all ws rows are stored as defaults of their parity for courses that no statement defines
+    ...
+
+    Attributes
+    ----------
+    max_course: int
+        the largest course id defined by a statement, 0 if the table is empty
+    """
+
+    def __init__(self):
+        # for each parity, sorted intervals (first course, last course, course template) of explicitly defined courses
+        self._intervals: Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int]]] = ([], [])
+        self._templates: List[list] = []  # templates referenced by index in intervals, so intervals sort by course
+        self._side_defaults: Dict[int, Tuple[int, list]] = {}  # parity to the first defaulted course and its template
+        self.max_course: int = 0
+
+    def add(self, courses: range, course_template: list) -> Optional[int]:
+        """
+        Defines the courses of a progression unless one of them is already defined
+        :param courses: a progression of course ids with a step of 1 or 2
+        :param course_template: the stitch operations of the courses
+        :return: the first course that is already defined, None if the courses were added
+        """
+        if len(courses) == 0:
+            return None
+        assert courses.step in (1, 2) or len(courses) == 1, f"Course progressions must step by 1 or 2, not {courses.step}"
+        defined = self._first_defined(courses)
+        if defined is not None:
+            return defined
+        self._templates.append(course_template)
+        template = len(self._templates) - 1
+        for parity in (0, 1):
+            interval = self._parity_interval(courses, parity)
+            if interval is not None:
+                insort(self._intervals[parity], (interval[0], interval[1], template))
+        self.max_course = max(self.max_course, courses[-1])
+        return None
+
+    def add_statement(self, progressions: List[range], course_template: list) -> Optional[int]:
+        """
+        Defines the courses of the progressions of one statement unless one of them is already defined.
+        Courses that the statement lists more than once, e.g., "1st, from 1st to 4th rows", are defined once
+        :param progressions: progressions of course ids with a step of 1 or 2
+        :param course_template: the stitch operations of the courses
+        :return: the first course that is already defined, None if the courses were added
+        """
+        merged = []  # the courses of the progressions as disjoint progressions of one parity
+        for parity in (0, 1):
+            intervals = sorted(interval for interval in (self._parity_interval(courses, parity) for courses in progressions if len(courses) > 0)
+                               if interval is not None)
+            parity_merged = []
+            for first, last in intervals:
+                if len(parity_merged) > 0 and first <= parity_merged[-1][1] + 2:
+                    parity_merged[-1][1] = max(parity_merged[-1][1], last)
+                else:
+                    parity_merged.append([first, last])
+            merged.extend(range(first, last + 1, 2) for first, last in parity_merged)
+        defined = [course for course in (self._first_defined(courses) for courses in merged) if course is not None]
+        if len(defined) > 0:
+            return min(defined)
+        for courses in merged:
+            self.add(courses, course_template)
+        return None
+
+    def set_side_default(self, first_course: int, course_template: list):
+        """
+        Uses a template for every course of the parity of first_course from first_course onward that is not otherwise defined
+        :param first_course: the first course the template defaults, e.g., 3 for all rs rows
+        :param course_template: the stitch operations of the courses
+        """
+        self._side_defaults[first_course % 2] = (first_course, course_template)
+
+    @staticmethod
+    def _parity_interval(courses: range, parity: int) -> Optional[Tuple[int, int]]:
+        """
+        :param courses: a progression of course ids with a step of 1 or 2
+        :param parity: 0 for even courses, 1 for odd courses
+        :return: the first and last course of the progression with the parity or None if there are none
+        """
+        first = courses[0] if courses[0] % 2 == parity else courses[0] + 1
+        last = courses[-1] if courses[-1] % 2 == parity else courses[-1] - 1
+        if first > last or (courses.step % 2 == 0 and courses[0] % 2 != parity):
+            return None
+        return first, last
+
+    def _explicit_interval(self, course_id: int) -> Optional[Tuple[int, int, int]]:
+        """
+        :param course_id: a course id
+        :return: the interval of explicitly defined courses that holds the course or None if no statement defines it
+        """
+        intervals = self._intervals[course_id % 2]
+        index = bisect_right(intervals, (course_id, float("inf"), 0)) - 1
+        if index >= 0 and intervals[index][0] <= course_id <= intervals[index][1]:
+            return intervals[index]
+        return None
+
+    def _first_defined(self, courses: range) -> Optional[int]:
+        """
+        :param courses: a progression of course ids with a step of 1 or 2
+        :return: the first course of the progression that a statement already defines, None if there are none
+        """
+        first_defined = None
+        for parity in (0, 1):
+            interval = self._parity_interval(courses, parity)
+            if interval is None:
+                continue
+            intervals = self._intervals[parity]
+            index = max(0, bisect_right(intervals, (interval[0], float("inf"), 0)) - 1)
+            while index < len(intervals) and intervals[index][0] <= interval[1]:
+                first, last, _ = intervals[index]
+                if last >= interval[0]:
+                    defined = max(first, interval[0])
+                    if first_defined is None or defined < first_defined:
+                        first_defined = defined
+                    break
+                index += 1
+        return first_defined
+
+    def overridden_intervals(self, parity: int) -> List[Tuple[int, int]]:
+        """
+        :param parity: the parity of a side default
+        :return: the first and last course of each interval of explicitly defined courses that override the side default
+        """
+        if parity not in self._side_defaults:
+            return []
+        first_default = self._side_defaults[parity][0]
+        return [(max(first, first_default), min(last, self.max_course)) for first, last, _ in self._intervals[parity]
+                if last >= first_default and first <= self.max_course]
+
+    def first_undefined(self, last_course: int) -> Optional[int]:
+        """
+        :param last_course: the last course that must be defined
+        :return: the first course from 1 to last_course that is not defined, None if every course is defined
+        """
+        first_undefined = None
+        for parity in (0, 1):
+            expected = 2 if parity == 0 else 1  # the next course of the parity that must be defined
+            default_start = self._side_defaults[parity][0] if parity in self._side_defaults else None
+            for first, last, _ in self._intervals[parity]:
+                if default_start is not None and expected >= default_start:
+                    break
+                if first > expected:
+                    break
+                expected = max(expected, last + 2)
+            if default_start is not None and expected >= default_start:
+                continue
+            if expected <= last_course and (first_undefined is None or expected < first_undefined):
+                first_undefined = expected
+        return first_undefined
+
+    def __getitem__(self, course_id: int) -> list:
+        """
+        :param course_id: a course id
+        :return: the course template that defines the course
+        """
+        interval = self._explicit_interval(course_id)
+        if interval is not None:
+            return self._templates[interval[2]]
+        default = self._side_defaults.get(course_id % 2)
+        if default is not None and default[0] <= course_id <= self.max_course:
+            return default[1]
+        raise KeyError(course_id)
+
+    def __contains__(self, course_id: int) -> bool:
+        try:
+            self[course_id]
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        """
+        :return: the number of defined courses
+        """
+        count = 0
+        for parity in (0, 1):
+            count += sum((last - first) // 2 + 1 for first, last, _ in self._intervals[parity])
+            if parity in self._side_defaults:
+                first_default = self._side_defaults[parity][0]
+                defaulted = range(first_default, self.max_course + 1, 2)
+                overridden = sum((last - first) // 2 + 1 for first, last in self.overridden_intervals(parity))
+                count += len(defaulted) - overridden
+        return count
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        :return: iterator over the defined course ids in increasing order
+        """
+        for course_id in range(1, self.max_course + 1):
+            if course_id in self:
+                yield course_id
@@ -1,12 +1,17 @@
 """Compiler code for converting knitspeak AST to knitgraph"""
-from typing import List, Dict, Union, Tuple, Set
+from typing import List, Dict, Union, Tuple, Set, Optional, Iterator, FrozenSet, Iterable
 
-from knit_graphs.Knit_Graph import Knit_Graph
+from knit_graphs.Course_View import Course_View
+from knit_graphs.Knit_Graph import Knit_Graph, Pull_Direction
 from knit_graphs.Yarn import Yarn
+from knitspeak_compiler.course_kernel import Course_Kernel, is_closure_free
+from knitspeak_compiler.course_table import Course_Table
+from knitspeak_compiler.course_record import Course_Record, template_signature, template_variables
+from knitspeak_compiler.course_program import Course_Program, lower_course, NO_SLOT, OP_STITCH, OP_REPEAT, \
+    OP_END_REPEAT, OP_UNTIL, OP_END_UNTIL, OP_BREAK_IF_DONE
 from knitspeak_compiler.knitspeak_interpreter.knitspeak_interpreter import KnitSpeak_Interpreter
-from knitspeak_compiler.knitspeak_interpreter.cable_definitions import Cable_Definition
 from knitspeak_compiler.knitspeak_interpreter.closures import Num_Closure, Iterator_Closure
-from knitspeak_compiler.knitspeak_interpreter.stitch_definitions import Stitch_Definition
+from knitspeak_compiler.knitspeak_interpreter.symbol_table import Symbol_Table
 
 
 class Knitspeak_Compiler:
@@ -14,24 +19,67 @@ class Knitspeak_Compiler:
     A class used to compile knit graphs from knitspeak
     """
 
-    def __init__(self):
-        self._parser = KnitSpeak_Interpreter()
+    def __init__(self, knit_graph: Optional[Knit_Graph] = None, interpreter: Optional[KnitSpeak_Interpreter] = None,
+                 stream_statements: bool = False):
+        """
+        :param knit_graph: an empty knit graph to compile into, e.g., Knit_Graph(Array_Graph()) for large patterns.
+            Defaults to a new Knit_Graph
+        :param interpreter: an interpreter to share instead of building a new parser, possibly with compilers in other threads.
+            Defaults to a new KnitSpeak_Interpreter
+        :param stream_statements: if True, patterns are parsed one statement at a time and each statement is organized
+         by course id as soon as it is parsed, see KnitSpeak_Interpreter.interpret_iter().
+         Parse results are not kept, so memory is bounded by the course table instead of the pattern text
+        """
+        if interpreter is None:
+            interpreter = KnitSpeak_Interpreter()
+        self._parser = interpreter
+        self._stream_statements: bool = stream_statements
+        self._symbol_table: Symbol_Table = Symbol_Table()  # the symbol table of the last parsed pattern
         self.parse_results: List[Dict[str, Union[List[int, Num_Closure, Iterator_Closure], List[tuple]]]] = []
-        self.course_ids_to_operations: Dict[int, List[tuple]] = {}
-        self.knit_graph = Knit_Graph()
+        self.course_ids_to_operations: Course_Table = Course_Table()
+        self._start_graph(knit_graph)
+        # kernels of compiled courses keyed by (course template, width of the prior course, wrong-side)
+        self._course_kernels: Dict[Tuple[int, int, bool], Course_Kernel] = {}
+        # course templates lowered to programs keyed by (course template, wrong-side)
+        self._course_programs: Dict[Tuple[int, bool], Course_Program] = {}
+        self._discard_courses: bool = False  # True if only loop ids are allocated for compiled courses
+        # the signature, read variables and assigned variables of each course template keyed by template
+        self._template_records: Dict[int, Tuple[tuple, FrozenSet[str], FrozenSet[str]]] = {}
+        self._parsed_variables: Dict[str, int] = {}  # the numerical variables after the pattern was parsed
+
+    def _start_graph(self, knit_graph: Optional[Knit_Graph] = None):
+        """
+        Starts compiling a new knit graph from the 0th row. Parse results, course programs and kernels are kept
+        :param knit_graph: an empty knit graph to compile into. Defaults to a new Knit_Graph
+        """
+        if knit_graph is None:
+            knit_graph = Knit_Graph()
+        self.knit_graph = knit_graph
         self.yarn = Yarn("yarn", self.knit_graph)
         self.knit_graph.add_yarn(self.yarn)
         self.last_course_loop_ids: List[int] = []
         self.cur_course_loop_ids: List[int] = []
         self.current_row = 0
         self.loop_ids_consumed_by_current_course: Set[int] = set()
+        # stitches of the current course, added to the knit graph in one batch when the course is closed
+        self._new_loop_positions: List[int] = []  # positions in cur_course_loop_ids of loops to be created
+        self._new_loop_parent_ids: List[List[int]] = []
+        self._new_loop_pull_directions: List[Pull_Direction] = []
+        self._new_loop_depths: List[int] = []
+        self._new_loop_parent_offsets: List[List[int]] = []
+        # the new loop ids, parent ids, pull directions, depths and parent offsets of the last batch of loops
+        self._last_batch: Optional[tuple] = None
+        self._starting_width: int = 0
+        self._compiled_rows: int = 0  # the number of rows closed in the knit graph
+        # the state at the start of each row after the 0th course, used by recompile(). Empty when discarding courses
+        self._course_records: List[Course_Record] = []
 
     def _increment_current_row(self):
         """
         Increments the current row by 1 and manages its state in the symbol table
         """
         self.current_row += 1
-        self._parser.parser.symbolTable["current_row"] = self.current_row
+        self._symbol_table["current_row"] = self.current_row
 
     @property
     def _working_ws(self) -> bool:
@@ -49,24 +97,199 @@ class Knitspeak_Compiler:
         :param patternIsFile: True if pattern is provided in a file
         :return: the resulting compiled knit graph
         """
-        self.parse_results = self._parser.interpret(pattern, patternIsFile)
-        self._organize_courses()
+        self._discard_courses = False
+        self._parse(pattern, patternIsFile)
+        for _ in self._compile_courses(starting_width, row_count):
+            pass
+        return self.knit_graph
+
+    def compile_sizes(self, widths: List[int], row_count: int, pattern: str, patternIsFile: bool = False) -> Dict[int, Knit_Graph]:
+        """
+        Compiles the pattern at several starting widths, parsing and organizing the courses once.
+        Course programs are shared by all sizes and the symbol table is returned to its state after parsing before each size
+        :param widths: the starting width of each size
+        :param row_count: the number of rows to knit before completing, pattern may repeat or be incomplete
+        :param pattern: the pattern as a string or in a file
+        :param patternIsFile: True if pattern is provided in a file
+        :return: the compiled knit graph of each width
+        """
+        self._discard_courses = False
+        self._parse(pattern, patternIsFile)
+        symbol_table = self._symbol_table
+        parsed_state = symbol_table.snapshot()
+        knit_graphs = {}
+        for width in widths:
+            if len(knit_graphs) > 0:
+                symbol_table.restore(parsed_state)
+            if len(knit_graphs) > 0 or len(self.knit_graph.loops) > 0:  # only an empty graph given to the compiler is reused
+                self._start_graph(Knit_Graph(type(self.knit_graph.graph)(), self.knit_graph.checked))
+            for _ in self._compile_courses(width, row_count):
+                pass
+            knit_graphs[width] = self.knit_graph
+        return knit_graphs
+
+    def compile_iter(self, starting_width: int, row_count: int, pattern: str, patternIsFile: bool = False,
+                     discard_courses: bool = False) -> Iterator[Course_View]:
+        """
+        Compiles the pattern one course at a time, yielding each course as soon as it is closed.
+        May throw errors from compilation once the courses before the error are yielded
+        :param row_count: the number of rows to knit before completing, pattern may repeat or be incomplete
+        :param starting_width: the number of loops used to create the 0th course
+        :param pattern: the pattern as a string or in a file
+        :param patternIsFile: True if pattern is provided in a file
+        :param discard_courses: if True, loop ids are allocated on the yarn but loops and stitches are not kept in
+         the knit graph, so memory is bounded by the last two courses
+        :return: iterator of a Course_View for each row, starting with the 0th course.
+         Each view holds the loops created by the row and their stitch-edges,
+         loops slipped from the prior row belong to the view of the row that created them
+        """
+        self._discard_courses = discard_courses
+        self._parse(pattern, patternIsFile)
+        for row in self._compile_courses(starting_width, row_count):
+            yield Course_View.from_batch(row, *self._last_batch)
+
+    def _parse(self, pattern: str, patternIsFile: bool):
+        """
+        Parses the pattern and organizes its course instructions by course id
+        :param pattern: the pattern as a string or in a file
+        :param patternIsFile: True if pattern is provided in a file
+        """
+        self._symbol_table = Symbol_Table()  # closures of the last parse are discarded with its table
+        self.course_ids_to_operations = Course_Table()
+        # kernels, programs and records are keyed by the id of templates of the last parse, which may be reused once it is freed
+        self._course_kernels = {}
+        self._course_programs = {}
+        self._template_records = {}
+        if self._stream_statements:
+            self.parse_results = []
+            self._organize_courses(self._parser.interpret_iter(pattern, patternIsFile, self._symbol_table))
+        else:
+            self.parse_results = self._parser.interpret(pattern, patternIsFile, self._symbol_table)
+            self._organize_courses(self.parse_results)
+        self._parsed_variables = self._variables()
+
+    def _compile_courses(self, starting_width: int, row_count: int) -> Iterator[int]:
+        """
+        Compiles the parsed pattern, see compile()
+        :param row_count: the number of rows to knit before completing
+        :param starting_width: the number of loops used to create the 0th course
+        :return: iterator of the row of each course after the course is closed, starting with the 0th course
+        """
+        self._starting_width = starting_width
         self.populate_0th_course(starting_width)
+        self._record_row_start()
+        yield self.current_row
+        yield from self._compile_rows(row_count)
+
+    def _compile_rows(self, row_count: int) -> Iterator[int]:
+        """
+        Compiles the rows after the current row
+        :param row_count: the number of rows to knit before completing
+        :return: iterator of the row of each course after the course is closed
+        """
+        course_count = len(self.course_ids_to_operations)  # courses 1 to course_count are defined
         while self.current_row < row_count:
-            for course_id in sorted(self.course_ids_to_operations):
-                self._increment_current_row()
-                assert self.current_row % course_id == 0
-                course_instructions = self.course_ids_to_operations[course_id]
-                while len(self.loop_ids_consumed_by_current_course) < len(self.last_course_loop_ids):
-                    for instruction in course_instructions:
-                        self._process_instruction(instruction)
-                        if len(self.loop_ids_consumed_by_current_course) == len(self.last_course_loop_ids):
-                            break
-                self.last_course_loop_ids = self.cur_course_loop_ids
-                self.cur_course_loop_ids = []
-                self.loop_ids_consumed_by_current_course = set()
-                if self.current_row == row_count:
-                    break
+            course_id = self.current_row % course_count + 1
+            self._increment_current_row()
+            assert self.current_row % course_id == 0
+            course_instructions = self.course_ids_to_operations[course_id]
+            if len(self._course_records) > 0:
+                self._course_records[-1].signature, self._course_records[-1].reads, self._course_records[-1].writes = \
+                    self._template_record(course_instructions)
+            kernel_key = (id(course_instructions), len(self.last_course_loop_ids), self._working_ws)
+            kernel = self._course_kernels.get(kernel_key)
+            if kernel is not None:  # this course was already compiled with the same template, width and side
+                self.last_course_loop_ids = kernel.replay(self._add_course, self.last_course_loop_ids)
+            else:
+                program_key = (id(course_instructions), self._working_ws)
+                if program_key not in self._course_programs:
+                    self._course_programs[program_key] = lower_course(course_instructions, self._working_ws)
+                self._run_program(self._course_programs[program_key])
+                if is_closure_free(course_instructions):
+                    self._course_kernels[kernel_key] = self._record_kernel()
+                self._close_course()
+            self._compiled_rows = self.current_row
+            self._record_row_start()
+            yield self.current_row
+
+    def _variables(self) -> Dict[str, int]:
+        """
+        :return: the numerical variables in the symbol table, other than the current row
+        """
+        return {key: value for key, value in self._symbol_table.snapshot().items()
+                if type(value) is int and key != "current_row"}
+
+    def _template_record(self, course_instructions: List[tuple]) -> Tuple[tuple, FrozenSet[str], FrozenSet[str]]:
+        """
+        :param course_instructions: a course template of the parsed pattern
+        :return: the signature of the template and the variables it reads and assigns
+        """
+        template_record = self._template_records.get(id(course_instructions))
+        if template_record is None:
+            template_record = (template_signature(course_instructions), *template_variables(course_instructions))
+            self._template_records[id(course_instructions)] = template_record
+        return template_record
+
+    def _record_row_start(self):
+        """
+        Records the state at the start of the next row so that a later recompile() can resume from it
+        """
+        if self._discard_courses:
+            return
+        self._course_records.append(Course_Record(self.current_row + 1, None, frozenset(), frozenset(), self._variables(),
+                                                  self.knit_graph.last_loop_id, self.last_course_loop_ids))
+
+    def recompile(self, starting_width: int, row_count: int, pattern: str, patternIsFile: bool = False) -> Knit_Graph:
+        """
+        Compiles an edited pattern into the knit graph of the last compile, keeping the rows that the edit cannot change.
+        A row is kept if it and every row before it were compiled from a course template with the same structure,
+         and none of them read or assign a variable whose value after parsing changed.
+        The knit graph is truncated after the last kept row and the remaining rows are compiled from the recorded state
+        :param row_count: the number of rows to knit before completing, pattern may repeat or be incomplete
+        :param starting_width: the number of loops used to create the 0th course
+        :param pattern: the edited pattern as a string or in a file
+        :param patternIsFile: True if pattern is provided in a file
+        :return: the knit graph of the edited pattern
+        """
+        records = self._course_records
+        compiled_rows = self._compiled_rows if starting_width == self._starting_width else 0
+        parsed_variables = self._parsed_variables
+        self._discard_courses = False
+        self._parse(pattern, patternIsFile)
+        if len(records) == 0 or compiled_rows == 0:  # nothing to reuse
+            self._start_graph(Knit_Graph(type(self.knit_graph.graph)(), self.knit_graph.checked))
+            for _ in self._compile_courses(starting_width, row_count):
+                pass
+            return self.knit_graph
+        changed_variables = {key: self._parsed_variables.get(key)
+                             for key in set(self._parsed_variables) | set(parsed_variables)
+                             if self._parsed_variables.get(key) != parsed_variables.get(key)}
+        course_count = len(self.course_ids_to_operations)
+        row = 1
+        while row <= min(compiled_rows, row_count):
+            signature, reads, writes = self._template_record(self.course_ids_to_operations[(row - 1) % course_count + 1])
+            record = records[row - 1]
+            if signature != record.signature or any(key in changed_variables for key in reads | writes):
+                break
+            row += 1
+        record = records[row - 1]
+        self.knit_graph.truncate(record.last_loop_id)
+        self._course_records = records[0: row]
+        self._compiled_rows = row - 1
+        self.last_course_loop_ids = [*record.prior_loop_ids]
+        self.current_row = row - 1
+        symbol_table = self._symbol_table
+        state = {key: value for key, value in symbol_table.snapshot().items() if type(value) is not int}
+        state.update(record.variables)
+        for key, value in changed_variables.items():
+            if value is None:
+                state.pop(key, None)
+            else:
+                state[key] = value
+        state["current_row"] = self.current_row
+        symbol_table.restore(state)
+        for _ in self._compile_rows(row_count):
+            pass
         return self.knit_graph
 
     def populate_0th_course(self, starting_width: int):
@@ -75,164 +298,254 @@ class Knitspeak_Compiler:
         Adds loop_ids in yarn-wise order to self.last_course_loop_ids
         :param starting_width: the number of loops to create
         """
-        for i in range(0, starting_width):
-            loop_id, loop = self.yarn.add_loop_to_end()
-            self.knit_graph.add_loop(loop)
-            self.last_course_loop_ids.append(loop_id)
+        self.last_course_loop_ids.extend(self._add_course([[] for _ in range(0, starting_width)]))
+
+    def _add_course(self, parent_ids: List[List[int]], pull_directions: Optional[List[Pull_Direction]] = None,
+                    depths: Optional[List[int]] = None, parent_offsets: Optional[List[List[int]]] = None) -> List[int]:
+        """
+        Adds a batch of loops to the end of the yarn, see Knit_Graph.add_course().
+        When discarding courses only the loop ids are allocated
+        :param parent_ids: for each new loop, the ids of its parent loops in stack order
+        :param pull_directions: for each new loop, the direction it is pulled through its parents
+        :param depths: for each new loop, the crossing depth of its stitches
+        :param parent_offsets: for each new loop, the offset to each parent loop
+        :return: the ids of the new loops in yarn-wise order
+        """
+        if not self._discard_courses:
+            new_loop_ids = self.knit_graph.add_course(self.yarn, parent_ids, pull_directions, depths, parent_offsets)
+        else:
+            first_id = 0 if self.yarn.last_loop_id is None else self.knit_graph.last_loop_id + 1
+            new_loop_ids = [*range(first_id, first_id + len(parent_ids))]
+            if len(new_loop_ids) > 0:
+                self.yarn.last_loop_id = new_loop_ids[-1]
+                self.knit_graph.last_loop_id = new_loop_ids[-1]
+        self._last_batch = (new_loop_ids, parent_ids, pull_directions, depths, parent_offsets)
+        return new_loop_ids
 
-    def _organize_courses(self):
+    def _record_kernel(self) -> Course_Kernel:
+        """
+        :return: the kernel of the current course before it is closed
+        """
+        return Course_Kernel.record(self.last_course_loop_ids, self.cur_course_loop_ids, self._new_loop_positions,
+                                    self._new_loop_parent_ids, self._new_loop_pull_directions, self._new_loop_depths,
+                                    self._new_loop_parent_offsets)
+
+    def _close_course(self):
+        """
+        Adds the loops and stitches of the current course to the knit graph in one batch
+         and makes the current course the last course
+        """
+        new_loop_ids = self._add_course(self._new_loop_parent_ids, self._new_loop_pull_directions,
+                                        self._new_loop_depths, self._new_loop_parent_offsets)
+        for position, loop_id in zip(self._new_loop_positions, new_loop_ids):
+            self.cur_course_loop_ids[position] = loop_id
+        self.last_course_loop_ids = self.cur_course_loop_ids
+        self.cur_course_loop_ids = []
+        self.loop_ids_consumed_by_current_course = set()
+        self._new_loop_positions = []
+        self._new_loop_parent_ids = []
+        self._new_loop_pull_directions = []
+        self._new_loop_depths = []
+        self._new_loop_parent_offsets = []
+
+    def _organize_courses(self, parse_results: Iterable[Dict[str, list]]):
         """
         takes the parser results and organizes the course instructions by their course ids.
         raises two possible errors
          If a course is defined more than once, raise an error documenting the course_id
          If a course between 1 and the maximum course is not defined, raise an error documenting the course_id
         Note that all closures in these ids are executed before the row operations (may cause implementation confusion)
+        :param parse_results: the course statements in pattern order, organized as they are iterated
         """
-        for instructions in self.parse_results:
+        course_table = self.course_ids_to_operations
+        for instructions in parse_results:
             course_ids = instructions["courseIds"]
             course_instructions = instructions["stitch-operations"]
+            literal_courses = []  # literal course ids repeated in a statement are defined once, like the parser's list of ids
             for course_id in course_ids:
                 if isinstance(course_id, Num_Closure):
                     course_id = course_id.to_int()  # converts any variable numbers to their current state
-                    assert course_id not in self.course_ids_to_operations, f"KnitSpeak Error: Course {course_id} is defined more than once"
-                    self.course_ids_to_operations[course_id] = course_instructions
+                    defined_course = course_table.add(range(course_id, course_id + 1), course_instructions)
                 elif isinstance(course_id, Iterator_Closure):  # closes iteration over variable numbers
-                    sub_courses = course_id.to_int_list()
-                    for sub_id in sub_courses:
-                        assert sub_id not in self.course_ids_to_operations, f"KnitSpeak Error: Course {sub_id} is defined more than once"
-                        self.course_ids_to_operations[sub_id] = course_instructions
+                    defined_course = course_table.add(course_id.to_range(), course_instructions)
+                elif type(course_id) is range:
+                    literal_courses.append(course_id)
+                    continue
                 else:  # course_id is integer
-                    assert course_id not in self.course_ids_to_operations, f"KnitSpeak Error: Course {course_id} is defined more than once"
-                    self.course_ids_to_operations[course_id] = course_instructions
-
-        max_course = max(*self.course_ids_to_operations)
-        if "all_rs" in self._parser.parser.symbolTable:
-            course_instructions = self.course_ids_to_operations[1]
-            for course_id in range(3, max_course + 1, 2):
-                if course_id not in self.course_ids_to_operations:
-                    self.course_ids_to_operations[course_id] = course_instructions
-                else:
-                    print(f"KnitSpeak Warning: course {course_id} overrides rs-instructions")
-        if "all_ws" in self._parser.parser.symbolTable:
-            course_instructions = self.course_ids_to_operations[2]
-            for course_id in range(4, max_course + 1, 2):
-                if course_id not in self.course_ids_to_operations:
-                    self.course_ids_to_operations[course_id] = course_instructions
-                else:
-                    print(f"KnitSpeak Warning: course {course_id} overrides ws-instructions")
-
-        for course_id in range(1, max_course + 1):
-            assert course_id in self.course_ids_to_operations, f"KnitSpeak Error: Course {course_id} is undefined"
-
-        if max_course % 2 == 1 and "all_ws" in self._parser.parser.symbolTable:  # ends on rs row
-            self.course_ids_to_operations[max_course + 1] = self.course_ids_to_operations[2]
-
-    def _process_instruction(self, instruction: Tuple[Union[tuple, Stitch_Definition, Cable_Definition, list],
-                                                      Tuple[bool, int]]):
-        """
-        :param instruction: A tuple with the knitting instructions and information about how to repeat them
-        instruction[0] can be a stitch definition, cable definition, or a list of instruction tuples
-        instruction[1] is a tuple with a boolean and an int.
-         If the boolean is true, then the integer represents the number of times to repeat the instructions
-         If the boolean is false, then the integer represents the number of loops left after executing the instructions
-        :return:
-        """
-        action = instruction[0]
-        is_stitch = isinstance(action, Stitch_Definition)
-        is_cable = isinstance(action, Cable_Definition)
-        is_list = type(action) is list
-        static_repeats = instruction[1][0]
-        repeats = 1
-        if static_repeats:
-            repeats = instruction[1][1]
-            if isinstance(repeats, Num_Closure):
-                repeats = repeats.to_int()
-        remaining_loops = 0
-        if not static_repeats:
-            remaining_loops = instruction[1][1]
-            if isinstance(remaining_loops, Num_Closure):
-                remaining_loops = remaining_loops.to_int()
-
-        def execute_instructions():
-            """
-            Executes the action according to its type
-            """
-            if is_stitch:
-                self._process_stitch(action)
-            elif is_cable:
-                self._process_cable(action)
-            elif is_list:
-                self._process_list(action)
-            else:
-                self._process_instruction(action)
+                    literal_courses.append(range(course_id, course_id + 1))
+                    continue
+                assert defined_course is None, f"KnitSpeak Error: Course {defined_course} is defined more than once"
+            defined_course = course_table.add_statement(literal_courses, course_instructions)
+            assert defined_course is None, f"KnitSpeak Error: Course {defined_course} is defined more than once"
+
+        max_course = course_table.max_course
+        if "all_rs" in self._symbol_table:
+            course_table.set_side_default(3, course_table[1])
+            for first, last in course_table.overridden_intervals(1):
+                self._warn_override(first, last, "rs")
+        if "all_ws" in self._symbol_table:
+            course_table.set_side_default(4, course_table[2])
+            for first, last in course_table.overridden_intervals(0):
+                self._warn_override(first, last, "ws")
 
-        if not static_repeats:  # need to iterate until remaining loops is left
-            while (len(self.last_course_loop_ids) - len(self.loop_ids_consumed_by_current_course)) > remaining_loops:
-                execute_instructions()
-            assert remaining_loops == (len(self.last_course_loop_ids) - len(self.loop_ids_consumed_by_current_course))
+        undefined_course = course_table.first_undefined(max_course)
+        assert undefined_course is None, f"KnitSpeak Error: Course {undefined_course} is undefined"
+
+        if max_course % 2 == 1 and "all_ws" in self._symbol_table:  # ends on rs row
+            course_table.add(range(max_course + 1, max_course + 2), course_table[2])
+
+    @staticmethod
+    def _warn_override(first: int, last: int, side: str):
+        """
+        Warns that explicitly defined courses override the instructions of all rows of a side
+        :param first: the first overriding course
+        :param last: the last overriding course
+        :param side: "rs" or "ws"
+        """
+        if first == last:
+            print(f"KnitSpeak Warning: course {first} overrides {side}-instructions")
         else:
-            for _ in range(0, repeats):
-                execute_instructions()
+            print(f"KnitSpeak Warning: courses {first} to {last} override {side}-instructions")
 
-    def _process_stitch(self, stitch_def: Stitch_Definition, flipped_by_cable=False):
+    def _add_stitch_block(self, program: Course_Program, body: List[int], passes: int) -> bool:
         """
-        Uses a stitch definition and compiler state to generate a new loop and connect it to the prior course.
-        May throw two compiler errors.
-         if there is no loop at the parent offsets of the stitch, then throw an error reporting the missing index
+        Adds the stitches of a repeated block to the current course in one batch.
+        Does nothing if any stitch would reach outside the last course or reuse a loop,
+         so that the block can be executed one stitch at a time to report the error
+        :param program: the program the block is from
+        :param body: the stitch indices of one pass of the block
+        :param passes: the number of times to repeat the block
+        :return: True if the stitches were added
+        """
+        last_course = self.last_course_loop_ids
+        width = len(body)  # loops added to the current course by each pass
+        first_index = len(self.cur_course_loop_ids)
+        base = (len(last_course) - 1) - first_index  # the index in the last course across from the first stitch
+        stitches = [program.stitches[stitch] for stitch in body]
+        relative_indices = [tuple(offset - position for offset in stitch[1]) for position, stitch in enumerate(stitches)]
+        pass_indices = [index for indices in relative_indices for index in indices]
+        low = base - (passes - 1) * width + min(pass_indices)
+        high = base + max(pass_indices)
+        if low < 0 or high >= len(last_course) or len(set(pass_indices)) != len(pass_indices):
+            return False
+        for shift in range(width, min(passes * width, high - low + 1), width):  # later passes cannot reuse loops
+            if not set(pass_indices).isdisjoint(index - shift for index in pass_indices):
+                return False
+        if len(pass_indices) * passes != high - low + 1:  # the block skips loops, work it one stitch at a time
+            return False
+        used_loops = last_course[low: high + 1]
+        if not self.loop_ids_consumed_by_current_course.isdisjoint(used_loops):
+            return False
+        self.loop_ids_consumed_by_current_course.update(used_loops)
+        starts = range(base, base - passes * width, -width)
+        new_loops = [position for position, stitch in enumerate(stitches) if stitch[0] == 1]
+        self._new_loop_positions.extend([first_index + course_pass * width + position
+                                         for course_pass in range(0, passes) for position in new_loops])
+        self._new_loop_parent_ids.extend([[last_course[start + index] for index in relative_indices[position]]
+                                          for start in starts for position in new_loops])
+        self._new_loop_pull_directions.extend([stitches[position][2] for position in new_loops] * passes)
+        self._new_loop_depths.extend([stitches[position][3] for position in new_loops] * passes)
+        self._new_loop_parent_offsets.extend([stitches[position][1] for position in new_loops] * passes)
+        if len(new_loops) == width:
+            self.cur_course_loop_ids.extend([-1] * (width * passes))
+        else:  # slipped loops stay in the course
+            self.cur_course_loop_ids.extend([-1 if stitch[0] == 1 else last_course[start + relative_indices[position][0]]
+                                             for start in starts for position, stitch in enumerate(stitches)])
+        return True
+
+    def _run_program(self, program: Course_Program):
+        """
+        Executes the course program until every loop in the last course is consumed,
+         repeating the program from the start if loops remain at its end.
+        May throw compiler errors:
+         if there is no loop at the parent offsets of a stitch, then throw an error reporting the missing index
          if a parent loop has already been consumed, then throw an error reporting the misused parent loop
-        :param flipped_by_cable: if True, implies that this stitch came from a cable and has been flipped appropriately
-        :param stitch_def: the stitch definition used to connect the new loop
-        """
-        if self._working_ws and not flipped_by_cable:  # flips stitches following hand-knitting conventions
-            stitch_def = stitch_def.copy_and_flip()
-        course_index = len(self.cur_course_loop_ids)
-        prior_course_index = (len(self.last_course_loop_ids) - 1) - course_index
-        if stitch_def.child_loops == 1:
-            # Todo: Implement processing the stitch into the knitgraph
-            #  add a new loop to the end of  self.yarn and add it to the self.knitgraph
-            #  iterate over the stitch's parent offsets in their stack order
-            #   the index of the parent_loop in self.last_course_loop_ids will be the prior_course_index plus the offset
-            #   mark the parent_loop as "consumed" by putting it in the loop_ids_consumed_by_current_course set
-            #   then connect that parent loop to the new child_loop given the stitch information in the stitch_def
-            #  add the newly created loop to the end of self.cur_course_loop_ids
-            loop_id, loop = self.yarn.add_loop_to_end()
-            self.knit_graph.add_loop(loop)
-            for stack_position, parent_offset in enumerate(stitch_def.offset_to_parent_loops):
-                parent_index = prior_course_index + parent_offset
-                assert 0 <= parent_index < len(self.last_course_loop_ids), f"Knitspeak Error: Cannot find a loop at index {parent_index}"
-                parent_loop_id = self.last_course_loop_ids[parent_index]
-                assert parent_loop_id not in self.loop_ids_consumed_by_current_course, \
-                    f"Knitspeak Error: Loop {parent_loop_id} has already been used"
-                self.loop_ids_consumed_by_current_course.add(parent_loop_id)
-                self.knit_graph.connect_loops(parent_loop_id, loop_id, stitch_def.pull_direction,
-                                              stack_position, stitch_def.cabling_depth, parent_offset)
-            self.cur_course_loop_ids.append(loop_id)
-        else:  # slip statement
-            assert len(stitch_def.offset_to_parent_loops) == 1, "Cannot slip multiple loops"
-            for stack_position, parent_offset in enumerate(stitch_def.offset_to_parent_loops):
-                parent_index = (len(self.last_course_loop_ids) - 1) - course_index + parent_offset
-                assert 0 <= parent_index < len(self.last_course_loop_ids), f"Knitspeak Error: Cannot find a loop at index {parent_index}"
-                parent_loop_id = self.last_course_loop_ids[parent_index]
-                assert parent_loop_id not in self.loop_ids_consumed_by_current_course, \
-                    f"Knitspeak Error: Loop {parent_loop_id} has already been used"
-                self.loop_ids_consumed_by_current_course.add(parent_loop_id)
-                self.cur_course_loop_ids.append(parent_loop_id)
-
-    def _process_cable(self, cable_def: Cable_Definition):
-        """
-        Uses a cable definition and compiler state to generate and connect a cable
-        :param cable_def: the cable definition used to connect the cable into the knitgraph
-        """
-        if self._working_ws:  # flips cable by hand-knitting convention
-            cable_def = cable_def.copy_and_flip()
-        stitch_definitions = cable_def.stitch_definitions()
-        for stitch_definition in stitch_definitions:
-            self._process_stitch(stitch_definition, flipped_by_cable=True)
-
-    def _process_list(self, action: List[tuple]):
-        """
-        Processes actions in a list of actions
-        :param action: the list of actions
-        """
-        for sub_action in action:
-            self._process_instruction(sub_action)
+        :param program: the program of the course template for the current side
+        """
+        code = program.code
+        stitches = program.stitches
+        slots = program.slots
+        last_course = self.last_course_loop_ids
+        last_width = len(last_course)
+        cur_course = self.cur_course_loop_ids
+        consumed = self.loop_ids_consumed_by_current_course
+        new_positions = self._new_loop_positions
+        new_parent_ids = self._new_loop_parent_ids
+        new_pull_directions = self._new_loop_pull_directions
+        new_depths = self._new_loop_depths
+        new_parent_offsets = self._new_loop_parent_offsets
+        counted_blocks = program.counted_blocks
+        loop_stack = []  # repeats left or loops to leave for each open repeat
+        code_length = len(code)
+        while len(consumed) < last_width:
+            pc = 0
+            while pc < code_length:
+                op = code[pc]
+                if op == OP_STITCH:
+                    child_loops, offsets, pull_direction, depth = stitches[code[pc + 1]]
+                    for _ in range(0, code[pc + 2]):
+                        course_index = len(cur_course)
+                        prior_course_index = (last_width - 1) - course_index
+                        if child_loops == 1:
+                            # the new loop is created when the course is closed, it is marked by -1 until then
+                            parent_ids = []
+                            for parent_offset in offsets:
+                                parent_index = prior_course_index + parent_offset
+                                assert 0 <= parent_index < last_width, f"Knitspeak Error: Cannot find a loop at index {parent_index}"
+                                parent_loop_id = last_course[parent_index]
+                                assert parent_loop_id not in consumed, f"Knitspeak Error: Loop {parent_loop_id} has already been used"
+                                consumed.add(parent_loop_id)
+                                parent_ids.append(parent_loop_id)
+                            new_positions.append(course_index)
+                            new_parent_ids.append(parent_ids)
+                            new_pull_directions.append(pull_direction)
+                            new_depths.append(depth)
+                            new_parent_offsets.append(offsets)
+                            cur_course.append(-1)
+                        else:  # slip statement
+                            assert len(offsets) == 1, "Cannot slip multiple loops"
+                            parent_index = prior_course_index + offsets[0]
+                            assert 0 <= parent_index < last_width, f"Knitspeak Error: Cannot find a loop at index {parent_index}"
+                            parent_loop_id = last_course[parent_index]
+                            assert parent_loop_id not in consumed, f"Knitspeak Error: Loop {parent_loop_id} has already been used"
+                            consumed.add(parent_loop_id)
+                            cur_course.append(parent_loop_id)
+                    pc += 3
+                elif op == OP_REPEAT:
+                    repeats = code[pc + 2] if code[pc + 1] == NO_SLOT else slots[code[pc + 1]].to_int()
+                    if repeats > 0:
+                        loop_stack.append(repeats)
+                        pc += 4
+                    else:
+                        pc = code[pc + 3]
+                elif op == OP_END_REPEAT:
+                    loop_stack[-1] -= 1
+                    if loop_stack[-1] > 0:
+                        pc = code[pc + 1]
+                    else:
+                        loop_stack.pop()
+                        pc += 2
+                elif op == OP_UNTIL:
+                    remaining_loops = code[pc + 2] if code[pc + 1] == NO_SLOT else slots[code[pc + 1]].to_int()
+                    if pc in counted_blocks and last_width - len(consumed) > remaining_loops:
+                        loops_per_pass, body = counted_blocks[pc]
+                        passes, extra_loops = divmod(last_width - len(consumed) - remaining_loops, loops_per_pass)
+                        if extra_loops == 0 and self._add_stitch_block(program, body, passes):
+                            pc = code[pc + 3]
+                            continue
+                    if last_width - len(consumed) > remaining_loops:
+                        loop_stack.append(remaining_loops)
+                        pc += 4
+                    else:
+                        assert remaining_loops == last_width - len(consumed)
+                        pc = code[pc + 3]
+                elif op == OP_END_UNTIL:
+                    if last_width - len(consumed) > loop_stack[-1]:
+                        pc = code[pc + 1]
+                    else:
+                        assert loop_stack.pop() == last_width - len(consumed)
+                        pc += 2
+                else:  # OP_BREAK_IF_DONE
+                    if len(consumed) == last_width:
+                        return
+                    pc += 1
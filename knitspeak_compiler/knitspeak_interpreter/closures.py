@@ -1,22 +1,118 @@
 """"Closures for managing numerical variables in knitspeak"""
 
-from typing import Union, List
+from typing import Union, List, Tuple, FrozenSet
 
 from knitspeak_compiler.knitspeak_interpreter.symbol_table import Symbol_Table
 
 
+def _dependencies_of(value) -> FrozenSet[str]:
+    """
+    :param value: an integer or closure
+    :return: the symbol table entries read to evaluate the value
+    """
+    if isinstance(value, Num_Closure):
+        return value.dependencies
+    return frozenset()
+
+
+def _assigned_variables_of(value) -> FrozenSet[str]:
+    """
+    :param value: an integer or closure
+    :return: the symbol table entries assigned when evaluating the value
+    """
+    if isinstance(value, Num_Closure):
+        return value.assigned_variables
+    return frozenset()
+
+
+def _has_assignment(value) -> bool:
+    """
+    :param value: an integer or closure
+    :return: True if evaluating the value assigns to the symbol table
+    """
+    return isinstance(value, Num_Closure) and value.has_assignment
+
+
+class _Dependency_Cache:
+    """
+    Caches the result of a closure until a symbol table entry it reads changes
+    """
+
+    def __init__(self):
+        self.revision: int = -1  # the symbol table revision at which the cached value was last known to be valid
+        self.versions: Tuple[int, ...] = ()  # the versions of the dependencies when the value was computed
+        self.value = None
+
+    def get(self, symbol_table: Symbol_Table, dependencies: Tuple[str, ...]):
+        """
+        :param symbol_table: the symbol table the closure reads from
+        :param dependencies: the entries the closure reads
+        :return: the cached value or None if a dependency changed since it was computed
+        """
+        if self.revision == symbol_table.revision:
+            return self.value
+        if self.value is not None and self.versions == tuple(symbol_table.version(key) for key in dependencies):
+            self.revision = symbol_table.revision
+            return self.value
+        return None
+
+    def set(self, symbol_table: Symbol_Table, dependencies: Tuple[str, ...], value):
+        """
+        :param symbol_table: the symbol table the closure reads from
+        :param dependencies: the entries the closure reads
+        :param value: the value computed at the current versions of the dependencies
+        """
+        self.revision = symbol_table.revision
+        self.versions = tuple(symbol_table.version(key) for key in dependencies)
+        self.value = value
+
+
 class Num_Closure:
     """
-    class for closures of numerical variables in knit speak
+    class for closures of numerical variables in knit speak.
+    Results are cached until a symbol table entry that the closure reads changes
     """
 
     def __init__(self, symbol_table: Symbol_Table):
         self.symbol_table = symbol_table
+        self._cache: _Dependency_Cache = _Dependency_Cache()
+        self._dependency_keys: Tuple[str, ...] = ()
+
+    @property
+    def dependencies(self) -> FrozenSet[str]:
+        """
+        :return: the symbol table entries read to evaluate this closure
+        """
+        return frozenset()
+
+    @property
+    def assigned_variables(self) -> FrozenSet[str]:
+        """
+        :return: the symbol table entries assigned when evaluating this closure
+        """
+        return frozenset()
+
+    @property
+    def has_assignment(self) -> bool:
+        """
+        :return: True if evaluating the closure assigns to the symbol table, such closures are never cached
+        """
+        return False
 
     def to_int(self) -> int:
         """
         :return: the integer at the current knit speak context
         """
+        value = self._cache.get(self.symbol_table, self._dependency_keys)
+        if value is None:
+            value = self._evaluate()
+            self._cache.set(self.symbol_table, self._dependency_keys, value)
+        return value
+
+    def _evaluate(self) -> int:
+        """
+        :return: the integer at the current knit speak context, computed without the cache
+        """
         raise NotImplementedError
 
     def __repr__(self):
@@ -27,6 +123,14 @@ class Current_Row_Closure(Num_Closure):
     """A closure subtype for accessing the current row value"""
     def __init__(self, symbol_table: Symbol_Table):
         super().__init__(symbol_table)
+        self._dependency_keys = ("current_row",)
+
+    @property
+    def dependencies(self) -> FrozenSet[str]:
+        """
+        :return: the current row entry
+        """
+        return frozenset(self._dependency_keys)
 
     def to_int(self) -> int:
         """
@@ -48,9 +152,31 @@ class Num_Assignment_Closure(Num_Closure):
         self.assignment = assignment
         self.var_name = var_name
 
+    @property
+    def dependencies(self) -> FrozenSet[str]:
+        """
+        :return: the entries read by the assigned expression
+        """
+        return _dependencies_of(self.assignment)
+
+    @property
+    def assigned_variables(self) -> FrozenSet[str]:
+        """
+        :return: the assigned variable and any entries assigned by the assigned expression
+        """
+        return frozenset([self.var_name]) | _assigned_variables_of(self.assignment)
+
+    @property
+    def has_assignment(self) -> bool:
+        """
+        :return: True
+        """
+        return True
+
     def to_int(self) -> int:
         """
-        assigns the integer result of this assignment to the symbol table
+        assigns the integer result of this assignment to the symbol table.
+        The assignment is never cached, but the assigned expression may be
         :return: the integer result of assignment
         """
         if isinstance(self.assignment, Num_Closure):
@@ -73,8 +199,16 @@ class Num_Variable_Closure(Num_Closure):
     def __init__(self, symbol_table: Symbol_Table, var_name: str):
         super().__init__(symbol_table)
         self.var_name = var_name
+        self._dependency_keys = (var_name,)
 
-    def to_int(self) -> int:
+    @property
+    def dependencies(self) -> FrozenSet[str]:
+        """
+        :return: the variable's entry
+        """
+        return frozenset(self._dependency_keys)
+
+    def _evaluate(self) -> int:
         """
         :return: the integer assigned to that var_name
         """
@@ -95,8 +229,40 @@ class Operation_Closure(Num_Closure):
         self.first_num = first_num
         self.op = op
         self.second_num = second_num
+        self._dependency_keys = tuple(sorted(self.dependencies))
+        if self.has_assignment:
+            self._dependency_keys = None  # assignments must run every time the operation is evaluated
+
+    @property
+    def dependencies(self) -> FrozenSet[str]:
+        """
+        :return: the entries read by either operand
+        """
+        return _dependencies_of(self.first_num) | _dependencies_of(self.second_num)
+
+    @property
+    def assigned_variables(self) -> FrozenSet[str]:
+        """
+        :return: the entries assigned by either operand
+        """
+        return _assigned_variables_of(self.first_num) | _assigned_variables_of(self.second_num)
+
+    @property
+    def has_assignment(self) -> bool:
+        """
+        :return: True if either operand assigns to the symbol table
+        """
+        return _has_assignment(self.first_num) or _has_assignment(self.second_num)
 
     def to_int(self) -> int:
+        """
+        :return: the integer result at the current context of this operation
+        """
+        if self._dependency_keys is None:
+            return self._evaluate()
+        return super().to_int()
+
+    def _evaluate(self) -> int:
         """
         :return: the integer result at the current context of this operation
         """
@@ -126,6 +292,24 @@ class Operation_Closure(Num_Closure):
         return f"{self.first_num} {self.op} {self.second_num}"
 
 
+def side_range(first: int, last: int, include_rs: bool, include_ws: bool) -> range:
+    """
+    :param first: the first course
+    :param last: the last course
+    :param include_rs: True if odd (rs) courses are included
+    :param include_ws: True if even (ws) courses are included
+    :return: the courses from first to last on the included sides
+    """
+    if include_rs and include_ws:
+        return range(first, last + 1)
+    if include_rs == include_ws:
+        return range(0)
+    side = 1 if include_rs else 0
+    if first % 2 != side:
+        first += 1
+    return range(first, last + 1, 2)
+
+
 class Iterator_Closure:
     """
     A closure class to get interator over set of course ids at given knit speak context
@@ -137,12 +321,34 @@ class Iterator_Closure:
         self.end_num = end_num
         self.start_num = start_num
         self.symbol_table = symbol_table
+        self._cache: _Dependency_Cache = _Dependency_Cache()
+        self._dependency_keys: Tuple[str, ...] = tuple(sorted(_dependencies_of(start_num) | _dependencies_of(end_num)))
 
     def to_int_list(self) -> List[int]:
         """
-        Start and End closures will be executed
+        Start and End closures will be executed.
         :return: the list of integers between start and end considering rs/ws restrictions
         """
+        return [*self.to_range()]
+
+    def to_range(self) -> range:
+        """
+        Start and End closures will be executed.
+        The range is cached until a symbol table entry read by start or end changes
+        :return: the range of integers between start and end considering rs/ws restrictions
+        """
+        if _has_assignment(self.start_num) or _has_assignment(self.end_num):
+            return self._evaluate()
+        courses = self._cache.get(self.symbol_table, self._dependency_keys)
+        if courses is None:
+            courses = self._evaluate()
+            self._cache.set(self.symbol_table, self._dependency_keys, courses)
+        return courses
+
+    def _evaluate(self) -> range:
+        """
+        :return: the range of integers between start and end considering rs/ws restrictions, computed without the cache
+        """
         if isinstance(self.start_num, Num_Closure):
             first = self.start_num.to_int()
         else:
@@ -151,13 +357,7 @@ class Iterator_Closure:
             second = self.end_num.to_int()
         else:
             second = self.end_num
-        ints = []
-        for i in range(first, second + 1):
-            if i % 2 == 1 and self.include_rs:
-                ints.append(i)
-            elif i % 2 == 0 and self.include_ws:
-                ints.append(i)
-        return ints
+        return side_range(first, second, self.include_rs, self.include_ws)
 
     def __str__(self):
         return f"from {self.start_num} to {self.end_num}"
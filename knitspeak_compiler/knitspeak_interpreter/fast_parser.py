@@ -0,0 +1,293 @@
+"""A hand-written parser for the common subset of knitspeak that builds the same results as the parglare actions"""
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+from knitspeak_compiler.knitspeak_interpreter.closures import side_range
+from knitspeak_compiler.knitspeak_interpreter.symbol_table import Symbol_Table
+
+# skips the parser's whitespace and matches a number with an optional suffix, an identifier or a punctuation mark
+_TOKEN = re.compile(r"[ \t\r\n]*(?:(?P<number>[0-9]+)(?:st|nd|rd|th)?|(?P<word>[a-zA-Z][a-zA-Z0-9_|]*)|(?P<mark>[\[\],.]))")
+_END = re.compile(r"[ \t\r\n]*\Z")
+_COURSE_TYPES = {"row", "rows"}
+_SIDES = {"rs", "ws"}
+# words the grammar reads as keywords, any other word in a stitch position is a stitch id
+_KEYWORDS = {"flipped", "all", "from", "to", "last", "st", "sts", "end", "and", "currow"}
+
+
+class _Unsupported(Exception):
+    """
+    Raised when a pattern uses knitspeak outside the subset, the pattern is then parsed by the parglare grammar
+    """
+
+
+class _Fast_Parser:
+    """
+    A recursive descent parser of the grammar rules for course statements with literal course ids and repeats.
+    Results are built like the actions in knitspeak_actions, see fast_parse()
+    ...
+
+    Attributes
+    ----------
+    tokens: List[Tuple[str, str]]
+        the kind and text of each token of the pattern
+    position: int
+        the index of the next token
+    symbol_table: Symbol_Table
+        the symbol table that stitch ids are read from
+    side_courses: List[Tuple[str, List[int]]]
+        the "all_rs" and "all_ws" entries to add to the symbol table in order if the whole pattern is parsed
+    """
+
+    def __init__(self, pattern: str, symbol_table: Symbol_Table):
+        """
+        :param pattern: the knitspeak pattern
+        :param symbol_table: the symbol table that stitch ids are read from
+        """
+        self.tokens: List[Tuple[str, str]] = _tokenize(pattern)
+        self.position: int = 0
+        self.symbol_table: Symbol_Table = symbol_table
+        self.side_courses: List[Tuple[str, List[int]]] = []
+
+    def _peek(self) -> Tuple[str, str]:
+        """
+        :return: the kind and text of the next token, ("", "") at the end of the pattern
+        """
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return "", ""
+
+    def _next(self) -> Tuple[str, str]:
+        """
+        :return: the kind and text of the next token, consumed
+        """
+        token = self._peek()
+        if token[0] == "":
+            raise _Unsupported()
+        self.position += 1
+        return token
+
+    def _expect(self, text: str):
+        """
+        Consumes the next token if it is the given keyword or mark
+        :param text: the expected keyword or mark
+        """
+        if self._next()[1] != text:
+            raise _Unsupported()
+
+    def _list_sep(self) -> bool:
+        """
+        list_sep: "," "and" | "," | "and";
+        :return: True if a separator was consumed
+        """
+        kind, text = self._peek()
+        if text == ",":
+            self.position += 1
+            if self._peek()[0] == "word" and self._peek()[1].lower() == "and":
+                self.position += 1
+            return True
+        elif kind == "word" and text.lower() == "and":
+            self.position += 1
+            return True
+        return False
+
+    def _number(self) -> int:
+        """
+        num_exp: integer num_suffix?;
+        :return: the literal number
+        """
+        kind, text = self._next()
+        if kind != "number":
+            raise _Unsupported()
+        return int(text)
+
+    def courses(self) -> List[Dict[str, list]]:
+        """
+        courses: courses course_statement | course_statement;
+        :return: the course statements of the pattern
+        """
+        statements = [self._course_statement()]
+        while self._peek()[0] != "":
+            statements.append(self._course_statement())
+        return statements
+
+    def _course_statement(self) -> Dict[str, list]:
+        """
+        course_statement: course_ids stitch_statement_List eol;
+        :return: the course ids and stitch operations of the statement
+        """
+        course_ids = self._course_ids()
+        stitch_operations = self._stitch_statement_list()
+        self._expect(".")
+        return {"courseIds": course_ids, "stitch-operations": stitch_operations}
+
+    def _course_ids(self) -> List[Union[int, range]]:
+        """
+        course_ids: course_id_list course_type | "all" side course_type;
+        :return: the course ids of the statement without duplicates
+        """
+        kind, text = self._peek()
+        if kind == "word" and text.lower() == "all":
+            self.position += 1
+            side = self._next()[1].lower()
+            if side not in _SIDES:
+                raise _Unsupported()
+            self._course_type()
+            course_range = [1] if side == "rs" else [2]
+            self.side_courses.append((f"all_{side}", course_range))
+            return course_range
+        course_identifiers = [self._course_id()]
+        while self._list_sep():
+            course_identifiers.append(self._course_id())
+        self._course_type()
+        return [*dict.fromkeys(course_identifiers)]
+
+    def _course_type(self):
+        """
+        Consumes a row course type, rounds are parsed by the grammar to report them
+        """
+        if self._next()[1] not in _COURSE_TYPES:
+            raise _Unsupported()
+
+    def _course_id(self) -> Union[int, range]:
+        """
+        course_id: between_courses | num_exp;
+        between_courses: "from" side? num_exp "to" num_exp;
+        :return: the course id or range of course ids
+        """
+        kind, text = self._peek()
+        if kind != "word":
+            return self._number()
+        if text.lower() != "from":
+            raise _Unsupported()
+        self.position += 1
+        include_rs = True
+        include_ws = True
+        if self._peek()[0] == "word":
+            side = self._next()[1].lower()
+            if side == "ws":
+                include_rs = False
+            elif side == "rs":
+                include_ws = False
+            else:
+                raise _Unsupported()
+        start_num = self._number()
+        self._expect("to")
+        end_num = self._number()
+        return side_range(start_num, end_num, include_rs, include_ws)
+
+    def _stitch_statement_list(self) -> List[tuple]:
+        """
+        stitch_statement_List: stitch_statement_List list_sep single_stitch_statement | single_stitch_statement;
+        :return: the stitch operations of the statement
+        """
+        statements = [self._single_stitch_statement()]
+        while self._list_sep():
+            statements.append(self._single_stitch_statement())
+        return statements
+
+    def _single_stitch_statement(self) -> tuple:
+        """
+        single_stitch_statement: static_stitch_Statement | conditional_stitch_group;
+        conditional_stitch_group: "[" static_stitch_statement_list "]" rep_condition;
+        :return: the stitch operation tuple
+        """
+        if self._peek()[1] != "[":
+            return self._repeated_stitch()
+        self.position += 1
+        group = self._static_stitch_statement_list()
+        self._expect("]")
+        if self._peek()[1] != "to":
+            return group, (True, self._repeats())
+        self.position += 1
+        text = self._next()[1]
+        if text == "end":
+            return group, (False, 0)
+        elif text != "last":
+            raise _Unsupported()
+        kind, text = self._next()
+        if text == "st":
+            return group, (False, 1)
+        elif kind == "number":
+            remaining_sts = int(text)
+            self._expect("sts")
+            return group, (False, remaining_sts)
+        raise _Unsupported()
+
+    def _static_stitch_statement_list(self) -> List[tuple]:
+        """
+        static_stitch_statement_list: static_stitch_statement_list list_sep static_stitch_Statement | static_stitch_Statement;
+        :return: the stitch operations of the group
+        """
+        statements = [self._static_stitch_statement()]
+        while self._list_sep():
+            statements.append(self._static_stitch_statement())
+        return statements
+
+    def _static_stitch_statement(self) -> tuple:
+        """
+        static_stitch_Statement: repeated_Stitch | static_stitch_group;
+        static_stitch_group: "[" static_stitch_statement_list "]" num_exp?;
+        :return: the stitch operation tuple
+        """
+        if self._peek()[1] != "[":
+            return self._repeated_stitch()
+        self.position += 1
+        group = self._static_stitch_statement_list()
+        self._expect("]")
+        return group, (True, self._repeats())
+
+    def _repeated_stitch(self) -> tuple:
+        """
+        repeated_Stitch: stitch num_exp?;
+        :return: the stitch definition and its repeats
+        """
+        kind, text = self._next()
+        if kind != "word" or text.lower() in _KEYWORDS or text not in self.symbol_table:
+            raise _Unsupported()  # undefined stitches are reported by the grammar
+        return self.symbol_table[text], (True, self._repeats())
+
+    def _repeats(self) -> int:
+        """
+        :return: the optional literal number of repeats, defaults to 1
+        """
+        if self._peek()[0] == "number":
+            return self._number()
+        return 1
+
+
+def _tokenize(pattern: str) -> List[Tuple[str, str]]:
+    """
+    :param pattern: the knitspeak pattern
+    :return: the kind ("number", "word" or "mark") and text of each token
+    """
+    tokens = []
+    position = 0
+    while _END.match(pattern, position) is None:
+        match = _TOKEN.match(pattern, position)
+        if match is None:
+            raise _Unsupported()
+        kind = match.lastgroup
+        if kind == "word" and len(tokens) > 0 and tokens[-1][0] == "number" and match.start(kind) == position:
+            raise _Unsupported()  # the grammar does not read keywords that directly follow a number
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+def fast_parse(pattern: str, symbol_table: Symbol_Table) -> Optional[List[Dict[str, list]]]:
+    """
+    Parses patterns with literal course ids, "all rs/ws rows" headers, stitches with literal repeats,
+     repeated stitch groups and groups repeated to the end or the last stitches.
+    Patterns that use anything else, e.g., variables, flipped rows or undefined stitches, are left to the parglare grammar
+    :param pattern: the knitspeak pattern
+    :param symbol_table: the symbol table that stitch ids are read from and "all_rs"/"all_ws" are added to
+    :return: the course statements built like the parglare actions or None if the pattern is outside the subset
+    """
+    try:
+        parser = _Fast_Parser(pattern, symbol_table)
+        results = parser.courses()
+    except _Unsupported:
+        return None
+    for key, course_range in parser.side_courses:  # only a pattern that is fully parsed writes to the table
+        symbol_table[key] = course_range
+    return results
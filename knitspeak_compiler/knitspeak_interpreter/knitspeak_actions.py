@@ -1,7 +1,7 @@
 """actions are called by parglare while parsing a file to reduce the abstract syntax tree as it is processed"""
 from typing import Dict, List, Tuple, Union
 
-from knitspeak_compiler.knitspeak_interpreter.closures import Operation_Closure, Num_Closure, Num_Variable_Closure, Num_Assignment_Closure, Iterator_Closure, Current_Row_Closure
+from knitspeak_compiler.knitspeak_interpreter.closures import Operation_Closure, Num_Closure, Num_Variable_Closure, Num_Assignment_Closure, Iterator_Closure, Current_Row_Closure, side_range
 from parglare import get_collector
 from parglare.parser import Context
 
@@ -11,6 +11,7 @@ from knitspeak_compiler.knitspeak_interpreter.stitch_definitions import Stitch_D
 
 # some boiler plate parglare code
 action = get_collector()
+# the symbol table of the pattern being parsed is passed to the actions as context.extra, see KnitSpeak_Interpreter.interpret()
 
 
 @action
@@ -29,7 +30,7 @@ def course_ids(context, nodes) -> List[Union[int, Num_Closure, Iterator_Closure]
             course_range = [1]
         else:
             course_range = [2]
-        context.parser.symbolTable[f"all_{nodes[1]}"] = course_range
+        context.extra[f"all_{nodes[1]}"] = course_range
     assert "ow" in nodes[row_node], "Currently this parser only accepts rows (not rounds)"
     return course_range
 
@@ -44,7 +45,7 @@ def course_statement(_, nodes) -> Dict[str, list]:
     node[0] is boolean to determine if the row should be reversed operations
     node[1] the course ids
     node[2] the stitch operations
-    :return: A dictionary with two keys: "courseIds" to the list of course_ids (ints)
+    :return: A dictionary with two keys: "courseIds" to the list of course_ids (ints and ranges)
         and "stitch-operations" keyed to the list of stitch operation tuples with repeat data
     """
     if nodes[0] is not None:
@@ -86,7 +87,7 @@ def side(_, nodes: str) -> str:
 
 
 @action
-def course_id_list(_, nodes: list) -> List[Union[int, Num_Closure, Iterator_Closure]]:
+def course_id_list(_, nodes: list) -> List[Union[int, range, Num_Closure, Iterator_Closure]]:
     """
     course_id_list: course_id_list commaAnd course_id | course_id;
     :param _: context data ignored but passed by parglare
@@ -94,7 +95,7 @@ def course_id_list(_, nodes: list) -> List[Union[int, Num_Closure, Iterator_Clos
     :return: a list of course_identifiers processed from the course_id_list
     """
     if len(nodes) == 1:
-        if type(nodes[0]) is int or isinstance(nodes[0], Num_Closure) or isinstance(nodes[0], Iterator_Closure):
+        if type(nodes[0]) is int or type(nodes[0]) is range or isinstance(nodes[0], Num_Closure) or isinstance(nodes[0], Iterator_Closure):
             course_identifiers = [nodes[0]]
         else:  # nodes is a course_identifiers list already
             course_identifiers = nodes[0]
@@ -103,7 +104,7 @@ def course_id_list(_, nodes: list) -> List[Union[int, Num_Closure, Iterator_Clos
         course_identifiers.append(nodes[2])
         topList = []
         for cId in course_identifiers:
-            if type(cId) is int or isinstance(cId, Num_Closure) or isinstance(cId, Iterator_Closure):
+            if type(cId) is int or type(cId) is range or isinstance(cId, Num_Closure) or isinstance(cId, Iterator_Closure):
                 topList.append(cId)
             else:  # cID is course_identifiers list
                 for subId in cId:
@@ -198,12 +199,12 @@ def conditional_stitch_group(_, nodes: list) -> Tuple[List[Tuple], Tuple[bool, i
 
 
 @action
-def between_courses(context, nodes) -> Union[Iterator_Closure, List[int]]:
+def between_courses(context, nodes) -> Union[Iterator_Closure, range]:
     """
-    process statement iterated courses to a list of course_ids
+    process statement iterated courses to a range of course_ids
     :param context: context passed by parglare, but not used
     :param nodes: the nodes from the statement to process
-    :return: list of course ids
+    :return: range of course ids
     """
     start_num = nodes[2]
     end_num = nodes[4]
@@ -216,15 +217,9 @@ def between_courses(context, nodes) -> Union[Iterator_Closure, List[int]]:
         elif side_exclusion == "rs":
             include_ws = False
     if isinstance(start_num, Num_Closure) or isinstance(end_num, Num_Closure):
-        return Iterator_Closure(context.parser.symbolTable, include_rs, include_ws, start_num, end_num)
+        return Iterator_Closure(context.extra, include_rs, include_ws, start_num, end_num)
     else:
-        ints = []
-        for i in range(start_num, end_num + 1):
-            if i % 2 == 1 and include_rs:
-                ints.append(i)
-            elif i % 2 == 0 and include_ws:
-                ints.append(i)
-        return ints
+        return side_range(start_num, end_num, include_rs, include_ws)
 
 
 @action
@@ -268,7 +263,7 @@ def num_assign(context: Context, nodes: list) -> Num_Assignment_Closure:
     """
     symbol = nodes[0]
     data = nodes[2]
-    return Num_Assignment_Closure(context.parser.symbolTable, symbol, data)
+    return Num_Assignment_Closure(context.extra, symbol, data)
 
 
 @action
@@ -280,7 +275,7 @@ def num_id(context: Context, nodes: list) -> Num_Variable_Closure:
     :return: the numerical value that that keyword processes to
     """
     symbol = nodes[0]
-    symbol_table = context.parser.symbolTable
+    symbol_table = context.extra
     return Num_Variable_Closure(symbol_table, symbol)
 
 
@@ -294,7 +289,7 @@ def num_exp(context, nodes: list) -> Union[int, Num_Closure]:
     if type(nodes[0]) is int:
         assert nodes[0] >= 0, f"Non Negative Numbers:{nodes[0]}"
     elif type(nodes[0]) is str and nodes[0] == "currow":
-        return Current_Row_Closure(context.parser.symbolTable)
+        return Current_Row_Closure(context.extra)
     return nodes[0]
 
 
@@ -325,7 +320,7 @@ def num_op(context, nodes: list) -> Union[int, Operation_Closure]:
         elif op == "/":
             return first_num / second_num
     else:
-        symbol_table = context.parser.symbolTable
+        symbol_table = context.extra
         return Operation_Closure(symbol_table, first_num, op, second_num)
 
 
@@ -356,6 +351,6 @@ def opId(context: Context, nodes: List[str]) -> Union[Stitch_Definition, Cable_D
     :param nodes: node used to identify stitch type
     :return: the stitch definition or cable definition keyed to this term
     """
-    currentSymbolTable = context.parser.symbolTable
+    currentSymbolTable = context.extra
     assert nodes[0] in currentSymbolTable, "No stitch defined ID={}".format(nodes[0])
     return currentSymbolTable[nodes[0]]
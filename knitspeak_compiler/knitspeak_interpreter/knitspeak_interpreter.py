@@ -1,44 +1,250 @@
 """Components of the parglare parser for knitspeak"""
 
+import codecs
+import glob
+import hashlib
 import os
-from typing import List, Dict, Union
+import tempfile
+import threading
+from typing import List, Dict, Union, Optional, Tuple, Iterable, Iterator
 
+import parglare
+from knitspeak_compiler.knitspeak_interpreter.fast_parser import fast_parse
+from knitspeak_compiler.knitspeak_interpreter.parse_cache import Parse_Cache
 from knitspeak_compiler.knitspeak_interpreter.symbol_table import Symbol_Table
 from parglare import Grammar, Parser
+from parglare.parser import Context
+from parglare.tables import LRTable, create_table
+from parglare.tables.persist import load_table, save_table
+
+TABLE_VERSION = 1  # increment when the parse table is built differently from the same grammar
+GRAMMAR_FILE = "knitspeak.pg"
+# sources that decide how a pattern parses, a change to any of them invalidates cached parse tables
+GRAMMAR_SOURCES = [GRAMMAR_FILE, "knitspeak_actions.py"]
+# the directory of cached parse tables, named by the digest of the grammar sources
+TABLE_CACHE_DIRECTORY = os.path.join(os.path.dirname(__file__), "__pycache__")
+_grammar_digest: Optional[bytes] = None
+# the grammar and parse table shared by every interpreter of the process, built on the first interpreter
+_shared_grammar: Optional[Tuple[Grammar, LRTable]] = None
+# the parse results shared by every interpreter of the process that is not given its own cache
+SHARED_PARSE_CACHE = Parse_Cache()
+STATEMENT_CHUNK_SIZE = 1 << 16  # the number of characters read from a pattern file at a time when streaming statements
+
+
+def grammar_digest() -> bytes:
+    """
+    :return: the digest of the grammar and actions files, computed once per process
+    """
+    global _grammar_digest
+    if _grammar_digest is None:
+        directory = os.path.dirname(__file__)
+        digest = hashlib.sha256()
+        for source_file in GRAMMAR_SOURCES:
+            with open(os.path.join(directory, source_file), "rb") as source:
+                digest.update(hashlib.sha256(source.read()).digest())
+        _grammar_digest = digest.digest()
+    return _grammar_digest
+
+
+def _table_path() -> str:
+    """
+    :return: the path of the cached parse table of the current grammar sources, table version and parglare version
+    """
+    digest = hashlib.sha256(f"{TABLE_VERSION}:{parglare.__version__}:".encode("ascii"))
+    digest.update(grammar_digest())
+    return os.path.join(TABLE_CACHE_DIRECTORY, f"knitspeak.{digest.hexdigest()[:16]}.pgt")
+
+
+def _save_table(table_path: str, table: LRTable):
+    """
+    Atomically writes the parse table and removes tables of older grammar sources.
+    The table is not cached if the cache directory is not writable
+    :param table_path: the path to write the table to
+    :param table: the parse table
+    """
+    try:
+        os.makedirs(TABLE_CACHE_DIRECTORY, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(suffix=".tmp", dir=TABLE_CACHE_DIRECTORY)
+        os.close(file_descriptor)
+        try:
+            save_table(temporary_path, table)
+            os.replace(temporary_path, table_path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        for stale_path in glob.glob(os.path.join(TABLE_CACHE_DIRECTORY, "knitspeak.*.pgt")):
+            if stale_path != table_path:
+                os.remove(stale_path)
+    except OSError:
+        pass
+
+
+def split_statements(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Splits pattern text at the end of each course statement. "." is only used by the grammar as the eol of a statement
+    :param chunks: consecutive pieces of the pattern text
+    :return: iterator of the text of each statement with its eol. Text after the last statement is returned last
+     if it is not whitespace or if there are no statements, so that it is reported by the parser
+    """
+    pending: List[str] = []  # the pieces of the statement that continues into the next chunk
+    split_any = False
+    for chunk in chunks:
+        start = 0
+        end = chunk.find(".")
+        while end >= 0:
+            pending.append(chunk[start:end + 1])
+            yield "".join(pending)
+            pending = []
+            split_any = True
+            start = end + 1
+            end = chunk.find(".", start)
+        if start < len(chunk):
+            pending.append(chunk[start:])
+    remainder = "".join(pending)
+    if not split_any or remainder.strip() != "":
+        yield remainder
+
+
+def _read_chunks(file_name: str) -> Iterator[str]:
+    """
+    :param file_name: the pattern file
+    :return: iterator of consecutive pieces of the file text of at most STATEMENT_CHUNK_SIZE characters
+    """
+    with codecs.open(file_name, "r", "utf-8") as pattern_file:
+        chunk = pattern_file.read(STATEMENT_CHUNK_SIZE)
+        while chunk != "":
+            yield chunk
+            chunk = pattern_file.read(STATEMENT_CHUNK_SIZE)
+
+
+def shared_grammar() -> Tuple[Grammar, LRTable]:
+    """
+    Loads the grammar once per process with its parse table, from the table cache if the grammar sources are unchanged
+    :return: the knitspeak grammar and its LALR parse table
+    """
+    global _shared_grammar
+    if _shared_grammar is None:
+        grammar = Grammar.from_file(os.path.join(os.path.dirname(__file__), GRAMMAR_FILE), ignore_case=True)
+        table_path = _table_path()
+        table = None
+        if os.path.exists(table_path):
+            try:
+                table = load_table(table_path, grammar)
+            except Exception:  # a corrupt or partially removed table is rebuilt
+                table = None
+        if table is None:
+            table = create_table(grammar, prefer_shifts=True, prefer_shifts_over_empty=True)  # the defaults of Parser
+            _save_table(table_path, table)
+        _shared_grammar = grammar, table
+    return _shared_grammar
 
 
 class KnitSpeak_Interpreter:
     """
-    A class to manage parsing a knit speak file with parglare
+    A class to manage parsing a knit speak file with parglare.
+    Patterns in the common subset of knitspeak are parsed by a hand-written parser with the same results, see fast_parse().
+    Every call to interpret() parses into its own symbol table with the parser of the calling thread,
+     so one interpreter can be shared by compilers in several threads
     ...
 
     Attributes
     ----------
-    parser: the parglare Parser that we add a symbol table to
+    parser: the parglare Parser of the thread that created the interpreter
+    parse_cache: the cache of parse results keyed by pattern text, None if every pattern is parsed
     """
 
-    def __init__(self, debugGrammar: bool = False, debugParser: bool = False, debugParserLayout: bool = False):
+    def __init__(self, debugGrammar: bool = False, debugParser: bool = False, debugParserLayout: bool = False, fastPath: bool = True,
+                 parseCache: Optional[Parse_Cache] = SHARED_PARSE_CACHE):
         """
-        Initializes a parser
+        Initializes a parser. The grammar and parse table are shared by every interpreter of the process unless debugging
         :param debugGrammar: If true, parglare is set to debug mode
         :param debugParser: if true, parglare parser is set to debug mod
         :param debugParserLayout: if true, parser layout is debuggable
+        :param fastPath: if true, patterns in the common subset of knitspeak skip the parglare parser unless debugging
+        :param parseCache: the cache of parse results to reuse for repeated pattern text, None to parse every pattern.
+            Defaults to the cache shared by the interpreters of the process. Not used when debugging
         """
-        directory = os.path.dirname(__file__)
-        pg_loc = directory + f"{os.path.sep}knitspeak.pg"
-        self._grammar = Grammar.from_file(pg_loc, debug=debugGrammar, ignore_case=True)
-        self.parser = Parser(self._grammar, debug=debugParser, debug_layout=debugParserLayout)
-        self.parser.symbolTable = Symbol_Table()
+        debugging = debugGrammar or debugParser or debugParserLayout
+        self._fastPath: bool = fastPath and not debugging
+        self.parse_cache: Optional[Parse_Cache] = None if debugging else parseCache
+        self._debugParser: bool = debugParser
+        self._debugParserLayout: bool = debugParserLayout
+        if debugGrammar or debugParser or debugParserLayout:
+            directory = os.path.dirname(__file__)
+            pg_loc = directory + f"{os.path.sep}{GRAMMAR_FILE}"
+            self._grammar = Grammar.from_file(pg_loc, debug=debugGrammar, ignore_case=True)
+            self.parser = Parser(self._grammar, debug=debugParser, debug_layout=debugParserLayout)
+        else:
+            self._grammar, table = shared_grammar()
+            self.parser = Parser(self._grammar, table=table)
+        # parglare parsers keep the state of a parse, so each thread parses with its own parser over the same table
+        self._thread_parsers = threading.local()
+        self._thread_parsers.parser = self.parser
+
+    def _thread_parser(self) -> Parser:
+        """
+        :return: the parser of the calling thread, created from the parse table of the interpreter on first use
+        """
+        parser = getattr(self._thread_parsers, "parser", None)
+        if parser is None:
+            parser = Parser(self._grammar, table=self.parser.table, debug=self._debugParser, debug_layout=self._debugParserLayout)
+            self._thread_parsers.parser = parser
+        return parser
 
-    def interpret(self, pattern: str, pattern_is_file: bool = False) -> List[Dict[str, Union[List[int], List[tuple]]]]:
+    def interpret(self, pattern: str, pattern_is_file: bool = False,
+                  symbol_table: Optional[Symbol_Table] = None) -> List[Dict[str, Union[List[int], List[tuple]]]]:
         """
         Executes the parsing code for the parglare parser
         :param pattern: either a file or the knitspeak string to be parsed
         :param pattern_is_file: if true, assumes that the pattern is parsed from a file
-        :return:
+        :param symbol_table: the symbol table that the pattern's definitions are added to and that its closures read.
+            Defaults to a new Symbol_Table
+        :return: the course statements of the pattern
         """
+        if symbol_table is None:
+            symbol_table = Symbol_Table()
+        file_name = None
         if pattern_is_file:
-            result = self.parser.parse_file(pattern)
-        else:
-            result = self.parser.parse(pattern)
-        return result
+            file_name = pattern
+            with codecs.open(file_name, "r", "utf-8") as pattern_file:
+                pattern = pattern_file.read()
+        if self.parse_cache is None:
+            return self._parse(pattern, file_name, symbol_table)
+        return self.parse_cache.parse(pattern, lambda parse_table: self._parse(pattern, file_name, parse_table), symbol_table)
+
+    def interpret_iter(self, pattern: str, pattern_is_file: bool = False,
+                       symbol_table: Optional[Symbol_Table] = None) -> Iterator[Dict[str, Union[List[int], List[tuple]]]]:
+        """
+        Parses the pattern one statement at a time, so memory is bounded by the longest statement instead of the pattern.
+        Every statement is parsed into the same symbol table, so the course statements are those returned by interpret().
+        Statements are not cached and parse errors are located relative to the start of the statement
+        :param pattern: either a file or the knitspeak string to be parsed
+        :param pattern_is_file: if true, assumes that the pattern is parsed from a file, which is read in chunks
+        :param symbol_table: the symbol table that the pattern's definitions are added to and that its closures read.
+            Defaults to a new Symbol_Table
+        :return: iterator of the course statements of the pattern, each returned as soon as it is parsed
+        """
+        if symbol_table is None:
+            symbol_table = Symbol_Table()
+        file_name = None
+        chunks = [pattern]
+        if pattern_is_file:
+            file_name = pattern
+            chunks = _read_chunks(file_name)
+        for statement in split_statements(chunks):
+            yield from self._parse(statement, file_name, symbol_table)
+
+    def _parse(self, pattern: str, file_name: Optional[str], symbol_table: Symbol_Table) -> List[Dict[str, Union[List[int], List[tuple]]]]:
+        """
+        Parses the pattern with the hand-written parser if it is in the subset, otherwise with parglare
+        :param pattern: the knitspeak string to be parsed
+        :param file_name: the file the pattern was read from, used in parse errors
+        :param symbol_table: the symbol table that the pattern's definitions are added to and that its closures read
+        :return: the course statements of the pattern
+        """
+        if self._fastPath:
+            result = fast_parse(pattern, symbol_table)
+            if result is not None:
+                return result
+        context = Context(extra=symbol_table)  # passed to the actions, see knitspeak_actions
+        return self._thread_parser().parse(pattern, file_name=file_name, context=context)
@@ -0,0 +1,136 @@
+"""A bounded cache of knitspeak parse results keyed by the digest of the pattern text"""
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+from knitspeak_compiler.knitspeak_interpreter.cable_definitions import Cable_Definition
+from knitspeak_compiler.knitspeak_interpreter.stitch_definitions import Stitch_Definition
+from knitspeak_compiler.knitspeak_interpreter.symbol_table import Symbol_Table
+
+_SHARED_TYPES = (int, bool, str, range, type(None))  # immutable leaves of parse results
+_DEFAULT_REVISION = Symbol_Table().revision  # the revision of a symbol table that only holds the language defaults
+
+
+class Parse_Cache:
+    """
+    A least recently used cache of parse results keyed by the digest of the pattern text.
+    Each entry keeps the results parsed into a private symbol table and the entries the parse added to it.
+    Every lookup returns a copy of the course statements and closures bound to the caller's symbol table,
+     so the cached results are never evaluated or mutated.
+    Patterns parsed into a symbol table with entries other than the language defaults are parsed without the cache
+    ...
+
+    Attributes
+    ----------
+    max_entries: int
+        the number of parse results kept
+    hits: int
+        the number of parses answered by the cache
+    misses: int
+        the number of parses that were not in the cache
+    """
+
+    def __init__(self, max_entries: int = 128):
+        """
+        :param max_entries: the number of parse results kept. Defaults to 128
+        """
+        assert max_entries > 0, "Cache must keep at least one parse result"
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        # the results, parse symbol table and keys the parse assigned, in assignment order, keyed by pattern digest
+        self._entries: OrderedDict[bytes, Tuple[list, Symbol_Table, List[str]]] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()  # interpreters share the cache across threads
+
+    @staticmethod
+    def key(pattern: str) -> bytes:
+        """
+        :param pattern: the knitspeak pattern text
+        :return: the digest that keys the parse results of the pattern
+        """
+        return hashlib.sha256(pattern.encode("utf-8")).digest()
+
+    def parse(self, pattern: str, parse: Callable[[Symbol_Table], list], symbol_table: Symbol_Table) -> list:
+        """
+        Parses the pattern unless its results are cached. Parse errors are raised and not cached.
+        If the symbol table has changed from the language defaults, the pattern is parsed into it without the cache
+        :param pattern: the knitspeak pattern text
+        :param parse: parses the pattern into the given symbol table and returns the results
+        :param symbol_table: the symbol table that the results are bound to and the parse's definitions are added to
+        :return: a copy of the parse results bound to the symbol table
+        """
+        if symbol_table.revision != _DEFAULT_REVISION:  # the parse may read the caller's definitions
+            return parse(symbol_table)
+        key = self.key(pattern)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        if entry is None:
+            parse_table = Symbol_Table()
+            first_revision = parse_table.revision
+            results = parse(parse_table)
+            assigned = sorted((key for key in parse_table.snapshot() if parse_table.version(key) > first_revision),
+                              key=parse_table.version)
+            entry = results, parse_table, assigned
+            with self._lock:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return _bind(entry, symbol_table)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """
+        Removes every entry from the cache
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+def _bind(entry: Tuple[list, Symbol_Table, List[str]], symbol_table: Symbol_Table) -> list:
+    """
+    :param entry: the results, parse symbol table and assigned keys of a cached parse
+    :param symbol_table: the symbol table to bind a copy of the results to
+    :return: a copy of the results that reads the symbol table and its stitch definitions, with the parse's assignments added to it
+    """
+    results, parse_table, assigned = entry
+    memo: Dict[int, object] = {id(parse_table): symbol_table}
+    for key, value in parse_table.snapshot().items():
+        if isinstance(value, (Stitch_Definition, Cable_Definition)) and key in symbol_table:
+            memo[id(value)] = symbol_table[key]
+    copied_results = _copy(results, memo)
+    for key in assigned:
+        symbol_table[key] = _copy(parse_table[key], memo)
+    return copied_results
+
+
+def _copy(value, memo: Dict[int, object]):
+    """
+    Copies the lists, tuples and dictionaries of parse results and deep copies closures, sharing immutable leaves
+    :param value: a value in parse results
+    :param memo: copies keyed by the id of the copied object, see copy.deepcopy()
+    :return: the copy of the value
+    """
+    if type(value) in _SHARED_TYPES:
+        return value
+    copied = memo.get(id(value))
+    if copied is not None:
+        return copied
+    if type(value) is list:
+        copied = [_copy(item, memo) for item in value]
+    elif type(value) is tuple:
+        copied = tuple(_copy(item, memo) for item in value)
+    elif type(value) is dict:
+        copied = {key: _copy(item, memo) for key, item in value.items()}
+    else:  # closures and stitch definitions that are not in the symbol table
+        return copy.deepcopy(value, memo)
+    memo[id(value)] = copied
+    return copied
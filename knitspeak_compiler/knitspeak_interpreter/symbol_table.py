@@ -12,6 +12,8 @@ class Symbol_Table:
     """
 
     def __init__(self):
+        self.revision: int = 0  # incremented whenever an entry changes
+        self._versions: Dict[str, int] = {}  # the revision at which each entry last changed
         self._symbol_table: Dict[str, Union[Cable_Definition, Stitch_Definition, int]] = {"k": self._knit(), "p": self._purl(),
                                                                                          "yo": self._yo(), "slip": self._slip()}
         self._decreases()
@@ -96,7 +98,38 @@ class Symbol_Table:
         return item.lower() in self._symbol_table
 
     def __setitem__(self, key: str, value: Union[int, Stitch_Definition, Cable_Definition]):
-        self._symbol_table[key.lower()] = value
+        key = key.lower()
+        old_value = self._symbol_table.get(key)
+        if old_value is value or (type(value) is int and type(old_value) is int and old_value == value):
+            return  # unchanged entries keep their version so closures that read them stay cached
+        self._symbol_table[key] = value
+        self.revision += 1
+        self._versions[key] = self.revision
+
+    def version(self, key: str) -> int:
+        """
+        :param key: the name of an entry
+        :return: the revision at which the entry last changed, 0 if it was never set
+        """
+        return self._versions.get(key.lower(), 0)
+
+    def snapshot(self) -> Dict[str, Union[int, Stitch_Definition, Cable_Definition]]:
+        """
+        :return: a copy of the entries that can be restored with restore()
+        """
+        return dict(self._symbol_table)
+
+    def restore(self, snapshot: Dict[str, Union[int, Stitch_Definition, Cable_Definition]]):
+        """
+        Returns the entries to the state of a snapshot. Entries that change get a new version
+        :param snapshot: entries given by snapshot()
+        """
+        for key in [key for key in self._symbol_table if key not in snapshot]:
+            del self._symbol_table[key]
+            self.revision += 1
+            self._versions[key] = self.revision
+        for key, value in snapshot.items():
+            self[key] = value
 
     def __getitem__(self, item: str):
         return self._symbol_table[item.lower()]
@@ -1,6 +1,7 @@
 """Script used to create knitout instructions from a knitgraph"""
 from typing import Dict, List, Tuple
 
+from knit_graphs.Course_View import Course_View
 from knit_graphs.Knit_Graph import Knit_Graph, Pull_Direction
 from knitting_machine.Machine_State import Machine_State, Needle, Pass_Direction
 from knitting_machine.machine_operations import outhook
@@ -19,10 +20,6 @@ class Knitout_Generator:
         self._knit_graph = knit_graph
         assert len(self._knit_graph.yarns) == 1, "This only supports single color graphs"
         self._carrier = [*self._knit_graph.yarns.values()][0].carrier
-        loop_id_to_course, courses_to_loop_ids = self._knit_graph.get_courses()
-        self._loop_id_to_courses: Dict[int, float] = loop_id_to_course
-        self._courses_to_loop_ids: Dict[float, List[int]] = courses_to_loop_ids
-        self._sorted_courses = sorted([*self._courses_to_loop_ids.keys()])
         self._machine_state: Machine_State = Machine_State()
         self._carriage_passes: List[Carriage_Pass] = []
         self._instructions: List[str] = []
@@ -32,14 +29,13 @@ class Knitout_Generator:
         Generates the instructions for this knitgraph
         """
         self._add_header()
-        self._cast_on()
+        courses = self._knit_graph.iter_courses()  # only the current course is held in memory
+        self._cast_on(next(courses))
         assert self._machine_state.last_carriage_direction is Pass_Direction.Left_to_Right
         pass_direction = self._machine_state.last_carriage_direction.opposite()
-        for course in self._sorted_courses:
-            if course > 0:  # not cast on
-                course_loops = self._courses_to_loop_ids[course]
-                self._knit_row(course_loops, pass_direction, course)
-                pass_direction = pass_direction.opposite()
+        for course in courses:  # courses after cast on
+            self._knit_row(course, pass_direction)
+            pass_direction = pass_direction.opposite()
         self._instructions.append(outhook(self._machine_state, self._carrier))
         self._drop_loops()
 
@@ -66,11 +62,12 @@ class Knitout_Generator:
         carriage_pass = Carriage_Pass(Instruction_Type.Drop, None, second_drops, self._machine_state)
         self._add_carriage_pass(carriage_pass)
 
-    def _cast_on(self):
+    def _cast_on(self, first_course: Course_View):
         """
         Does a standard alternating tuck cast on then 2 stabilizing knit rows
+        :param first_course: the view of the first course in the knitgraph
         """
-        first_course_loops = self._courses_to_loop_ids[self._sorted_courses[0]]
+        first_course_loops = first_course.loop_ids
         carrier_set = self._carrier
         even_tucks_data: Dict[Needle, Instruction_Parameters] = {}
         odd_tucks_data: Dict[Needle, Instruction_Parameters] = {}
@@ -102,41 +99,41 @@ class Knitout_Generator:
                                       first_loops, self._machine_state)
         self._add_carriage_pass(carriage_pass, "first row loops")
 
-    def _knit_row(self, loop_ids: List[int], direction: Pass_Direction, course_number: int):
+    def _knit_row(self, course: Course_View, direction: Pass_Direction):
         """
-        Adds the knit instructions for the given loop ids.
+        Adds the knit instructions for the loops of the course.
         Transfers to make these loops are also executed
-        :param loop_ids: the loop ids of a single course
+        :param course: the view of a single course
         :param direction: the direction that the loops will be knit in
-        :param course_number: the course identifier for comments only
         """
         carrier_set = self._carrier
-        loop_id_to_target_needle = self._do_xfers_for_row(loop_ids, direction)
+        course_number = course.course
+        loop_id_to_target_needle = self._do_xfers_for_row(course, direction)
         knit_data: Dict[Needle, Instruction_Parameters] = {}
         for loop_id, target_needle in loop_id_to_target_needle.items():
             knit_data[target_needle] = Instruction_Parameters(target_needle, involved_loop=loop_id, carrier=carrier_set)
         carriage_pass = Carriage_Pass(Instruction_Type.Knit, direction, knit_data, self._machine_state)
         self._add_carriage_pass(carriage_pass, f"Knit course {course_number}")
 
-    def _do_xfers_for_row(self, loop_ids: List[int], direction: Pass_Direction) -> Dict[int, Needle]:
+    def _do_xfers_for_row(self, course: Course_View, direction: Pass_Direction) -> Dict[int, Needle]:
         """
         Completes all the xfers needed to prepare a row
-        :param loop_ids: the loop ids of a single course
+        :param course: the view of a single course
         :param direction: the direction that the loops will be knit in
         :return:
         """
         loop_id_to_target_needle, parent_loops_to_needles, lace_offsets, front_cable_offsets, back_cable_offsets \
-            = self._find_target_needles(loop_ids, direction)
+            = self._find_target_needles(course, direction)
         self._do_decrease_transfers(parent_loops_to_needles, lace_offsets)
         self._do_cable_transfers(parent_loops_to_needles, front_cable_offsets, back_cable_offsets)
         self._do_knit_purl_xfers(loop_id_to_target_needle)
         return loop_id_to_target_needle
 
-    def _find_target_needles(self, loop_ids: List[int], direction: Pass_Direction) -> \
+    def _find_target_needles(self, course: Course_View, direction: Pass_Direction) -> \
             Tuple[Dict[int, Needle], Dict[int, Needle], Dict[int, int], Dict[int, int], Dict[int, int]]:
         """
         Finds target needle information needed to do transfers
-        :param loop_ids: the loop ids of a single course
+        :param course: the view of a single course
         :param direction: the direction that the loops will be knit in
         :return: Loops mapped to target needles to be knit on,
         parent loops mapped to current needles,
@@ -147,37 +144,39 @@ class Knitout_Generator:
         parent_loops_to_needles: Dict[int, Needle] = {}  # key loop_ids to the needle they are currently on
         loop_id_to_target_needle: Dict[int, Needle] = {}  # key loop_ids to the needle they need to be on to knit
         parents_to_offsets: Dict[int, int] = {}  # key parent loop_ids to their offset from their child
-        # .... i.e., self._knit_graph.graph[parent_id][loop_id]["parent_offset"]
+        # .... i.e., the parent_offset of the stitch-edge
         front_cable_offsets: Dict[int, int] = {}  # key parent loop_id to the offset to their child
-        # .... only include loops that cross in front. i.e., self._knit_graph.graph[parent_id][loop_id]["depth"] > 0
+        # .... only include loops that cross in front. i.e., the depth of the stitch-edge > 0
         back_cable_offsets: Dict[int, int] = {}  # key parent loop_id to the offset to their child
-        # .... only include loops that cross in back. i.e., self._knit_graph.graph[parent_id][loop_id]["depth"] < 0
+        # .... only include loops that cross in back. i.e., the depth of the stitch-edge < 0
         decrease_offsets: Dict[int, int] = {}  # key parent loop_id to the offset to their child
         # .... only includes parents involved in a decrease
-        max_needle = len(loop_ids) - 1  # last needle being used to create this swatch
-        for loop_pos, loop_id in enumerate(loop_ids):  # find target needle locations of each loop in the course
-            parent_ids = [*self._knit_graph.graph.predecessors(loop_id)]
-            for parent_id in parent_ids:  # find current needle of all parent loops
+        max_needle = len(course) - 1  # last needle being used to create this swatch
+        for loop_pos, loop_id in enumerate(course.loop_ids):  # find target needle locations of each loop in the course
+            parent_edges = course.parent_edges(loop_pos)
+            for edge in parent_edges:  # find current needle of all parent loops
+                parent_id = course.parent_ids[edge]
                 parent_needle = self._machine_state.get_needle_of_loop(parent_id)
                 assert parent_needle is not None, f"Parent loop {parent_id} is not held on a needle"
                 parent_loops_to_needles[parent_id] = parent_needle
-            if len(parent_ids) == 0:  # yarn-over, yarn overs are made on front bed
+            if len(parent_edges) == 0:  # yarn-over, yarn overs are made on front bed
                 if direction is Pass_Direction.Left_to_Right:
                     position = loop_pos
                 else:
                     position = max_needle - loop_pos
                 loop_id_to_target_needle[loop_id] = Needle(is_front=True, position=position)
-            elif len(parent_ids) == 1:  # knit, purl, may be in cable, no needle
-                parent_id = [*parent_ids][0]
-                parent_offset = self._knit_graph.graph[parent_id][loop_id]["parent_offset"]
+            elif len(parent_edges) == 1:  # knit, purl, may be in cable, no needle
+                edge = parent_edges[0]
+                parent_id = course.parent_ids[edge]
+                parent_offset = course.parent_offsets[edge]
                 if parent_offset != 0:
-                    cable_depth = self._knit_graph.graph[parent_id][loop_id]["depth"]
+                    cable_depth = course.depths[edge]
                     assert cable_depth != 0, f"cables must have a non-zero depth to cross at"
                     if cable_depth == 1:
                         front_cable_offsets[parent_id] = parent_offset
                     else:
                         back_cable_offsets[parent_id] = parent_offset
-                pull_direction = self._knit_graph.graph[parent_id][loop_id]["pull_direction"]
+                pull_direction = course.pull_direction(edge)
                 front_bed = pull_direction is Pull_Direction.BtF  # knit on front bed, purl on back bed
                 parent_needle = parent_loops_to_needles[parent_id]
                 offset_needle = parent_needle.offset(parent_offset)
@@ -185,16 +184,16 @@ class Knitout_Generator:
                 loop_id_to_target_needle[loop_id] = target_needle
                 parents_to_offsets[parent_id] = parent_offset
             else:  # decrease, the bottom parent loop in the stack  will be on the target needle
-                loop = self._knit_graph.loops[loop_id]
                 target_needle = None  # re-assigned on first iteration to needle of first parent
-                for i, parent in enumerate(loop.parent_loops):
-                    parent_needle = parent_loops_to_needles[parent.loop_id]
+                for i, edge in enumerate(course.stacked_edges(loop_pos)):
+                    parent_id = course.parent_ids[edge]
+                    parent_needle = parent_loops_to_needles[parent_id]
                     if i == 0:  # first parent in stack
                         target_needle = parent_needle
                     loop_id_to_target_needle[loop_id] = target_needle
-                    offset = self._knit_graph.graph[parent.loop_id][loop_id]["parent_offset"]
-                    parents_to_offsets[parent.loop_id] = offset
-                    decrease_offsets[parent.loop_id] = offset
+                    offset = course.parent_offsets[edge]
+                    parents_to_offsets[parent_id] = offset
+                    decrease_offsets[parent_id] = offset
 
         return loop_id_to_target_needle, parent_loops_to_needles, decrease_offsets, \
                front_cable_offsets, back_cable_offsets
@@ -1,5 +1,11 @@
 """testing that symbol table is complete and parser is working as expected"""
-from knitspeak_compiler.knitspeak_interpreter.knitspeak_interpreter import KnitSpeak_Interpreter
+import os
+
+from knitspeak_compiler.knitspeak_interpreter import knitspeak_interpreter
+from knitspeak_compiler.knitspeak_interpreter.closures import Num_Assignment_Closure, Num_Variable_Closure, Operation_Closure
+from knitspeak_compiler.knitspeak_interpreter.knitspeak_interpreter import KnitSpeak_Interpreter, split_statements
+from knitspeak_compiler.knitspeak_interpreter.parse_cache import Parse_Cache
+from knitspeak_compiler.knitspeak_interpreter.stitch_definitions import Stitch_Definition
 from knitspeak_compiler.knitspeak_interpreter.symbol_table import Symbol_Table
 
 
@@ -78,4 +84,81 @@ def test_cables():
 def test_closures():
     pattern = r"""n=1, from (n+1) to (n+3), from 5 to 7 rows k n, p (n=n+2)."""
     results = parser.interpret(pattern)
-    print(results)
\ No newline at end of file
+    print(results)
+
+
+def test_closure_caching():
+    table = Symbol_Table()
+    table["n"] = 4
+    table["m"] = 1
+    operation = Operation_Closure(table, Num_Variable_Closure(table, "n"), "*", 2)
+    evaluations = []
+    evaluate = operation._evaluate
+    operation._evaluate = lambda: evaluations.append(1) or evaluate()
+    assert operation.to_int() == 8
+    table["m"] = 2  # not read by the operation
+    table["n"] = 4  # unchanged value
+    assert operation.to_int() == 8 and len(evaluations) == 1
+    table["n"] = 5
+    assert operation.to_int() == 10 and len(evaluations) == 2
+    assignment = Num_Assignment_Closure(table, "m", Operation_Closure(table, Num_Variable_Closure(table, "n"), "+", 1))
+    assert Operation_Closure(table, assignment, "/", 2).to_int() == 3 and table["m"] == 6
+    table["n"] = 7
+    assert Operation_Closure(table, assignment, "/", 2).to_int() == 4 and table["m"] == 8
+
+
+def test_table_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(knitspeak_interpreter, "TABLE_CACHE_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(knitspeak_interpreter, "_shared_grammar", None)
+    interpreter = KnitSpeak_Interpreter()
+    assert KnitSpeak_Interpreter()._grammar is interpreter._grammar  # built once per process
+    table_files = os.listdir(tmp_path)
+    assert len(table_files) == 1
+    expected = str(interpreter.interpret(r"""1st and 2nd row k."""))
+    monkeypatch.setattr(knitspeak_interpreter, "_shared_grammar", None)
+    assert str(KnitSpeak_Interpreter().interpret(r"""1st and 2nd row k.""")) == expected  # loaded from the table cache
+    with open(os.path.join(tmp_path, table_files[0]), "w") as table_file:
+        table_file.write("[{")
+    monkeypatch.setattr(knitspeak_interpreter, "_shared_grammar", None)
+    assert str(KnitSpeak_Interpreter().interpret(r"""1st and 2nd row k.""")) == expected  # corrupt tables are rebuilt
+    monkeypatch.setattr(knitspeak_interpreter, "_grammar_digest", b"edited grammar")
+    monkeypatch.setattr(knitspeak_interpreter, "_shared_grammar", None)
+    KnitSpeak_Interpreter()
+    assert os.listdir(tmp_path) != table_files and len(os.listdir(tmp_path)) == 1  # stale tables are replaced
+
+
+def test_parse_cache():
+    cache = Parse_Cache(max_entries=2)
+    interpreter = KnitSpeak_Interpreter(parseCache=cache)
+    pattern = r"""n=1, from (n+1) to (n+3), from 5 to 7 rows k n, p (n=n+2). all rs rows k."""
+    first_table = Symbol_Table()
+    first = interpreter.interpret(pattern, symbol_table=first_table)
+    first[0]["stitch-operations"].clear()  # results handed out are copies
+    second_table = Symbol_Table()
+    second = interpreter.interpret(pattern, symbol_table=second_table)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(second[0]["stitch-operations"]) == 2 and second[0]["stitch-operations"][0][0] is second_table["k"]
+    assert second_table["all_rs"] is second[1]["courseIds"]
+    repeats = second[0]["stitch-operations"][0][1][1]
+    second_table["n"] = 3
+    assert repeats.symbol_table is second_table and repeats.to_int() == 3 and "n" not in first_table
+    interpreter.interpret(r"""1st row k.""")
+    interpreter.interpret(r"""1st row p.""")
+    assert len(cache) == 2
+    interpreter.interpret(pattern)  # evicted as the least recently used
+    assert (cache.hits, cache.misses) == (1, 4)
+    defined_table = Symbol_Table()
+    defined_table["kk"] = Stitch_Definition()
+    results = interpreter.interpret(r"""1st row kk.""", symbol_table=defined_table)  # parsed with the caller's definitions
+    assert results[0]["stitch-operations"][0][0] is defined_table["kk"] and (cache.hits, cache.misses) == (1, 4)
+
+
+def test_interpret_iter():
+    assert [*split_statements(["1st row", " k. 2nd ", "row p.", " \n"])] == ["1st row k.", " 2nd row p."]
+    assert [*split_statements(["1st row k. 2nd row p"])] == ["1st row k.", " 2nd row p"]  # left for the parser to report
+    pattern = r"""all rs rows k. all ws rows p. 3rd row [k, p] to end."""
+    symbol_table = Symbol_Table()
+    statements = KnitSpeak_Interpreter().interpret_iter(pattern, symbol_table=symbol_table)
+    assert next(statements)["courseIds"] == [1] and "all_ws" not in symbol_table  # statements are parsed as they are read
+    assert [statement["courseIds"] for statement in statements] == [[2], [3]]
+    assert "all_rs" in symbol_table and "all_ws" in symbol_table
@@ -0,0 +1,72 @@
+"""Tests that the array-backed graph storage behaves like the networkx storage"""
+from knit_graphs.Array_Graph import Array_Graph
+from knit_graphs.Knit_Graph import Knit_Graph
+from knitspeak_compiler.knitspeak_compiler import Knitspeak_Compiler
+from knitting_machine.knitgraph_to_knitout import Knitout_Generator
+
+
+def _graph_structure(knit_graph: Knit_Graph):
+    structure = []
+    for loop_id in knit_graph.graph.nodes:
+        parents = [(parent_id, knit_graph.graph[parent_id][loop_id]) for parent_id in knit_graph.graph.predecessors(loop_id)]
+        structure.append((loop_id, knit_graph[loop_id].parent_loops, parents))
+    return structure
+
+
+def _compile_both(pattern: str, width: int, rows: int):
+    nx_graph = Knitspeak_Compiler().compile(width, rows, pattern)
+    array_graph = Knitspeak_Compiler(Knit_Graph(Array_Graph())).compile(width, rows, pattern)
+    return nx_graph, array_graph
+
+
+def test_same_structure():
+    pattern = r"""
+        1st row k, lc2|2, k, rc2|2, [k] to end.
+        all ws rows p.
+        3rd row k, k2tog, yo, yo, sk2po, yo, [k] to end.
+        5th row k 3, lc1|1, k, rc1|1, [k] to end.
+    """
+    nx_graph, array_graph = _compile_both(pattern, 11, 6)
+    assert _graph_structure(nx_graph) == _graph_structure(array_graph)
+    assert sorted(nx_graph.graph.edges) == sorted(array_graph.graph.edges)
+    assert nx_graph.get_courses() == array_graph.get_courses()
+    for loop_id in nx_graph.graph.nodes:
+        assert sorted(nx_graph.graph.successors(loop_id)) == sorted(array_graph.graph.successors(loop_id))
+
+
+def test_same_knitout():
+    pattern = "all rs rows k rib=2, p rib. all ws rows k rib, p rib."
+    nx_graph, array_graph = _compile_both(pattern, 8, 6)
+    nx_generator = Knitout_Generator(nx_graph)
+    nx_generator.generate_instructions()
+    array_generator = Knitout_Generator(array_graph)
+    array_generator.generate_instructions()
+    assert nx_generator._instructions == array_generator._instructions
+
+
+def test_out_of_order_edges():
+    graph = Array_Graph()
+    for loop_id in range(0, 4):
+        graph.add_node(loop_id)
+    graph.add_edge(0, 3)
+    graph.add_edge(1, 2, depth=-1, parent_offset=1)
+    graph.add_edge(2, 3, parent_offset=-1)
+    graph.add_edge(0, 3, depth=1)
+    assert [*graph.predecessors(3)] == [0, 2]
+    assert graph[0][3]["depth"] == 1
+    assert graph[1][2]["parent_offset"] == 1
+    assert graph.number_of_edges() == 3
+    assert [*graph.successors(0)] == [3]
+
+
+def test_truncate():
+    pattern = "all rs rows k, k2tog, yo 2, sk2po, yo 2, skpo, k. all ws rows p 2, k, p 3, k, p 2."
+    nx_graph, array_graph = _compile_both(pattern, 9, 8)
+    nx_shorter, array_shorter = _compile_both(pattern, 9, 5)
+    for knit_graph, shorter in [(nx_graph, nx_shorter), (array_graph, array_shorter)]:
+        knit_graph.truncate(shorter.last_loop_id)
+        assert _graph_structure(knit_graph) == _graph_structure(shorter)
+        assert knit_graph.get_courses() == shorter.get_courses()
+        assert [*knit_graph.yarns["yarn"]] == [*shorter.yarns["yarn"]]
+        assert knit_graph.fingerprint() == shorter.fingerprint()
+        assert knit_graph.validate() == []
@@ -0,0 +1,35 @@
+import os
+
+from knit_graphs.Knit_Graph import Knit_Graph
+from knitspeak_compiler.batch_compiler import Compile_Job, compile_batch, compile_directory, compile_sizes
+from knitspeak_compiler.knitspeak_compiler import Knitspeak_Compiler
+
+
+def test_compile_directory(tmp_path):
+    directory = os.path.join(os.path.dirname(os.path.dirname(__file__)), "example_knitspeak")
+    results = compile_directory(directory, 12, 8, str(tmp_path), processes=2)
+    assert len(results) == len([name for name in os.listdir(directory) if name.endswith(".ks")])
+    for result in results:
+        if result.succeeded:
+            knit_graph = Knit_Graph.load(result.job.graph_path)
+            expected = Knitspeak_Compiler().compile(12, 8, result.job.pattern, True)
+            assert knit_graph.fingerprint() == expected.fingerprint()
+            assert os.path.exists(result.job.knitout_path)
+    assert any(result.succeeded for result in results)
+
+
+def test_batch_errors():
+    jobs = [Compile_Job("1st row k, p 3, k. 2nd row p, k 3, p.", 5, 2), Compile_Job("1st row k, nope. 2nd row p.", 5, 2),
+            Compile_Job("1st row k 5. 2nd row p 5.", 5, 2)]
+    results = compile_batch(jobs, processes=2)
+    assert [result.succeeded for result in results] == [True, False, True]
+    assert results[0].loop_count == 15 and results[2].loop_count == 15
+    assert "nope" in results[1].error
+
+
+def test_compile_sizes():
+    pattern = "all rs rows k, k2tog, yo 2, sk2po, yo 2, skpo, k. all ws rows p 2, k, p 3, k, p 2."
+    knit_graphs = compile_sizes([9, 18, 27, 36], 6, pattern, pool_loops=100, processes=2)
+    assert [*knit_graphs] == [9, 18, 27, 36]
+    for width, knit_graph in knit_graphs.items():
+        assert knit_graph.fingerprint() == Knitspeak_Compiler().compile(width, 6, pattern).fingerprint()
@@ -0,0 +1,38 @@
+import os
+
+from knitspeak_compiler.compile_cache import Compile_Cache
+from knitspeak_compiler.knitspeak_compiler import Knitspeak_Compiler
+
+pattern = r"""
+    all rs rows k, k2tog, yo 2, sk2po, yo 2, skpo, k.
+    all ws rows p 2, k, p 3, k, p 2.
+"""
+
+
+def test_cache_hits(tmp_path):
+    cache = Compile_Cache(str(tmp_path))
+    expected = Knitspeak_Compiler().compile(9, 6, pattern)
+    assert cache.compile(9, 6, pattern).fingerprint() == expected.fingerprint()
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.compile(9, 6, pattern).fingerprint() == expected.fingerprint()
+    with cache.compile(9, 6, pattern, mapped=True) as mapped:
+        assert mapped.fingerprint() == expected.fingerprint()
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.compile(9, 8, pattern)
+    assert cache.misses == 2
+    assert Compile_Cache.key(9, 6, pattern) != Compile_Cache.key(9, 6, pattern + " ")
+    assert [name for name in os.listdir(str(tmp_path)) if name.endswith(".tmp")] == []
+
+
+def test_cache_eviction(tmp_path):
+    cache = Compile_Cache(str(tmp_path))
+    cache.compile(9, 4, pattern)
+    entry_size = cache.size()
+    cache.max_bytes = entry_size * 2
+    cache.compile(9, 2, pattern)
+    first_key = Compile_Cache.key(9, 4, pattern)
+    os.utime(os.path.join(str(tmp_path), first_key + ".kg"), (0, 0))  # least recently used
+    cache.compile(9, 6, pattern)
+    assert cache.size() <= cache.max_bytes
+    assert cache.get(first_key) is None
+    assert cache.get(Compile_Cache.key(9, 6, pattern)) is not None
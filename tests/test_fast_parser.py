@@ -0,0 +1,100 @@
+"""differential tests of the hand-written parser against the parglare grammar"""
+import glob
+import os
+
+from knitspeak_compiler.knitspeak_interpreter.fast_parser import fast_parse
+from knitspeak_compiler.knitspeak_interpreter.knitspeak_interpreter import KnitSpeak_Interpreter
+from knitspeak_compiler.knitspeak_interpreter.symbol_table import Symbol_Table
+
+grammar_parser = KnitSpeak_Interpreter(fastPath=False, parseCache=None)
+subset_patterns = [
+    r"""1st row k, p 2, [k 2, p] to end.""",
+    r"""all rs rows k 2, [k, p] 3, k. all ws rows p.""",
+    r"""2nd and 4th rows [k, [p 2] 2] to last 3 sts, k, p, k. 1st, 3rd and 5th rows k.""",
+    r"""1st row k and p, and k AND p. 2nd row [k] to last st, p.""",
+    r"""3rd, 1st, 3rd row k.""",
+    r"""All RS rows k2tog, yo, lc2|2, rc1p|1p 2. ALL Ws row p.""",
+    r"""from 1st to 4th row k. from rs 5 to 9 rows p. from ws 6 to 10 rows k 2nd, p.""",
+    r"""1st row k 0, [p] 0, [[k], [p 2] 3].
+        2nd row K, P, Slip.""",
+    r"""0th row k.""",
+    r"""all rs rows k. all rs rows p. all ws rows p.""",
+]
+grammar_patterns = [  # outside the subset or invalid, parsed or rejected by the grammar alone
+    r"""n=1, from (n+1) to (n+3), from 5 to 7 rows k n, p (n=n+2).""",
+    r"""flipped 1st row k, p.""",
+    r"""1st row k currow.""",
+    r"""1st row [k] TO end.""",
+    r"""1st rowsk.""",
+    r"""1st row k2.""",
+    r"""1st row k,.""",
+    r"""all (rs) rows k.""",
+    r"""1st row [k] to last 2sts.""",
+    r"""1stand 2nd row k.""",
+    r"""1st round k.""",
+    r"""""",
+]
+
+
+def _canonical(result, symbol_table: Symbol_Table):
+    """
+    :param result: parse results
+    :param symbol_table: the symbol table of the parse
+    :return: the results with symbol table entries replaced by their key, to compare identity, and other objects by their text
+    """
+    if type(result) is list or type(result) is tuple:
+        return type(result).__name__, [_canonical(item, symbol_table) for item in result]
+    elif type(result) is dict:
+        return {key: _canonical(value, symbol_table) for key, value in result.items()}
+    elif type(result) in (int, bool, range, str):
+        return type(result).__name__, result
+    for key, value in symbol_table.snapshot().items():
+        if value is result:
+            return "symbol", key
+    return type(result).__name__, str(result)
+
+
+def _variables(symbol_table: Symbol_Table) -> dict:
+    """
+    :param symbol_table: the symbol table of a parse
+    :return: the entries added by the parse, stitch definitions are created with the table
+    """
+    return {key: (value, symbol_table.version(key)) for key, value in symbol_table.snapshot().items() if type(value) in (int, list)}
+
+
+def _parse(interpreter: KnitSpeak_Interpreter, pattern: str):
+    """
+    :param interpreter: the interpreter to parse with
+    :param pattern: a pattern
+    :return: the canonical results and symbol table entries of the parse, or the error it raised
+    """
+    symbol_table = Symbol_Table()
+    try:
+        result = interpreter.interpret(pattern, symbol_table=symbol_table)
+    except Exception as error:
+        return f"{type(error).__name__}: {error}"
+    return _canonical(result, symbol_table), _variables(symbol_table)
+
+
+def test_subset_matches_grammar():
+    library = []
+    for pattern_file in sorted(glob.glob(os.path.join(os.path.dirname(__file__), os.pardir, "example_knitspeak", "**", "*.ks"),
+                                         recursive=True)):
+        with open(pattern_file) as pattern:
+            library.append(pattern.read())
+    for pattern in subset_patterns + library:
+        symbol_table = Symbol_Table()
+        result = fast_parse(pattern, symbol_table)
+        if result is None:
+            assert pattern not in subset_patterns, pattern
+            continue
+        assert (_canonical(result, symbol_table), _variables(symbol_table)) == _parse(grammar_parser, pattern), pattern
+
+
+def test_outside_subset():
+    interpreter = KnitSpeak_Interpreter()
+    for pattern in grammar_patterns:
+        symbol_table = Symbol_Table()
+        assert fast_parse(pattern, symbol_table) is None, pattern
+        assert _variables(symbol_table) == _variables(Symbol_Table())  # nothing is written before falling back
+        assert _parse(interpreter, pattern) == _parse(grammar_parser, pattern), pattern
@@ -0,0 +1,96 @@
+"""Tests for saving and loading knit graphs in the binary file format"""
+import io
+
+import pytest
+
+from debugging_tools.simple_knitgraphs import lace_and_twist, short_rows
+from knit_graphs.Array_Graph import Array_Graph
+from knit_graphs.Knit_Graph import Knit_Graph
+from knit_graphs.Mapped_Knit_Graph import Mapped_Knit_Graph, Read_Only_Error
+from knit_graphs.Yarn import Yarn
+from knitspeak_compiler.knitspeak_compiler import Knitspeak_Compiler
+from knitting_machine.knitgraph_to_knitout import Knitout_Generator
+
+
+def _graph_structure(knit_graph: Knit_Graph):
+    structure = []
+    for loop_id in knit_graph.graph.nodes:
+        loop = knit_graph[loop_id]
+        parents = [(parent_id, knit_graph.graph[parent_id][loop_id]) for parent_id in knit_graph.graph.predecessors(loop_id)]
+        structure.append((loop_id, loop.yarn_id, loop.is_twisted, [parent.loop_id for parent in loop.parent_loops], parents))
+    yarns = {yarn_id: ([*yarn], yarn.last_loop_id, yarn.carrier.carrier_ids) for yarn_id, yarn in knit_graph.yarns.items()}
+    return structure, yarns, knit_graph.get_courses(), knit_graph.last_loop_id
+
+
+def _knitout(knit_graph: Knit_Graph):
+    generator = Knitout_Generator(knit_graph)
+    generator.generate_instructions()
+    return generator._instructions
+
+
+def test_save_and_load(tmp_path):
+    pattern = r"""
+        1st row k, lc2|2, k, rc2|2, [k] to end.
+        all ws rows p.
+        3rd row k, k2tog, yo, yo, sk2po, yo, [k] to end.
+    """
+    knit_graph = Knitspeak_Compiler().compile(11, 4, pattern)
+    path = str(tmp_path / "cables.kg")
+    knit_graph.save(path)
+    for graph in [None, Array_Graph()]:
+        loaded = Knit_Graph.load(path, graph)
+        assert _graph_structure(loaded) == _graph_structure(knit_graph)
+
+
+def test_save_and_load_buffer():
+    for knit_graph in [lace_and_twist(), short_rows(8, 2), Knit_Graph()]:
+        buffer = io.BytesIO()
+        knit_graph.save(buffer)
+        buffer.seek(0)
+        loaded = Knit_Graph.load(buffer)
+        assert _graph_structure(loaded) == _graph_structure(knit_graph)
+
+
+def test_loaded_knitout():
+    knit_graph = short_rows(8, 2)
+    buffer = io.BytesIO()
+    knit_graph.save(buffer)
+    buffer.seek(0)
+    assert _knitout(Knit_Graph.load(buffer, Array_Graph())) == _knitout(knit_graph)
+
+
+def test_mapped_knit_graph(tmp_path):
+    knit_graph = short_rows(8, 2)
+    path = str(tmp_path / "short_rows.kg")
+    knit_graph.save(path)
+    with Mapped_Knit_Graph(path, cache_size=4) as mapped:
+        assert _graph_structure(mapped) == _graph_structure(knit_graph)
+        assert len(mapped.loops._loops) <= 4
+        assert _knitout(mapped) == _knitout(knit_graph)
+        assert [*mapped.graph.successors(0)] == [*knit_graph.graph.successors(0)]
+        assert mapped.fingerprint() == knit_graph.fingerprint()
+        for mapped_view, view in zip(mapped.iter_courses(), knit_graph.iter_courses()):
+            assert [getattr(mapped_view, name) for name in view.__slots__] == [getattr(view, name) for name in view.__slots__]
+        yarn = mapped.yarns["yarn"]
+        for modify in [lambda: mapped.add_loop(knit_graph.loops[0]), lambda: mapped.add_yarn(yarn), lambda: mapped.connect_loops(0, 1),
+                       lambda: mapped.add_course(yarn, [[]]), lambda: mapped.truncate(0),
+                       lambda: mapped.loops[1].add_parent_loop(mapped.loops[0])]:
+            with pytest.raises(Read_Only_Error):
+                modify()
+
+
+def test_mapped_unsorted_loop_ids(tmp_path):
+    knit_graph = Knit_Graph()
+    yarn = Yarn("yarn", knit_graph)
+    knit_graph.add_yarn(yarn)
+    for loop_id, parent_id in [(10, None), (11, None), (0, 11), (1, 10)]:  # the second course has lower ids than the first
+        _, loop = yarn.add_loop_to_end(loop_id=loop_id)
+        knit_graph.add_loop(loop)
+        if parent_id is not None:
+            knit_graph.connect_loops(parent_id, loop_id)
+    path = str(tmp_path / "unsorted.kg")
+    knit_graph.save(path)
+    with Mapped_Knit_Graph(path) as mapped:
+        assert _graph_structure(mapped) == _graph_structure(knit_graph)
+        assert [[*mapped.graph.successors(loop_id)] for loop_id in [10, 11, 0]] == [[1], [0], []]
+        assert 5 not in mapped.graph and not mapped.yarns["yarn"]._ids_increase
@@ -1,6 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
 from debugging_tools.knit_graph_viz import visualize_knitGraph
 
+from knit_graphs.Knit_Graph import Pull_Direction
+from knitspeak_compiler.course_program import lower_course, OP_STITCH, OP_UNTIL, OP_END_UNTIL
 from knitspeak_compiler.knitspeak_compiler import Knitspeak_Compiler
+from knitspeak_compiler.knitspeak_interpreter import knitspeak_interpreter
+from knitspeak_compiler.knitspeak_interpreter.symbol_table import Symbol_Table
 from knitting_machine.knitgraph_to_knitout import Knitout_Generator
 
 
@@ -80,3 +88,174 @@ def test_write_short_rows():
 #     test_write_slipped_rib()
 #     test_cable()
 #     test_lace()
+
+
+def test_course_kernels():
+    pattern = r"""
+        all rs rows k, k2tog, yo 2, sk2po, yo 2, skpo, k.
+        all ws rows p 2, k, p 3, k, p 2.
+    """
+    compiler = Knitspeak_Compiler()
+    knit_graph = compiler.compile(9, 20, pattern)
+    assert len(compiler._course_kernels) == 2  # one kernel for each side, replayed for later rows
+    assert knit_graph.validate() == []
+    for course in range(3, 21):
+        assert knit_graph.course_fingerprint(course) == knit_graph.course_fingerprint(course - 2)
+
+
+def test_compile_patterns():
+    patterns = [r"""all rs rows k, p 2, k 3. all ws rows p 6.""", r"""all rs rows k2tog, yo, k 4. all ws rows p."""]
+    compiler = Knitspeak_Compiler()
+    for _ in range(3):
+        for pattern in patterns:  # templates of earlier parses are freed, so their ids may be reused
+            compiler._start_graph()
+            knit_graph = compiler.compile(6, 6, pattern)
+            assert knit_graph.fingerprint() == Knitspeak_Compiler().compile(6, 6, pattern).fingerprint()
+            assert len(compiler._course_kernels) == 2 and len(compiler._course_programs) == 2
+
+
+def test_course_program():
+    compiler = Knitspeak_Compiler()
+    compiler.compile(9, 2, "1st row k 3, [k, p] to last 2 sts, k2tog. 2nd row p.")
+    instructions = compiler.course_ids_to_operations[1]
+    rs_program = lower_course(instructions, working_ws=False)
+    ws_program = lower_course(instructions, working_ws=True)
+    assert rs_program.code[0:3] == [OP_STITCH, 0, 3]  # static stitch repeats are a count on the stitch
+    assert OP_UNTIL in rs_program.code and OP_END_UNTIL in rs_program.code
+    assert [stitch[2] for stitch in rs_program.stitches] == [Pull_Direction.BtF, Pull_Direction.FtB, Pull_Direction.BtF]
+    assert [stitch[2] for stitch in ws_program.stitches] == [Pull_Direction.FtB, Pull_Direction.BtF, Pull_Direction.FtB]
+    assert rs_program.stitches[2][1] == (-1, 0) and ws_program.stitches[2][1] == (0, 1)
+    assert [*rs_program.counted_blocks.values()] == [(2, [0, 1])]  # [k, p] consumes two loops per pass
+
+
+def test_counted_repeats():
+    knit_graph = Knitspeak_Compiler().compile(10, 3, "1st row k, [k, p] to last 3 sts, k 3. all ws rows [p] to end.")
+    assert knit_graph.validate() == []
+    assert len(knit_graph.loops_in_course(3)) == 10
+    with pytest.raises(AssertionError):  # an odd number of loops cannot be consumed by [k, p]
+        Knitspeak_Compiler().compile(9, 2, "1st row k, [k, p] to last 3 sts, k 3. 2nd row p.")
+
+
+def test_compile_iter():
+    pattern = r"""
+        all rs rows k, k2tog, yo 2, sk2po, yo 2, skpo, k.
+        all ws rows p 2, k, p 3, k, p 2.
+    """
+    knit_graph = Knitspeak_Compiler().compile(9, 6, pattern)
+    courses = [*Knitspeak_Compiler().compile_iter(9, 6, pattern)]
+    assert [course.course for course in courses] == [*range(0, 7)]
+    for course, graph_course in zip(courses, knit_graph.iter_courses()):
+        assert [*course.loop_ids] == [*graph_course.loop_ids]
+        assert [*course.parent_ids] == [*graph_course.parent_ids]
+        assert [*course.pull_directions] == [*graph_course.pull_directions]
+        assert [*course.parent_offsets] == [*graph_course.parent_offsets]
+    compiler = Knitspeak_Compiler()
+    discarded = [*compiler.compile_iter(9, 6, pattern, discard_courses=True)]
+    assert [[*course.parent_ids] for course in discarded] == [[*course.parent_ids] for course in courses]
+    assert len(compiler.knit_graph.graph) == 0
+    assert compiler.knit_graph.last_loop_id == knit_graph.last_loop_id
+
+
+def test_compile_sizes():
+    triangle = r"""
+        from rs 1 to ((1+n=5)/2) rows k border=currow, [p] to last border sts, k border.
+        from ws 1 to ((1+n)/2)rows p border=currow, [k] to last border sts, p border.
+    """
+    slipped = r"""
+        all rs rows k rib=1, [k rib, p rib] to last rib sts, k rib.
+        all ws rows k rib, [slip rib, k rib] to last rib sts, p rib.
+    """
+    for pattern, widths, rows in [(triangle, [7, 9, 13], 3), (slipped, [6, 8, 12], 8)]:
+        knit_graphs = Knitspeak_Compiler().compile_sizes(widths, rows, pattern)
+        assert [*knit_graphs] == widths
+        for width, knit_graph in knit_graphs.items():
+            assert knit_graph.fingerprint() == Knitspeak_Compiler().compile(width, rows, pattern).fingerprint()
+    compiler = Knitspeak_Compiler()
+    compiler.compile(6, 2, slipped)
+    knit_graphs = compiler.compile_sizes([6, 8], 2, slipped)  # sizes are not compiled into the graph of the last compile
+    expected = Knitspeak_Compiler().compile(6, 2, slipped)
+    assert len(knit_graphs[6].loops) == len(expected.loops) and knit_graphs[6].fingerprint() == expected.fingerprint()
+
+
+def test_recompile():
+    pattern = r"""
+        from rs 1st to 5th row k, [p] to last st, k.
+        from ws 2nd to 8th row p, [k] to last st, p.
+        7th row [k, p] to last st, k.
+    """
+    edited = pattern.replace("7th row [k, p] to last st, k.", "7th row k 2, [p] to last 2 sts, k 2.")
+    compiler = Knitspeak_Compiler()
+    knit_graph = compiler.compile(9, 8, pattern)
+    first_loop = knit_graph.loops[0]
+    kept_loop = knit_graph.loops[9 * 6]  # the first loop of the 6th row
+    knit_graph = compiler.recompile(9, 8, edited)
+    assert knit_graph.loops[0] is first_loop and knit_graph.loops[9 * 6] is kept_loop  # rows before the edit are reused
+    assert knit_graph.fingerprint() == Knitspeak_Compiler().compile(9, 8, edited).fingerprint()
+    assert knit_graph.validate() == []
+    knit_graph = compiler.recompile(9, 6, edited)
+    assert knit_graph.loops[0] is first_loop
+    assert knit_graph.fingerprint() == Knitspeak_Compiler().compile(9, 6, edited).fingerprint()
+    knit_graph = compiler.recompile(7, 8, pattern)
+    assert knit_graph.fingerprint() == Knitspeak_Compiler().compile(7, 8, pattern).fingerprint()
+    ribbed = "all rs rows k rib=1, [k rib, p rib] to last rib sts, k rib. all ws rows k rib, [slip rib, k rib] to last rib sts, p rib."
+    compiler = Knitspeak_Compiler()
+    compiler.compile(8, 8, ribbed)
+    knit_graph = compiler.recompile(8, 8, ribbed.replace("rib=1", "rib=2"))
+    assert knit_graph.fingerprint() == Knitspeak_Compiler().compile(8, 8, ribbed.replace("rib=1", "rib=2")).fingerprint()
+
+
+def test_course_ranges():
+    pattern = r"""
+        1st and 2nd rows k.
+        from rs 3rd to 999999th row k, p.
+        from ws 4th to 1000000th row p, k.
+    """
+    compiler = Knitspeak_Compiler()
+    knit_graph = compiler.compile(6, 4, pattern)  # no course ids are expanded
+    assert len(knit_graph.loops) == 6 * 5
+    course_table = compiler.course_ids_to_operations
+    assert len(course_table) == 1000000
+    assert course_table[2] is course_table[1]
+    assert course_table[999999] is course_table[3] and course_table[500000] is course_table[4]
+    assert 1000001 not in course_table
+    overlapping = Knitspeak_Compiler()
+    overlapping.compile(6, 4, "1st, from 1st to 4th rows k. from rs 5th to 9th, 7th, from 6th to 8th rows p.")  # duplicates are folded
+    assert len(overlapping.course_ids_to_operations) == 9 and overlapping.course_ids_to_operations[7] is overlapping.course_ids_to_operations[6]
+    with pytest.raises(AssertionError, match="Course 7 is defined more than once"):
+        Knitspeak_Compiler().compile(6, 4, "from 1st to 9th row k. from rs 7th to 11th row p.")
+    with pytest.raises(AssertionError, match="Course 6 is undefined"):
+        Knitspeak_Compiler().compile(6, 4, "all rs rows k. from ws 2nd to 4th row p. 8th row p.")
+
+
+def test_shared_interpreter():
+    patterns = [r"""all rs rows k rib=1, [k rib, p rib] to last rib sts, k rib. all ws rows p.""",
+                r"""all rs rows k rib=2, [k rib, p rib] to last rib sts, k rib. all ws rows p.""",
+                r"""1st row k, [p] to last st, k. 2nd row p, [k] to last st, p."""]
+    expected = [Knitspeak_Compiler().compile(12, 6, pattern).fingerprint() for pattern in patterns]
+    interpreter = Knitspeak_Compiler()._parser
+    compiler = Knitspeak_Compiler(interpreter=interpreter)
+    assert compiler.compile(12, 6, patterns[1]).fingerprint() == expected[1]
+    symbol_table = Symbol_Table()
+    interpreter.interpret(patterns[2], symbol_table=symbol_table)
+    assert "rib" not in symbol_table and "all_rs" not in symbol_table  # definitions of earlier parses do not leak
+    with ThreadPoolExecutor(4) as executor:  # one interpreter parses for every thread without sharing symbol tables
+        fingerprints = list(executor.map(lambda pattern: Knitspeak_Compiler(interpreter=interpreter).compile(12, 6, pattern).fingerprint(),
+                                         patterns * 8))
+    assert fingerprints == expected * 8
+
+
+def test_stream_statements(tmp_path, monkeypatch):
+    monkeypatch.setattr(knitspeak_interpreter, "STATEMENT_CHUNK_SIZE", 5)  # statements span several chunks
+    pattern = r"""
+        n=1, from (n+1) to (n+3) rows k n, p (n=n+2).
+        5th and 6th rows [k, p] to end.
+        7th row k.
+    """
+    pattern_file = tmp_path / "pattern.ks"
+    pattern_file.write_text(pattern)
+    expected = Knitspeak_Compiler().compile(8, 8, pattern).fingerprint()
+    compiler = Knitspeak_Compiler(stream_statements=True)
+    assert compiler.compile(8, 8, str(pattern_file), patternIsFile=True).fingerprint() == expected
+    assert compiler.parse_results == [] and len(compiler.course_ids_to_operations) == 7
+    with pytest.raises(Exception, match="Expected"):
+        Knitspeak_Compiler(stream_statements=True).compile(8, 8, "1st row k. 2nd row p")
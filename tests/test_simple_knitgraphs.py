@@ -35,3 +35,85 @@ def test_short_rows():
     knit_graph = short_rows(6, buffer_height=1)
     _, __ = knit_graph.get_courses()
     visualize_knitGraph(knit_graph)
+
+
+def test_course_index_matches_scan():
+    for knit_graph in [stockinette(4, 4), rib(5, 4, 1), lace(4, 4), lace_and_twist(), short_rows(6, buffer_height=1)]:
+        loop_ids_to_course, course_to_loop_ids = knit_graph.get_courses()
+        assert (loop_ids_to_course, course_to_loop_ids) == knit_graph._scan_courses()
+        for loop_id, course in loop_ids_to_course.items():
+            assert knit_graph.course_of(loop_id) == course
+            assert loop_id in knit_graph.loops_in_course(course)
+
+
+def test_yarn_order():
+    knit_graph = stockinette(4, 3)
+    yarn = knit_graph.yarns["yarn"]
+    assert [*yarn] == [*range(0, 12)]
+    assert yarn.prior_loop_id(0) is None and yarn.prior_loop_id(5) == 4
+    assert yarn.next_loop_id(5) == 6 and yarn.next_loop_id(11) is None
+    assert yarn.index(7) == 7 and [*yarn.loop_ids[2:4]] == [2, 3]
+    assert 11 in yarn and 12 not in yarn and yarn[3] is knit_graph[3]
+
+
+def test_add_course():
+    knit_graph = Knit_Graph()
+    yarn = Yarn("yarn", knit_graph)
+    knit_graph.add_yarn(yarn)
+    first_row = knit_graph.add_course(yarn, [[], [], [], []])
+    second_row = knit_graph.add_course(yarn, [[3], [2, 1], [], [0]], [Pull_Direction.BtF, Pull_Direction.FtB, Pull_Direction.BtF, Pull_Direction.BtF],
+                                       parent_offsets=[[0], [0, 1], [], [0]])
+    assert first_row == [0, 1, 2, 3] and second_row == [4, 5, 6, 7]
+    assert [parent.loop_id for parent in knit_graph[5].parent_loops] == [2, 1]
+    assert knit_graph.graph[1][5]["parent_offset"] == 1 and knit_graph.graph[1][5]["pull_direction"] is Pull_Direction.FtB
+    assert knit_graph.loops_in_course(1) == second_row
+
+
+def test_fingerprints():
+    knit_graph = stockinette(4, 4)
+    assert knit_graph.course_fingerprint(1) == knit_graph.course_fingerprint(3)
+    assert knit_graph.course_fingerprint(0) != knit_graph.course_fingerprint(1)
+    assert knit_graph.fingerprint() == stockinette(4, 4).fingerprint()
+    assert knit_graph.fingerprint() != rib(4, 4).fingerprint()
+    fingerprint = knit_graph.fingerprint()
+    last_course = knit_graph.loops_in_course(3)
+    knit_graph.add_course(knit_graph.yarns["yarn"], [[loop_id] for loop_id in reversed(last_course)])
+    assert knit_graph.fingerprint() != fingerprint
+    assert knit_graph.course_fingerprint(4) == knit_graph.course_fingerprint(2)
+
+
+def test_iter_courses():
+    knit_graph = lace_and_twist()
+    _, course_to_loop_ids = knit_graph.get_courses()
+    views = [*knit_graph.iter_courses()]
+    assert [view.course for view in views] == [*range(0, len(course_to_loop_ids))]
+    for view in views:
+        assert [*view.loop_ids] == course_to_loop_ids[view.course]
+        for position, loop_id in enumerate(view.loop_ids):
+            assert view.parents_of(position) == [*knit_graph.graph.predecessors(loop_id)]
+            assert [view.parent_ids[edge] for edge in view.stacked_edges(position)] == \
+                   [parent.loop_id for parent in knit_graph[loop_id].parent_loops]
+            for edge in view.parent_edges(position):
+                attributes = knit_graph.graph[view.parent_ids[edge]][loop_id]
+                assert view.pull_direction(edge) is attributes["pull_direction"]
+                assert view.depths[edge] == attributes["depth"] and view.parent_offsets[edge] == attributes["parent_offset"]
+    assert [view.course for view in knit_graph.iter_courses(1, 2)] == [1]
+
+
+def test_validate():
+    for knit_graph in [stockinette(4, 4), rib(5, 4, 1), lace_and_twist(), short_rows(6, buffer_height=1)]:
+        assert knit_graph.validate() == []
+    knit_graph = Knit_Graph(checked=False)
+    yarn = Yarn("yarn", knit_graph)
+    knit_graph.add_yarn(yarn)
+    knit_graph.add_course(yarn, [[], [], []])
+    knit_graph.add_course(yarn, [[2], [1], [1]], parent_offsets=[[0], [1], [0]])
+    knit_graph.loops[5].parent_loops.clear()
+    violations = knit_graph.validate()
+    assert len(violations) == 3
+    assert any("offset by 1" in violation for violation in violations)
+    assert any("pulled through by both" in violation for violation in violations)
+    assert any("stacked parents" in violation for violation in violations)
+    _, loop = yarn.add_loop_to_end()
+    knit_graph.add_loop(loop)  # unchecked graphs do not look the loop up on its yarn
+    assert [*yarn.loop_ids[-2:]] == [5, 6] and knit_graph.loops[6] is loop